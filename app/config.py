@@ -1,13 +1,196 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     base_url: str = "http://localhost:7272"
     log_level: str = "INFO"
-    
+    log_dir: str = "logs"
+    # Fraction of requests whose full request/response payloads are logged
+    log_payload_sample_rate: float = 0.01
+
+    # "fast" checks only the top-level shape of upstream /rag and /search
+    # payloads and skips response_model validation; "strict" validates fully
+    response_validation: str = "fast"
+
+    # Upstream HTTP client (connection pool shared by all handlers)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 5.0
+
+    # Per-endpoint upstream timeouts in seconds
+    rag_timeout: float = 120.0
+    search_timeout: float = 30.0
+    ingest_timeout: float = 300.0
+    documents_timeout: float = 30.0
+    delete_timeout: float = 30.0
+    health_timeout: float = 5.0
+    identity_timeout: float = 5.0
+
+    # Async database engine pool (ATLAS_DB)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # Upstream resilience: retries apply to idempotent calls only
+    retry_endpoints: List[str] = ["/v2/search", "/v2/documents_overview", "/v2/health"]
+    retry_max_attempts: int = 3
+    retry_backoff_base: float = 0.1
+    retry_backoff_max: float = 2.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    hedge_enabled: bool = False
+    hedge_endpoints: List[str] = ["/v2/search"]
+    hedge_delay: float = 0.5
+
+    # Background upstream health probe
+    health_probe_endpoint: str = "/v2/health"
+    health_probe_interval: float = 10.0
+
+    # /search/batch fan-out
+    search_batch_concurrency: int = 8
+    search_batch_max_queries: int = 500
+
+    # /documents/ingest batching
+    ingest_batch_max_files: int = 16
+    ingest_batch_max_bytes: int = 32 * 1024 * 1024
+    ingest_concurrency: int = 4
+    upload_chunk_size: int = 256 * 1024
+    max_upload_bytes: int = 1024 * 1024 * 1024
+    # Skip re-ingesting files whose content hash is unchanged (per user and filename)
+    ingest_dedup_enabled: bool = True
+    # A replaced document is deleted once its new version reports
+    # ingestion_status "success"; both are kept if that takes longer than
+    # ingest_replace_timeout seconds
+    ingest_replace_check_interval: float = 10.0
+    ingest_replace_timeout: float = 3600.0
+
+    # POST /documents/delete chunking
+    delete_chunk_size: int = 100
+    delete_concurrency: int = 4
+
+    # POST /signup/bulk: rows per multi-row INSERT and per request
+    signup_bulk_batch_size: int = 500
+    signup_bulk_max_users: int = 10000
+
+    # GET /documents in-memory index
+    documents_index_enabled: bool = True
+    documents_refresh_interval: float = 60.0
+    documents_refresh_page_size: int = 1000
+    documents_local_event_ttl: float = 300.0
+
+    # /rag answer cache
+    rag_cache_enabled: bool = True
+    rag_cache_ttl: float = 300.0
+    rag_cache_max_entries: int = 1024
+    rag_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # /search result cache
+    search_cache_enabled: bool = True
+    search_cache_ttl: float = 60.0
+    search_cache_max_entries: int = 4096
+    search_cache_max_bytes: int = 128 * 1024 * 1024
+
+    # Per-tier admission control, keyed by the user behind an R2R bearer token
+    # (Authorization header) as reported by identity_endpoint. Route classes
+    # are rag, search, documents and lookup (charged to the anonymous bucket
+    # when an unseen token needs verifying); "default" covers any class not
+    # listed.
+    # Off by default: see "Rate limiting" in the README before enabling it.
+    rate_limit_enabled: bool = False
+    rate_limit_default_tier: str = "free"
+    # Tier for callers without a valid token, limited per client address.
+    # Clients behind one proxy share a bucket, so it is generous.
+    rate_limit_anonymous_tier: str = "anonymous"
+    rate_limits: Dict[str, Dict[str, Dict[str, float]]] = {
+        "anonymous": {
+            "rag": {"rps": 10, "burst": 20, "concurrency": 16},
+            "search": {"rps": 50, "burst": 100, "concurrency": 32},
+            "documents": {"rps": 10, "burst": 20, "concurrency": 8},
+            "default": {"rps": 100, "burst": 200, "concurrency": 64},
+        },
+        "free": {
+            "rag": {"rps": 0.5, "burst": 2, "concurrency": 1},
+            "search": {"rps": 2, "burst": 5, "concurrency": 2},
+            "documents": {"rps": 0.5, "burst": 2, "concurrency": 1},
+            "default": {"rps": 5, "burst": 10, "concurrency": 4},
+        },
+        "pro": {
+            "rag": {"rps": 2, "burst": 5, "concurrency": 4},
+            "search": {"rps": 10, "burst": 20, "concurrency": 8},
+            "documents": {"rps": 2, "burst": 5, "concurrency": 2},
+            "default": {"rps": 20, "burst": 40, "concurrency": 16},
+        },
+        "enterprise": {
+            "rag": {"rps": 10, "burst": 20, "concurrency": 16},
+            "search": {"rps": 50, "burst": 100, "concurrency": 32},
+            "documents": {"rps": 10, "burst": 20, "concurrency": 8},
+            "default": {"rps": 100, "burst": 200, "concurrency": 64},
+        },
+    }
+    tier_cache_ttl: float = 60.0
+    tier_cache_max_entries: int = 10000
+    identity_endpoint: str = "/v2/user"
+    identity_cache_ttl: float = 300.0
+    identity_cache_max_entries: int = 10000
+
+    # Local BM25 index of chunks seen in search/RAG results and small text
+    # uploads; /search answers from it when upstream misses the deadline
+    lexical_index_enabled: bool = True
+    lexical_max_chunks: int = 100000
+    lexical_max_bytes: int = 64 * 1024 * 1024
+    # Capped at search_timeout; KG searches and filters the index cannot
+    # evaluate never fall back
+    lexical_fallback_deadline: float = 5.0
+    lexical_snapshot_path: Optional[str] = "data/lexical_index.json.gz"
+    lexical_snapshot_interval: float = 300.0
+    lexical_ingest_max_bytes: int = 1024 * 1024
+    lexical_ingest_chunk_chars: int = 1000
+
+    # Near-duplicate collapsing for requests with dedup=true. Upstream is asked
+    # for dedup_overfetch times the wanted results, over-fetching up to
+    # dedup_max_fetch (requests for more are fetched as asked);
+    # collapsing costs roughly 70us per uncached chunk signature.
+    dedup_threshold: float = 0.8
+    dedup_shingle_size: int = 3
+    dedup_overfetch: int = 3
+    dedup_max_fetch: int = 50
+    dedup_signature_cache_entries: int = 20000
+
+    # Prompt for /rag answers the gateway assembles itself via /v2/completion
+    rag_system_prompt: str = "You are a helpful assistant."
+    rag_prompt_template: str = (
+        "## Task:\n\n"
+        "Answer the query given immediately below given the context which follows later. "
+        "Use line item references like [1], [2], ... to refer to specifically numbered items "
+        "in the provided context. Pay close attention to the title of each given source to "
+        "ensure it is consistent with the query.\n\n"
+        "### Query:\n\n{query}\n\n"
+        "### Context:\n\n{context}\n\n"
+        "### Query:\n\n{query}\n\n"
+        "REMINDER - Use line item references like [1], [2], ... to refer to specifically "
+        "numbered items in the provided context.\n\n"
+        "## Response:\n"
+    )
+
+    # Token-budgeted context for /rag. A request's context_token_budget, or
+    # this default when set, switches it to gateway-side retrieval that trims
+    # the chunks to the budget. rag_tokenizer names a tiktoken encoding
+    # (e.g. cl100k_base) to count with when tiktoken is installed.
+    rag_context_token_budget: Optional[int] = None
+    rag_context_min_chunk_tokens: int = 32
+    rag_tokenizer: Optional[str] = None
+
+    # Document group membership cache, invalidated on every group change
+    group_cache_ttl: float = 300.0
+    group_cache_max_entries: int = 1024
+
     class Config:
         env_file = ".env"
 
 @lru_cache()
 def get_settings():
-    return Settings()
\ No newline at end of file
+    return Settings()
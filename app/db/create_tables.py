@@ -1,9 +1,9 @@
-from database import engine
-from models import Base
+from app.db.database import engine
+from app.db.models import Base
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
 
 if __name__ == "__main__":
     create_tables()
-    print("Tables created successfully!")
\ No newline at end of file
+    print("Tables created successfully!")
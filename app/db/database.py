@@ -1,16 +1,71 @@
 # database.py
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from typing import Any, AsyncIterator, Dict
 import os
 
+from app.config import get_settings
+
 SQLALCHEMY_DATABASE_URL = os.getenv("ATLAS_DB")
+
+def to_async_url(url: str):
+    """
+    Map a sync database URL onto its async driver (asyncpg / aiosqlite)
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend in ("postgresql", "postgres"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg takes `ssl` rather than libpq's `sslmode`
+        sslmode = parsed.query.get("sslmode")
+        if sslmode is not None:
+            parsed = parsed.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed
+
+def _pool_options(settings) -> Dict[str, Any]:
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+settings = get_settings()
+
+# Sync engine, only used for schema management (create_tables)
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by request handlers, so DB round-trips don't block the event loop
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), **_pool_options(settings))
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
 # Dependency for database sessions
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+def dialect_insert(db: AsyncSession, model):
+    """
+    INSERT construct for the session's dialect, with ON CONFLICT support
+    """
+    module = sqlite if db.bind.dialect.name == "sqlite" else postgresql
+    return module.insert(model)
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Connection counts for the async engine's pool
+    """
+    pool = async_engine.pool
+    stats = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
@@ -4,4 +4,5 @@ Base = declarative_base()
 
 from .user import User
 from .document_group import DocumentGroup
-from .document_group_item import DocumentGroupItem
\ No newline at end of file
+from .document_group_item import DocumentGroupItem
+from .document_hash import DocumentHash
\ No newline at end of file
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, BigInteger
+from datetime import datetime
+from . import Base
+
+class DocumentHash(Base):
+    __tablename__ = "document_hashes"
+    
+    owner_id = Column(String, primary_key=True)  # Verified R2R user ID, "" when anonymous
+    filename = Column(String, primary_key=True)
+    content_hash = Column(String(64), index=True)  # sha256 hex digest
+    document_id = Column(String, index=True)
+    size = Column(BigInteger)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -5,4 +5,5 @@ from datetime import datetime
 class DocumentGroupCreate(BaseModel):
     name: str
     description: Optional[str] = None
-    document_ids: List[str]
\ No newline at end of file
+    created_by: str  # R2R user ID
+    document_ids: List[str]
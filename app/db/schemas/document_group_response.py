@@ -10,5 +10,4 @@ class DocumentGroupResponse(BaseModel):
     created_at: datetime
     document_ids: List[str]
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = {"from_attributes": True}
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class DocumentGroupUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    document_ids: Optional[List[str]] = None  # replaces the membership when set
@@ -1,34 +1,451 @@
-from fastapi import Depends, FastAPI, HTTPException, UploadFile, File
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional
-import requests
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
 import json
 import logging
-from datetime import datetime
-from sqlalchemy.orm import Session
-from app.db.database import get_db, engine
+from contextlib import asynccontextmanager
+import os
+import time
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select, update
+from app.db.database import get_db, async_engine, dialect_insert, pool_stats, AsyncSessionLocal
 from app.db.models import Base
 
 from app.db.models.user import User
-from app.models.document import DocumentItem, DocumentsResponse, DeleteResponse
+from app.db.models.document_group import DocumentGroup
+from app.db.models.document_group_item import DocumentGroupItem
+from app.db.models.document_hash import DocumentHash
+from app.db.schemas.document_group_create import DocumentGroupCreate
+from app.db.schemas.document_group_documents import DocumentGroupDocuments
+from app.db.schemas.document_group_response import DocumentGroupResponse
+from app.db.schemas.document_group_update import DocumentGroupUpdate
+from app.models.document import (
+    DocumentItem, DocumentsResponse, DeleteResponse, IngestFileResult,
+    BulkDeleteRequest, BulkDeleteResponse, DocumentDeleteResult
+)
 from app.models.rag import RagRequest, RagResponse
-from app.models.search import SearchRequest, SearchResponse
-from app.models.signup import SignupRequest
-from app.utils.http import make_request
+from app.models.search import SearchRequest, SearchResponse, BatchSearchRequest, BatchSearchResponse, VectorSearchSettings
+from app.models.signup import SignupRequest, BulkSignupRequest, BulkSignupResponse, SignupResult
+from app.utils.http import make_request, open_stream, init_client, close_client, resilience_stats
+from app.utils.cache import TTLCache, canonical_key, normalize_query
+from app.utils.context import build_rag_messages, fit_to_budget
+from app.utils.dedup import collapse_near_duplicates
+from app.utils.document_index import DocumentIndex
+from app.utils.health import HealthProber
+from app.utils.lexical import LexicalIndex, split_text, supports_filters
+from app.utils.responses import FastJSONResponse, check_rag_shape, check_search_shape
+from app.utils.metrics import CallbackGauge, MetricsMiddleware, context_tokens_saved, rate_limited, record_usage, registry
+from app.utils.ratelimit import Admission, RateLimiter, RateLimitExceeded
+from app.utils.singleflight import SingleFlight
+from app.utils.streaming import RagStreamParser, format_sse
+from app.utils.tokens import estimate_tokens, get_token_counter
+from app.utils.upload import MultipartUpload, UploadStream, hash_upload, upload_stats
+from app.utils.log import RequestContextMiddleware, log_payload, setup_logging
 from app.config import get_settings
 
+settings = get_settings()
+
 # Setup logging
-logging.basicConfig(
-    filename=f'logs/rag_api_{datetime.now().strftime("%Y%m%d")}.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+setup_logging(settings.log_level, settings.log_dir)
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
+rag_cache = TTLCache(
+    max_entries=settings.rag_cache_max_entries,
+    max_bytes=settings.rag_cache_max_bytes,
+    ttl=settings.rag_cache_ttl,
+)
+
+search_cache = TTLCache(
+    max_entries=settings.search_cache_max_entries,
+    max_bytes=settings.search_cache_max_bytes,
+    ttl=settings.search_cache_ttl,
+)
+
+# Document IDs per group, keyed by group ID
+group_cache = TTLCache(
+    max_entries=settings.group_cache_max_entries,
+    ttl=settings.group_cache_ttl,
+)
+
+# Identical /rag and /search calls that arrive together share one upstream call
+upstream_flights = SingleFlight()
+
+# Bumped on every corpus change. Upstream calls that started before a change
+# may return stale answers, so they are not cached or shared afterwards.
+corpus_generation = 0
+
+def invalidate_corpus_caches(document_ids: Optional[List[str]] = None):
+    """
+    Drop cached answers after the document corpus changes
+
+    Search results are only evicted for the given documents, since a cached
+    result set is unaffected by changes to documents it does not contain.
+    """
+    global corpus_generation
+    corpus_generation += 1
+    rag_cache.clear()
+    for document_id in document_ids or []:
+        search_cache.invalidate_tag(document_id)
+
+async def _load_group_documents(group_id: str) -> Optional[List[str]]:
+    async with AsyncSessionLocal() as db:
+        group = await db.get(DocumentGroup, group_id)
+        if group is None:
+            return None
+        rows = await db.execute(
+            select(DocumentGroupItem.document_id).where(DocumentGroupItem.group_id == group_id)
+        )
+        return list(rows.scalars().all())
+
+async def resolve_group_documents(group_id: str) -> List[str]:
+    """
+    Return a group's document IDs, from the membership cache when possible
+    """
+    document_ids = group_cache.get(group_id)
+    if document_ids is None:
+        document_ids = await upstream_flights.do(f"group:{group_id}", lambda: _load_group_documents(group_id))
+        if document_ids is None:
+            raise HTTPException(status_code=404, detail=f"Document group {group_id} not found")
+        group_cache.set(group_id, document_ids)
+    return document_ids
+
+async def scope_to_group(
+    group_id: Optional[str],
+    vector_search_settings: Optional[VectorSearchSettings]
+) -> Optional[VectorSearchSettings]:
+    """
+    Restrict vector search to a group by adding a document_id $in filter
+
+    Existing search_filters are kept and combined with the group filter
+    under $and.
+    """
+    if group_id is None:
+        return vector_search_settings
+    group_filter = {"document_id": {"$in": await resolve_group_documents(group_id)}}
+    if vector_search_settings is None:
+        return VectorSearchSettings(search_filters=group_filter)
+    filters = vector_search_settings.search_filters
+    return vector_search_settings.model_copy(update={
+        "search_filters": {"$and": [filters, group_filter]} if filters else group_filter
+    })
+
+# Subscription tier per user ID
+tier_cache = TTLCache(
+    max_entries=settings.tier_cache_max_entries,
+    ttl=settings.tier_cache_ttl,
+)
+
+rate_limiter = RateLimiter(settings.rate_limits, default_tier=settings.rate_limit_default_tier)
+
+async def _load_user_tier(user_id: str) -> str:
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(User.id, User.subscription_tier).where(User.id == user_id)
+        )).first()
+    if row is None:
+        return ""
+    return row.subscription_tier or settings.rate_limit_default_tier
+
+async def resolve_user_tier(user_id: str) -> Optional[str]:
+    """
+    Return a registered user's subscription tier, or None for unknown IDs
+
+    Both outcomes are cached. When the lookup fails the default tier is
+    returned without caching it, so paying users recover as soon as the
+    database does.
+    """
+    tier = tier_cache.get(user_id)
+    if tier is None:
+        try:
+            tier = await upstream_flights.do(f"tier:{user_id}", lambda: _load_user_tier(user_id))
+        except Exception as e:
+            logger.error(f"Tier lookup failed for {user_id}: {str(e)}")
+            return settings.rate_limit_default_tier
+        tier_cache.set(user_id, tier)
+    return tier or None
+
+# Verified R2R user ID per bearer token (keyed by its SHA-256), "" when
+# upstream rejected the token
+identity_cache = TTLCache(
+    max_entries=settings.identity_cache_max_entries,
+    ttl=settings.identity_cache_ttl,
+)
+
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return token.strip() or None
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+async def _load_identity(token: str) -> str:
+    response = await make_request(
+        settings.base_url,
+        "GET",
+        settings.identity_endpoint,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=settings.identity_timeout
+    )
+    if isinstance(response, dict) and not response.get("success", True):
+        if response.get("status_code") in (401, 403):
+            return ""
+        raise RuntimeError(response.get("message", "Identity lookup failed"))
+    user = response.get("results") if isinstance(response, dict) else None
+    return str(user.get("id") or "") if isinstance(user, dict) else ""
+
+async def resolve_identity(token: str) -> Optional[str]:
+    """
+    Return the R2R user ID a bearer token belongs to, or None if it is invalid
+
+    Tokens are checked once against upstream and both outcomes are cached.
+    When upstream cannot answer the caller is treated as anonymous, uncached.
+    """
+    key = _token_key(token)
+    user_id = identity_cache.get(key)
+    if user_id is None:
+        try:
+            user_id = await upstream_flights.do(f"identity:{key}", lambda: _load_identity(token))
+        except Exception as e:
+            logger.error(f"Identity lookup failed: {str(e)}")
+            return None
+        identity_cache.set(key, user_id)
+    return user_id or None
+
+async def verified_user_id(authorization: Optional[str] = Header(None)) -> Optional[str]:
+    """
+    Dependency returning the R2R user behind the request's bearer token, if any
+    """
+    token = _bearer_token(authorization)
+    return await resolve_identity(token) if token else None
+
+def _rate_limit_error(e: RateLimitExceeded, tier: str, route_class: str) -> HTTPException:
+    rate_limited.inc(tier=tier, route_class=route_class, reason=e.reason)
+    logger.warning(f"Rejected {route_class} request for {tier} tier: {str(e)}")
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": e.retry_after_header}
+    )
+
+def rate_limit(route_class: str):
+    """
+    Dependency admitting a request under its caller's tier limits
+
+    Callers are identified by an R2R bearer token in the Authorization
+    header, verified upstream, and limited on their user's tier (the default
+    tier when they are not registered). Anyone else, including callers that
+    only send X-User-Id, is limited by client address on the anonymous tier.
+    Yields the Admission, or None when limits are off, for handlers that
+    charge extra tokens (per query in a batch) or outlive the dependency
+    (streams).
+    """
+    async def dependency(request: Request, authorization: Optional[str] = Header(None)):
+        if not settings.rate_limit_enabled:
+            yield None
+            return
+        host = request.client.host if request.client else "unknown"
+        user_key, tier = f"anon:{host}", settings.rate_limit_anonymous_tier
+        token = _bearer_token(authorization)
+        if token:
+            if _token_key(token) not in identity_cache:
+                # Unchecked tokens cost an upstream lookup, so random tokens
+                # are paid for from the caller's anonymous bucket
+                try:
+                    rate_limiter.charge(user_key, tier, "lookup")
+                except RateLimitExceeded as e:
+                    raise _rate_limit_error(e, tier, "lookup")
+            user_id = await resolve_identity(token)
+            if user_id is not None:
+                user_key = f"user:{user_id}"
+                tier = await resolve_user_tier(user_id) or settings.rate_limit_default_tier
+        try:
+            admission = rate_limiter.acquire(user_key, tier, route_class)
+        except RateLimitExceeded as e:
+            raise _rate_limit_error(e, tier, route_class)
+        try:
+            yield admission
+        finally:
+            if not admission.detached:
+                admission.release()
+    return dependency
+
+document_index = DocumentIndex(local_event_ttl=settings.documents_local_event_ttl)
+
+count_tokens, tokenizer_name = get_token_counter(settings.rag_tokenizer)
+
+# Shingle signatures per extraction_id, reused across deduplicated searches
+signature_cache = TTLCache(max_entries=settings.dedup_signature_cache_entries, ttl=3600.0)
+
+lexical_index = LexicalIndex(max_chunks=settings.lexical_max_chunks, max_bytes=settings.lexical_max_bytes)
+
+def _index_chunks(chunks: Any) -> None:
+    if settings.lexical_index_enabled and isinstance(chunks, list):
+        lexical_index.add_many(chunks)
+
+async def _lexical_snapshotter():
+    while True:
+        await asyncio.sleep(settings.lexical_snapshot_interval)
+        await _save_lexical_snapshot()
+
+async def _save_lexical_snapshot():
+    try:
+        # Copy the chunk list on the loop; serialize and write on a thread
+        await asyncio.to_thread(lexical_index.save, settings.lexical_snapshot_path, lexical_index.chunks())
+    except Exception as e:
+        logger.error(f"Lexical index snapshot failed: {str(e)}")
+
+def _document_item(raw: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: str(raw.get(name) or "") for name in DocumentItem.model_fields}
+
+async def refresh_document_index():
+    """
+    Reconcile the document index with a full upstream documents overview
+    """
+    items = []
+    offset = 0
+    while True:
+        response = await make_request(
+            settings.base_url,
+            "GET",
+            "/v2/documents_overview",
+            params={"offset": offset, "limit": settings.documents_refresh_page_size},
+            timeout=settings.documents_timeout
+        )
+        if not isinstance(response, dict) or not response.get("success", True):
+            message = response.get("message") if isinstance(response, dict) else response
+            raise RuntimeError(f"Failed to fetch documents overview: {message}")
+        page = response.get("results") or []
+        items.extend(_document_item(raw) for raw in page if raw.get("id"))
+        offset += len(page)
+        if len(page) < settings.documents_refresh_page_size:
+            break
+    document_index.replace(items)
+    pruned = lexical_index.prune(lambda document_id: document_id in document_index)
+    logger.info(f"Document index refreshed: {len(document_index)} documents, {pruned} stale lexical chunks pruned")
+
+async def _document_index_refresher():
+    while True:
+        try:
+            await upstream_flights.do("documents_overview", refresh_document_index)
+        except Exception as e:
+            logger.error(f"Document index refresh failed: {str(e)}")
+        await asyncio.sleep(settings.documents_refresh_interval)
+
+async def _probe_upstream():
+    response = await make_request(
+        settings.base_url,
+        "GET",
+        settings.health_probe_endpoint,
+        timeout=settings.health_timeout
+    )
+    if isinstance(response, dict) and not response.get("success", True):
+        raise RuntimeError(response.get("message", "Health probe failed"))
+
+# Keeps references to fire-and-forget tasks so they are not garbage collected
+_spawned_tasks = set()
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _spawned_tasks.add(task)
+    task.add_done_callback(_spawned_tasks.discard)
+    return task
+
+health_prober = HealthProber(_probe_upstream, interval=settings.health_probe_interval)
+
+def _cache_samples(field: str):
+    return [({"cache": name}, cache.stats()[field]) for name, cache in (("rag", rag_cache), ("search", search_cache))]
+
+_BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+for metric in (
+    CallbackGauge("rag_api_cache_entries", "Entries held in each gateway cache", lambda: _cache_samples("entries")),
+    CallbackGauge("rag_api_cache_bytes", "Approximate bytes held in each gateway cache", lambda: _cache_samples("bytes")),
+    CallbackGauge("rag_api_cache_hits_total", "Gateway cache hits", lambda: _cache_samples("hits"), type="counter"),
+    CallbackGauge("rag_api_cache_misses_total", "Gateway cache misses", lambda: _cache_samples("misses"), type="counter"),
+    CallbackGauge(
+        "rag_api_singleflight_saved_total", "Upstream calls saved by coalescing identical requests",
+        lambda: [({}, upstream_flights.shared)], type="counter"
+    ),
+    CallbackGauge(
+        "rag_api_upload_bytes_total", "Bytes streamed from uploads to the RAG server",
+        lambda: [({}, upload_stats.bytes_streamed)], type="counter"
+    ),
+    CallbackGauge(
+        "rag_api_upload_files_total", "Files streamed to the RAG server",
+        lambda: [({}, upload_stats.files_streamed)], type="counter"
+    ),
+    CallbackGauge("rag_api_uploads_in_flight", "Uploads currently streaming", lambda: [({}, upload_stats.in_flight)]),
+    CallbackGauge(
+        "rag_api_upload_buffered_bytes", "Bytes held in memory by uploads currently streaming",
+        lambda: [({}, upload_stats.buffered_bytes)]
+    ),
+    CallbackGauge(
+        "rag_api_upload_buffered_bytes_per_upload", "Mean bytes held in memory per upload currently streaming",
+        lambda: [({}, upload_stats.buffered_bytes_per_upload())]
+    ),
+    CallbackGauge(
+        "rag_api_process_resident_memory_bytes", "Resident memory of the gateway process",
+        lambda: [({}, upload_stats.snapshot()["rss_bytes"])]
+    ),
+    CallbackGauge(
+        "rag_api_upstream_breaker_state", "Circuit breaker state per endpoint (0 closed, 1 half-open, 2 open)",
+        lambda: [({"endpoint": endpoint}, _BREAKER_STATES[state["state"]]) for endpoint, state in resilience_stats()["breakers"].items()]
+    ),
+    CallbackGauge(
+        "rag_api_upstream_retries_total", "Retried upstream calls per endpoint",
+        lambda: [({"endpoint": endpoint}, count) for endpoint, count in resilience_stats()["retries"].items()], type="counter"
+    ),
+    CallbackGauge("rag_api_documents_indexed", "Documents held in the gateway document index", lambda: [({}, len(document_index))]),
+    CallbackGauge(
+        "rag_api_upstream_health_rtt_seconds", "Round-trip time of the last upstream health probe",
+        lambda: [({}, health_prober.last_rtt_ms / 1000 if health_prober.last_rtt_ms is not None else None)]
+    ),
+):
+    registry.register(metric)
+
+def _result_document_ids(response: Dict[str, Any]) -> List[str]:
+    results = response.get("results") or {}
+    return [item.get("document_id") for item in results.get("vector_search_results") or [] if item.get("document_id")]
 
-app = FastAPI(title="RAG API", description="API for managing RAG documents")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_client(settings)
+    background_tasks = [asyncio.create_task(health_prober.run())]
+    if settings.documents_index_enabled:
+        background_tasks.append(asyncio.create_task(_document_index_refresher()))
+    if settings.ingest_dedup_enabled:
+        background_tasks.append(asyncio.create_task(_replacement_settler()))
+    snapshots = settings.lexical_index_enabled and settings.lexical_snapshot_path
+    if snapshots:
+        if os.path.exists(settings.lexical_snapshot_path):
+            try:
+                loaded = await asyncio.to_thread(lexical_index.load, settings.lexical_snapshot_path)
+                logger.info(f"Loaded {loaded} lexical chunks from {settings.lexical_snapshot_path}")
+            except Exception as e:
+                logger.error(f"Failed to load lexical index snapshot: {str(e)}")
+        background_tasks.append(asyncio.create_task(_lexical_snapshotter()))
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        if snapshots:
+            await _save_lexical_snapshot()
+        await close_client()
+        await async_engine.dispose()
+
+app = FastAPI(title="RAG API", description="API for managing RAG documents", lifespan=lifespan)
+
+app.add_middleware(MetricsMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -39,30 +456,141 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so every log record for a request carries its ID
+app.add_middleware(RequestContextMiddleware, sample_rate=settings.log_payload_sample_rate)
+
 # Endpoints
+def _rag_cache_key(request: RagRequest) -> str:
+    return canonical_key({
+        "query": normalize_query(request.query),
+        "rag_generation_config": request.rag_generation_config,
+        "vector_search_settings": request.vector_search_settings.model_dump(mode="json") if request.vector_search_settings else None,
+        "dedup": request.dedup,
+        "context_token_budget": _context_budget(request),
+    })
+
+def _context_budget(request: RagRequest) -> Optional[int]:
+    return request.context_token_budget or settings.rag_context_token_budget
+
+def _prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(count_tokens(message["content"]) for message in messages)
+
+async def _scope_rag_request(request: RagRequest) -> RagRequest:
+    if request.group_id is None:
+        return request
+    return request.model_copy(update={
+        "group_id": None,
+        "vector_search_settings": await scope_to_group(request.group_id, request.vector_search_settings),
+    })
+
+async def _gateway_rag(request: RagRequest) -> Dict[str, Any]:
+    """
+    Answer a RAG query with gateway-side retrieval and /v2/completion
+
+    Retrieval goes through _search, with dedup when requested, and the
+    ranked chunks are trimmed to the context token budget if there is one.
+    Returns the same shape as /v2/rag, or the failed completion envelope.
+    """
+    search_result, _ = await _search(SearchRequest(
+        query=request.query,
+        vector_search_settings=request.vector_search_settings,
+        dedup=request.dedup,
+    ))
+    retrieved = search_result["results"]["vector_search_results"]
+    chunks = retrieved
+    messages = build_rag_messages(request.query, chunks, settings.rag_system_prompt, settings.rag_prompt_template)
+    report = None
+    budget = _context_budget(request)
+    if budget is not None:
+        chunks, context_tokens = fit_to_budget(retrieved, budget, count_tokens, settings.rag_context_min_chunk_tokens)
+        baseline_tokens = _prompt_tokens(messages)
+        messages = build_rag_messages(request.query, chunks, settings.rag_system_prompt, settings.rag_prompt_template)
+        prompt_tokens = _prompt_tokens(messages)
+        report = {
+            "budget": budget,
+            "tokenizer": tokenizer_name,
+            "chunks_retrieved": len(retrieved),
+            "chunks_used": len(chunks),
+            "context_tokens": context_tokens,
+            "prompt_tokens": prompt_tokens,
+            "baseline_prompt_tokens": baseline_tokens,
+            "tokens_saved": baseline_tokens - prompt_tokens,
+        }
+        context_tokens_saved.inc(baseline_tokens - prompt_tokens)
+
+    completion = await make_request(
+        settings.base_url,
+        "POST",
+        "/v2/completion",
+        json={"messages": messages, "generation_config": request.rag_generation_config or {}},
+        timeout=settings.rag_timeout
+    )
+    if isinstance(completion, dict) and not completion.get("success", True):
+        return completion
+    return {
+        "results": {
+            "completion": completion.get("results"),
+            "search_results": {"vector_search_results": chunks, "kg_search_results": None},
+        },
+        "duplicates_collapsed": search_result.get("duplicates_collapsed", 0),
+        "context_budget": report,
+    }
+
+def _rag_response(result: Dict[str, Any], response: Response, cache_status: str):
+    if settings.response_validation == "strict":
+        response.headers["X-Cache"] = cache_status
+        return result
+    return FastJSONResponse(result, headers={"X-Cache": cache_status})
+
 @app.post("/rag", response_model=RagResponse)
-async def rag(request: RagRequest):
+async def rag(request: RagRequest, response: Response, _limit=Depends(rate_limit("rag"))):
     """
     Send a query to the RAG server
     """
-    logger.info(f"Sending query to RAG: {request}")
+    logger.info(f"Sending query to RAG: {request.query}")
+    log_payload(logger, "RAG request", request)
+
+    request = await _scope_rag_request(request)
+    cache_key = _rag_cache_key(request)
+    if settings.rag_cache_enabled:
+        cached = rag_cache.get(cache_key)
+        if cached is not None:
+            return _rag_response(cached, response, "HIT")
     
+    generation = corpus_generation
     try:
-        response = await make_request(
-            settings.base_url,
-            "POST",
-            "/v2/rag",
-            data=json.dumps({"query": request.query}),
-            headers={"Content-Type": "application/json"}
-        )
+        if request.dedup or _context_budget(request) is not None:
+            fetch = lambda: _gateway_rag(request)
+        else:
+            fetch = lambda: make_request(
+                settings.base_url,
+                "POST",
+                "/v2/rag",
+                json=request.model_dump(exclude_none=True, exclude={"dedup", "context_token_budget"}),
+                timeout=settings.rag_timeout
+            )
+        result = await upstream_flights.do(f"rag:{generation}:{cache_key}", fetch)
         
-        if isinstance(response, dict) and not response.get("success", True):
+        if isinstance(result, dict) and not result.get("success", True):
             raise HTTPException(
-                status_code=response.get("status_code", 500),
-                detail=response.get("message", "RAG query failed")
+                status_code=result.get("status_code", 500),
+                detail=result.get("message", "RAG query failed")
             )
+
+        if isinstance(result, dict):
+            record_usage(((result.get("results") or {}).get("completion") or {}).get("usage"))
+            _index_chunks(((result.get("results") or {}).get("search_results") or {}).get("vector_search_results"))
+
+        if settings.response_validation == "strict":
+            RagResponse(**result)
+        else:
+            check_rag_shape(result)
+
+        log_payload(logger, "RAG response", result)
+        if settings.rag_cache_enabled and generation == corpus_generation:
+            rag_cache.set(cache_key, result)
         
-        return response
+        return _rag_response(result, response, "MISS")
         
     except Exception as e:
         logger.error(f"RAG query failed: {str(e)}")
@@ -71,87 +599,781 @@ async def rag(request: RagRequest):
             detail=f"RAG query failed: {str(e)}"
         )
 
+async def _relay_cached_rag(cached: Dict[str, Any]):
+    results = cached.get("results") or {}
+    search_results = results.get("search_results") or {}
+    completion = results.get("completion") or {}
+    yield format_sse("search", search_results.get("vector_search_results") or [])
+    if search_results.get("kg_search_results"):
+        yield format_sse("kg_search", search_results["kg_search_results"])
+    choices = completion.get("choices") or [{}]
+    content = (choices[0].get("message") or {}).get("content") or ""
+    yield format_sse("token", {"content": content})
+    yield format_sse("done", {"usage": completion.get("usage"), "estimated": False})
+
+async def _relay_rag_stream(upstream, query: str):
+    parser = RagStreamParser()
+    context = ""
+    try:
+        async for chunk in upstream.aiter_text():
+            for event, data in parser.feed(chunk):
+                if event == "token":
+                    yield format_sse("token", {"content": data})
+                else:
+                    if event == "search":
+                        _index_chunks(data)
+                    if isinstance(data, list):
+                        context += "".join(item.get("text", "") for item in data if isinstance(item, dict))
+                    yield format_sse(event, data)
+
+        # The streaming upstream does not report usage, so estimate it locally
+        prompt_tokens = estimate_tokens(query) + estimate_tokens(context)
+        completion_tokens = estimate_tokens(parser.completion)
+        yield format_sse("done", {
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+            "estimated": True,
+        })
+    except Exception as e:
+        logger.error(f"RAG stream failed: {str(e)}")
+        yield format_sse("error", {"message": f"RAG stream failed: {str(e)}"})
+    finally:
+        await upstream.aclose()
+
+async def _release_after(stream: AsyncIterator[str], release: Callable[[], None]):
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        release()
+
+def _event_stream(stream: AsyncIterator[str], limit: Optional[Admission], headers: Dict[str, str]) -> StreamingResponse:
+    """
+    SSE response that holds the caller's concurrency slot until it ends
+
+    FastAPI exits yield dependencies before a streamed body is sent, so the
+    slot is detached and released by the stream, or by the background task
+    when the client disconnects before the stream starts.
+    """
+    if limit is None:
+        return StreamingResponse(stream, media_type="text/event-stream", headers=headers)
+    release = limit.detach()
+    return StreamingResponse(
+        _release_after(stream, release),
+        media_type="text/event-stream",
+        headers=headers,
+        background=BackgroundTask(release)
+    )
+
+@app.post("/rag/stream")
+async def rag_stream(request: RagRequest, limit=Depends(rate_limit("rag"))):
+    """
+    Stream a RAG answer as Server-Sent Events
+
+    Emits the search results first, then one `token` event per completion
+    chunk and a final `done` event carrying the usage totals.
+    """
+    logger.info(f"Streaming query to RAG: {request.query}")
+    log_payload(logger, "RAG stream request", request)
+    # Covers the configured default budget too, so a stream never relays a
+    # budgeted answer as if it were a plain one
+    if request.dedup or _context_budget(request) is not None:
+        raise HTTPException(status_code=400, detail="dedup and context token budgets are not supported for streamed RAG queries")
+    request = await _scope_rag_request(request)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    if settings.rag_cache_enabled:
+        cached = rag_cache.get(_rag_cache_key(request))
+        if cached is not None:
+            return _event_stream(_relay_cached_rag(cached), limit, {**headers, "X-Cache": "HIT"})
+
+    payload = request.model_dump(exclude_none=True, exclude={"dedup", "context_token_budget"})
+    payload["rag_generation_config"] = {**(request.rag_generation_config or {}), "stream": True}
+
+    try:
+        upstream = await open_stream(
+            settings.base_url,
+            "POST",
+            "/v2/rag",
+            json=payload,
+            timeout=settings.rag_timeout
+        )
+    except Exception as e:
+        logger.error(f"RAG stream failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"RAG stream failed: {str(e)}"
+        )
+
+    return _event_stream(_relay_rag_stream(upstream, request.query), limit, {**headers, "X-Cache": "MISS"})
+
+def _can_fall_back(request: SearchRequest) -> bool:
+    # Only plain vector searches whose filters the index can evaluate are
+    # stood in for by the lexical index; KG searches get their full timeout
+    vector_settings = request.vector_search_settings or VectorSearchSettings()
+    kg_settings = request.kg_search_settings
+    if kg_settings is not None and kg_settings.use_kg_search:
+        return False
+    return vector_settings.use_vector_search and supports_filters(vector_settings.search_filters)
+
+def _lexical_search(request: SearchRequest) -> Dict[str, Any]:
+    vector_settings = request.vector_search_settings or VectorSearchSettings()
+    results = lexical_index.search(
+        request.query,
+        limit=vector_settings.search_limit,
+        offset=vector_settings.offset,
+        filters=vector_settings.search_filters
+    )
+    return {"results": {"vector_search_results": results, "kg_search_results": None}, "lexical_only": True}
+
+async def _scope_search_request(request: SearchRequest) -> SearchRequest:
+    if request.group_id is None:
+        return request
+    return request.model_copy(update={
+        "group_id": None,
+        "vector_search_settings": await scope_to_group(request.group_id, request.vector_search_settings),
+    })
+
+async def _dedup_search(request: SearchRequest) -> Tuple[Dict[str, Any], bool]:
+    """
+    Over-fetch from offset 0, collapse near-duplicates, then page
+
+    The over-fetched upstream result is what gets cached, so repeating a
+    deduplicated search only costs the collapse itself.
+    """
+    vector_settings = request.vector_search_settings or VectorSearchSettings()
+    wanted = vector_settings.offset + vector_settings.search_limit
+    # The cap only limits over-fetching; the requested page is always fetched
+    fetch = max(wanted, min(wanted * settings.dedup_overfetch, settings.dedup_max_fetch))
+    result, cached = await _search(request.model_copy(update={
+        "dedup": False,
+        "vector_search_settings": vector_settings.model_copy(update={"search_limit": fetch, "offset": 0}),
+    }))
+    kept, collapsed = collapse_near_duplicates(
+        result["results"]["vector_search_results"],
+        threshold=settings.dedup_threshold,
+        limit=wanted,
+        shingle_size=settings.dedup_shingle_size,
+        signatures=signature_cache
+    )
+    return {
+        **result,
+        "results": {**result["results"], "vector_search_results": kept[vector_settings.offset:]},
+        "duplicates_collapsed": collapsed,
+    }, cached
+
+async def _search(request: SearchRequest) -> Tuple[Dict[str, Any], bool]:
+    """
+    Run one search through the cache and single-flight layers
+
+    Returns the upstream payload and whether it was served from cache. The
+    payload is fully validated only when response_validation is "strict".
+    """
+    request = await _scope_search_request(request)
+    if request.dedup:
+        return await _dedup_search(request)
+    cache_key = canonical_key(request.model_dump(mode="json"))
+    if settings.search_cache_enabled:
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return cached, True
+
+    payload = request.model_dump(exclude_none=True, exclude_unset=True, exclude={"dedup"})
+
+    generation = corpus_generation
+    upstream = upstream_flights.do(f"search:{generation}:{cache_key}", lambda: make_request(
+        settings.base_url,
+        method="POST",
+        endpoint="/v2/search",
+        json=payload,
+        timeout=settings.search_timeout
+    ))
+    fallback = settings.lexical_index_enabled and len(lexical_index) > 0 and _can_fall_back(request)
+    if fallback:
+        deadline = min(settings.lexical_fallback_deadline, settings.search_timeout)
+        try:
+            # The shared upstream call keeps running for other waiters
+            result = await asyncio.wait_for(upstream, deadline)
+        except asyncio.TimeoutError:
+            logger.warning(f"Search missed its {deadline}s deadline, answering from lexical index")
+            return _lexical_search(request), False
+    else:
+        result = await upstream
+    log_payload(logger, "Search response", result)
+
+    if isinstance(result, dict) and not result.get("success", True):
+        logger.error(f"Search request failed: {result.get('message')}")
+        if fallback and result.get("status_code") in (502, 503, 504):
+            logger.warning("Upstream search unavailable, answering from lexical index")
+            return _lexical_search(request), False
+        raise HTTPException(
+            status_code=result.get("status_code", 500),
+            detail=result.get("message", "Search request failed")
+        )
+
+    if settings.response_validation == "strict":
+        SearchResponse(**result)
+    else:
+        check_search_shape(result)
+    _index_chunks(result["results"].get("vector_search_results"))
+    if settings.search_cache_enabled and generation == corpus_generation:
+        search_cache.set(cache_key, result, tags=_result_document_ids(result))
+    return result, False
+
 @app.post("/search", response_model=SearchResponse)
-async def search(request: SearchRequest):
+async def search(request: SearchRequest, response: Response, _limit=Depends(rate_limit("search"))):
     """
     Execute a search query against the RAG server with support for vector and knowledge graph search
     """
     logger.info(f"Processing search request: {request.query}")
-    
+    request = await _scope_search_request(request)
+
     try:
-        payload = request.model_dump(exclude_none=True, exclude_unset=True)
+        result, cached = await _search(request)
+        headers = {"X-Cache": "HIT" if cached else "MISS"}
+        if result.get("lexical_only"):
+            headers["X-Search-Mode"] = "lexical"
+
+        logger.info("Search request completed successfully")
+        if settings.response_validation == "strict":
+            response.headers.update(headers)
+            return result
+        return FastJSONResponse(result, headers=headers)
+
+    except Exception as e:
+        logger.error(f"Search operation failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Search operation failed: {str(e)}"
+        )
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(request: BatchSearchRequest, limit=Depends(rate_limit("search"))):
+    """
+    Execute many search queries concurrently in one request
+
+    Results are returned in request order with per-query errors and latencies.
+    """
+    if len(request.requests) > settings.search_batch_max_queries:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds the maximum of {settings.search_batch_max_queries} queries"
+        )
+    concurrency = settings.search_batch_concurrency
+    if limit is not None:
+        max_cost = rate_limiter.max_cost(limit.tier, "search")
+        if max_cost is not None and len(request.requests) > max_cost:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch of {len(request.requests)} queries exceeds the {limit.tier} tier's search burst of {max_cost:g}"
+            )
+        if len(request.requests) > 1:
+            # The dependency charged one token; each further query costs one more
+            try:
+                rate_limiter.charge(limit.user_key, limit.tier, "search", cost=len(request.requests) - 1)
+            except RateLimitExceeded as e:
+                raise _rate_limit_error(e, limit.tier, "search")
+        # The batch holds one slot, so fan out no wider than the tier allows
+        tier_concurrency = rate_limiter.limits_for(limit.tier, "search").get("concurrency")
+        if tier_concurrency:
+            concurrency = min(concurrency, int(tier_concurrency))
+    logger.info(f"Processing batch of {len(request.requests)} search requests")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    batch_start = time.perf_counter()
+
+    async def run(index: int, item: SearchRequest) -> Dict[str, Any]:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result, cached = await _search(item)
+                return {
+                    "index": index,
+                    "success": True,
+                    "results": result["results"],
+                    "error": None,
+                    "status_code": 200,
+                    "cached": cached,
+                    "lexical_only": bool(result.get("lexical_only")),
+                    "latency_ms": (time.perf_counter() - start) * 1000
+                }
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                logger.error(f"Batch search {index} failed: {detail}")
+                return {
+                    "index": index,
+                    "success": False,
+                    "results": None,
+                    "error": f"Search operation failed: {detail}",
+                    "status_code": e.status_code if isinstance(e, HTTPException) else 500,
+                    "cached": False,
+                    "lexical_only": False,
+                    "latency_ms": (time.perf_counter() - start) * 1000
+                }
+
+    results = await asyncio.gather(*(run(index, item) for index, item in enumerate(request.requests)))
+    content = {
+        "results": results,
+        "total_latency_ms": (time.perf_counter() - batch_start) * 1000
+    }
+    if settings.response_validation == "strict":
+        return content
+    return FastJSONResponse(content)
+
+def _plan_ingest_batches(files: List[UploadFile]) -> List[List[UploadFile]]:
+    """
+    Group uploads, in order, into size-bounded multi-file upstream requests
+    """
+    batches = []
+    current = []
+    current_bytes = 0
+    for file in files:
+        size = file.size or 0
+        if current and (
+            len(current) >= settings.ingest_batch_max_files
+            or current_bytes + size > settings.ingest_batch_max_bytes
+        ):
+            batches.append(current)
+            current = []
+            current_bytes = 0
+        current.append(file)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+def _too_large_result(file: UploadFile) -> IngestFileResult:
+    return IngestFileResult(
+        filename=file.filename,
+        success=False,
+        message=f"{file.filename} exceeds the maximum upload size of {settings.max_upload_bytes} bytes",
+        status_code=413
+    )
 
+def _is_rejection(status_code: int) -> bool:
+    # Timeouts and rate limiting say nothing about whether the files are bad
+    return 400 <= status_code < 500 and status_code not in (408, 429)
+
+async def _ingest_batch(batch: List[UploadFile], semaphore: asyncio.Semaphore) -> List[IngestFileResult]:
+    """
+    Stream one batch upstream, falling back to per-file requests if it is rejected
+
+    The fallback isolates a bad file so it cannot fail the rest of its batch.
+    Transport errors and 5xx answers fail the whole batch instead, since
+    upstream may already have ingested it.
+    """
+    streams = [UploadStream(file, settings.upload_chunk_size, settings.max_upload_bytes) for file in batch]
+    multipart = MultipartUpload("files", streams)
+
+    async with semaphore:
+        logger.info(f"Uploading {len(batch)} file(s): {[file.filename for file in batch]}")
         response = await make_request(
             settings.base_url,
-            method="POST",
-            endpoint="/v2/search",
-            data=json.dumps(payload),
-            headers={"Content-Type": "application/json"}
+            "POST",
+            "/v2/ingest_files",
+            content=multipart.body(),
+            headers=multipart.headers,
+            timeout=settings.ingest_timeout
         )
-        print(response)
 
-        if isinstance(response, dict) and not response.get("success", True):
-            logger.error(f"Search request failed: {response.get('message')}")
-            print(response)
-            raise HTTPException(
-                status_code=response.get("status_code", 500),
-                detail=response.get("message", "Search request failed")
+    failed = isinstance(response, dict) and not response.get("success", True)
+    items = response.get("results") if isinstance(response, dict) and not failed else None
+    if isinstance(items, list) and len(items) == len(batch):
+        return [
+            IngestFileResult(filename=file.filename, success=True, results=[item], status_code=200)
+            for file, item in zip(batch, items)
+        ]
+
+    # Ingest is not idempotent, so files are only resent one by one when
+    # upstream cannot have taken the batch: a file overran the size cap
+    # mid-body, or upstream rejected the request outright
+    too_large = any(stream.too_large for stream in streams)
+    if len(batch) > 1 and (too_large or (failed and _is_rejection(response.get("status_code", 500)))):
+        results = await asyncio.gather(*(_ingest_batch([file], semaphore) for file in batch))
+        return [result for file_results in results for result in file_results]
+
+    if too_large:
+        return [_too_large_result(batch[0])]
+    if failed:
+        return [
+            IngestFileResult(
+                filename=file.filename,
+                success=False,
+                message=response.get("message", "File upload failed"),
+                status_code=response.get("status_code", 500)
+            )
+            for file in batch
+        ]
+    if len(batch) > 1:
+        logger.error(f"Upstream returned {len(items) if isinstance(items, list) else 'no'} results for {len(batch)} files")
+        return [
+            IngestFileResult(
+                filename=file.filename,
+                success=False,
+                message="Upstream response did not match the uploaded files",
+                status_code=502
             )
+            for file in batch
+        ]
+    return [IngestFileResult(
+        filename=batch[0].filename,
+        success=True,
+        results=items if isinstance(items, list) else [],
+        status_code=200
+    )]
 
-        logger.info("Search request completed successfully")
-        return SearchResponse(**response)
+_TEXT_EXTENSIONS = {"txt", "md", "markdown", "csv", "json", "html", "htm", "xml", "rst"}
+
+def _is_indexable_text(file: UploadFile) -> bool:
+    extension = os.path.splitext(file.filename or "")[1].lstrip(".").lower()
+    return (
+        file.size is not None
+        and file.size <= settings.lexical_ingest_max_bytes
+        and ((file.content_type or "").startswith("text/") or extension in _TEXT_EXTENSIONS)
+    )
+
+def _index_local_text(document_id: str, filename: str, text: str) -> None:
+    document_type = os.path.splitext(filename)[1].lstrip(".").lower()
+    _index_chunks([
+        {
+            "extraction_id": f"{document_id}:{order}",
+            "document_id": document_id,
+            "text": piece,
+            "metadata": {"version": "v0", "chunk_order": order, "document_type": document_type, "associated_query": ""},
+            "local": True,
+        }
+        for order, piece in enumerate(split_text(text, settings.lexical_ingest_chunk_chars))
+    ])
 
+async def _ingestion_statuses(document_ids: List[str]) -> Optional[Dict[str, str]]:
+    """
+    Upstream ingestion_status of documents that still exist, None if unknown
+    """
+    response = await make_request(
+        settings.base_url,
+        "GET",
+        "/v2/documents_overview",
+        params={"document_ids": document_ids, "limit": len(document_ids)},
+        timeout=settings.documents_timeout
+    )
+    if not isinstance(response, dict) or not response.get("success", True):
+        logger.error(f"Ingestion status lookup failed: {response.get('message') if isinstance(response, dict) else response}")
+        return None
+    return {
+        raw["id"]: raw.get("ingestion_status") or "success"
+        for raw in response.get("results") or []
+        if raw.get("id") in document_ids
+    }
+
+async def _load_document_hashes(db: AsyncSession, owner_id: str, filenames: List[str]) -> Dict[str, DocumentHash]:
+    rows = await db.execute(
+        select(DocumentHash).where(DocumentHash.owner_id == owner_id, DocumentHash.filename.in_(filenames))
+    )
+    return {row.filename: row for row in rows.scalars().all()}
+
+async def _save_document_hashes(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    statement = dialect_insert(db, DocumentHash).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[DocumentHash.owner_id, DocumentHash.filename],
+        set_={
+            "content_hash": statement.excluded.content_hash,
+            "document_id": statement.excluded.document_id,
+            "size": statement.excluded.size,
+            "updated_at": datetime.utcnow(),
+        }
+    )
+    await db.execute(statement)
+    await db.commit()
+
+async def _forget_document_hashes(document_ids: List[str]) -> None:
+    """
+    Drop content hashes of deleted documents so re-uploads are ingested again
+    """
+    if not document_ids or not settings.ingest_dedup_enabled:
+        return
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(DocumentHash).where(DocumentHash.document_id.in_(document_ids)))
+            await db.commit()
     except Exception as e:
-        logger.error(f"Search operation failed: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Search operation failed: {str(e)}"
+        logger.error(f"Failed to forget content hashes: {str(e)}")
+
+# Replaced documents awaiting their new version's ingestion, keyed by the
+# new document ID. Kept in memory: after a restart both versions remain.
+pending_replacements: Dict[str, Dict[str, Any]] = {}
+
+async def _restore_document_hash(row: Dict[str, Any], failed_document_id: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(DocumentHash)
+            .where(
+                DocumentHash.owner_id == row["owner_id"],
+                DocumentHash.filename == row["filename"],
+                DocumentHash.document_id == failed_document_id,
+            )
+            .values(content_hash=row["content_hash"], document_id=row["document_id"], size=row["size"], updated_at=datetime.utcnow())
         )
+        await db.commit()
+
+async def settle_replacements() -> int:
+    """
+    Delete replaced documents whose new version finished ingesting
 
-@app.post("/documents/ingest")
-async def ingest_files(files: List[UploadFile] = File(...)):
+    When the new version failed or is gone, the old document is kept and its
+    content hash restored, so the next upload of the file replaces it again.
+    Returns the number of documents deleted.
+    """
+    if not pending_replacements:
+        return 0
+    statuses = await _ingestion_statuses(list(pending_replacements))
+    if statuses is None:
+        return 0
+
+    replaced_ids = []
+    now = time.monotonic()
+    for document_id, pending in list(pending_replacements.items()):
+        status = statuses.get(document_id, "failed")
+        if status == "success":
+            replaced_ids.append(pending["replaced"])
+        elif status == "failed":
+            logger.warning(f"Ingestion of {document_id} failed, keeping {pending['replaced']}")
+            try:
+                await _restore_document_hash(pending["row"], document_id)
+            except Exception as e:
+                logger.error(f"Failed to restore content hash for {pending['replaced']}: {str(e)}")
+        elif now - pending["since"] < settings.ingest_replace_timeout:
+            continue
+        else:
+            logger.warning(f"Ingestion of {document_id} still {status}, keeping {pending['replaced']}")
+        del pending_replacements[document_id]
+
+    if not replaced_ids:
+        return 0
+    replaced_ids = list(dict.fromkeys(replaced_ids))
+    logger.info(f"Deleting {len(replaced_ids)} replaced document(s)")
+    semaphore = asyncio.Semaphore(settings.delete_concurrency)
+    chunk_results = await asyncio.gather(*(
+        _delete_chunk(replaced_ids[i:i + settings.delete_chunk_size], semaphore)
+        for i in range(0, len(replaced_ids), settings.delete_chunk_size)
+    ))
+    deleted_ids = [result.document_id for chunk in chunk_results for result in chunk if result.success]
+    failed = [result.document_id for chunk in chunk_results for result in chunk if not result.success]
+    if failed:
+        logger.error(f"Failed to delete replaced documents: {failed}")
+    if deleted_ids:
+        document_index.remove(deleted_ids)
+        lexical_index.remove_documents(deleted_ids)
+        invalidate_corpus_caches(deleted_ids)
+    return len(deleted_ids)
+
+async def _replacement_settler():
+    while True:
+        await asyncio.sleep(settings.ingest_replace_check_interval)
+        try:
+            await settle_replacements()
+        except Exception as e:
+            logger.error(f"Settling replaced documents failed: {str(e)}")
+
+@app.post("/documents/ingest", response_model=List[IngestFileResult])
+async def ingest_files(
+    files: List[UploadFile] = File(...),
+    force: bool = Query(False, description="Re-ingest files even when their content is unchanged"),
+    replace: List[str] = Query([], description="Previous document IDs these files may replace"),
+    user_id: Optional[str] = Depends(verified_user_id),
+    db: AsyncSession = Depends(get_db),
+    _limit=Depends(rate_limit("documents"))
+):
     """
     Upload multiple files to the RAG server
+
+    Files are grouped into multi-file upstream requests that run
+    concurrently and are streamed in fixed-size chunks, so memory per upload
+    does not depend on file size. Results are reported per file, in upload order.
+
+    Each file's content hash is checked against the last upload of the same
+    filename by the same user: unchanged files are skipped and return the
+    existing document unless its upstream ingestion failed or it is gone.
+    A changed file replaces the previous document when the caller has a
+    verified bearer token or lists that document in `replace`; anonymous
+    callers share one owner, so nothing of theirs is replaced unasked. The previous
+    document is deleted only once the new one has finished ingesting.
     """
+    results: List[Optional[IngestFileResult]] = [None] * len(files)
+    accepted = []
+    for index, file in enumerate(files):
+        # Reject uploads whose size is already known to be too large up front
+        if (file.size or 0) > settings.max_upload_bytes:
+            upload_stats.rejected_too_large += 1
+            results[index] = _too_large_result(file)
+        else:
+            accepted.append((index, file))
+
+    owner_id = user_id or ""
+    hashes: Dict[int, Tuple[str, int]] = {}
+    previous: Dict[str, DocumentHash] = {}
+    if settings.ingest_dedup_enabled and accepted:
+        digests = await asyncio.gather(*(hash_upload(file, settings.upload_chunk_size) for _, file in accepted))
+        hashes = {index: digest for (index, _), digest in zip(accepted, digests)}
+        try:
+            previous = await _load_document_hashes(db, owner_id, list({file.filename for _, file in accepted}))
+        except Exception as e:
+            logger.error(f"Content hash lookup failed, ingesting without dedup: {str(e)}")
+
+    candidates = {
+        index: previous[file.filename]
+        for index, file in accepted
+        if not force and file.filename in previous and previous[file.filename].content_hash == hashes[index][0]
+    }
+    statuses = await _ingestion_statuses(list({row.document_id for row in candidates.values()})) if candidates else {}
+
+    to_upload = []
+    for index, file in accepted:
+        row = candidates.get(index)
+        if row is None:
+            unchanged = False
+        elif statuses is None:
+            unchanged = not document_index.loaded or row.document_id in document_index
+        else:
+            # Deleted upstream, or queued but never ingested: upload it again
+            unchanged = statuses.get(row.document_id, "failed") != "failed"
+        if unchanged:
+            upload_stats.files_deduplicated += 1
+            upload_stats.bytes_deduplicated += hashes[index][1]
+            results[index] = IngestFileResult(
+                filename=file.filename,
+                success=True,
+                results=[{"document_id": row.document_id, "message": "Content unchanged, ingestion skipped"}],
+                status_code=200,
+                deduplicated=True
+            )
+        else:
+            to_upload.append(file)
+
+    # Small text files are also chunked into the lexical index, read while
+    # they are still open
+    texts: Dict[str, str] = {}
+    if settings.lexical_index_enabled:
+        for file in to_upload:
+            if _is_indexable_text(file):
+                await file.seek(0)
+                texts[file.filename] = (await file.read()).decode("utf-8", errors="ignore")
+                await file.seek(0)
+
+    semaphore = asyncio.Semaphore(settings.ingest_concurrency)
+    batches = _plan_ingest_batches(to_upload)
+    logger.info(f"Uploading {len(to_upload)} file(s) in {len(batches)} batch(es), {len(accepted) - len(to_upload)} unchanged")
+
     try:
-        results = []
-        for file in files:
-            logger.info(f"Uploading file: {file.filename}")
-            files_dict = {
-                'files': (file.filename, await file.read(), file.content_type)
+        batch_results = await asyncio.gather(*(_ingest_batch(batch, semaphore) for batch in batches))
+    finally:
+        await asyncio.gather(*(file.close() for file in files))
+
+    uploaded = iter(result for file_results in batch_results for result in file_results)
+    results = [result if result is not None else next(uploaded) for result in results]
+
+    ingested_ids = []
+    hash_rows: Dict[str, Dict[str, Any]] = {}
+    now = datetime.now(timezone.utc).isoformat()
+    for index, result in enumerate(results):
+        if result.deduplicated:
+            continue
+        for item in result.results:
+            if not item.get("document_id"):
+                continue
+            ingested_ids.append(item["document_id"])
+            if result.filename in texts:
+                _index_local_text(item["document_id"], result.filename, texts[result.filename])
+            # Placeholder until the next reconcile brings in the upstream row
+            document_index.upsert({
+                "id": item["document_id"],
+                "title": result.filename,
+                "user_id": "",
+                "document_type": os.path.splitext(result.filename)[1].lstrip(".").lower(),
+                "created_at": now,
+            })
+            if index in hashes:
+                # Keyed by filename so a name repeated in one request is upserted once
+                hash_rows[result.filename] = {
+                    "owner_id": owner_id,
+                    "filename": result.filename,
+                    "content_hash": hashes[index][0],
+                    "document_id": item["document_id"],
+                    "size": hashes[index][1],
+                }
+
+    for result in results:
+        row = previous.get(result.filename)
+        new_row = hash_rows.get(result.filename)
+        if (
+            row is not None and new_row is not None and not result.deduplicated
+            and (user_id or row.document_id in replace)
+            and any(item.get("document_id") == new_row["document_id"] for item in result.results)
+            and row.document_id != new_row["document_id"]
+        ):
+            result.replaced_document_id = row.document_id
+            pending_replacements[new_row["document_id"]] = {
+                "replaced": row.document_id,
+                "row": {
+                    "owner_id": row.owner_id,
+                    "filename": row.filename,
+                    "content_hash": row.content_hash,
+                    "document_id": row.document_id,
+                    "size": row.size,
+                },
+                "since": time.monotonic(),
             }
-            
-            response = await make_request(
-                settings.base_url,
-                "POST",
-                "/v2/ingest_files",
-                files=files_dict
-            )
-            results.append(response)
-        
-        logger.info("All files uploaded successfully")
-        return results
-        
-    except Exception as e:
-        logger.error(f"File upload failed: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to upload files: {str(e)}"
-        )
+
+    if hash_rows:
+        try:
+            await _save_document_hashes(db, list(hash_rows.values()))
+        except Exception as e:
+            logger.error(f"Failed to record content hashes: {str(e)}")
+
+    if ingested_ids:
+        invalidate_corpus_caches(ingested_ids)
+
+    failures = [result.filename for result in results if not result.success]
+    if failures:
+        logger.error(f"File upload failed for: {failures}")
+    logger.info(f"Uploaded {len(results) - len(failures)} of {len(results)} file(s) successfully")
+    return results
 
 @app.get("/documents", response_model=DocumentsResponse)
-async def list_documents():
+async def list_documents(
+    limit: Optional[int] = Query(None, ge=0, description="Maximum number of documents to return"),
+    offset: int = Query(0, ge=0, description="Number of documents to skip"),
+    user_id: Optional[str] = Query(None, description="Only return documents owned by this user"),
+    document_type: Optional[str] = Query(None, description="Only return documents of this type"),
+):
     """
     Get overview of all documents
+
+    Served from the gateway's document index, which is reconciled with the
+    RAG server in the background.
     """
     logger.info("Fetching documents overview")
     try:
-        response = await make_request(
-            settings.base_url,
-            "GET",
-            "/v2/documents_overview"
+        if not settings.documents_index_enabled:
+            response = await make_request(
+                settings.base_url,
+                "GET",
+                "/v2/documents_overview",
+                timeout=settings.documents_timeout
+            )
+            return response
+
+        if not document_index.loaded:
+            await upstream_flights.do("documents_overview", refresh_document_index)
+        page, total = document_index.query(
+            user_id=user_id,
+            document_type=document_type,
+            limit=limit,
+            offset=offset
         )
-        return response
+        return {"results": page, "total": total}
     except Exception as e:
         logger.error(f"Failed to fetch documents: {str(e)}")
         raise HTTPException(
@@ -160,7 +1382,7 @@ async def list_documents():
         )
 
 @app.delete("/documents/{document_id}", response_model=DeleteResponse)
-async def delete_document(document_id: str):
+async def delete_document(document_id: str, _limit=Depends(rate_limit("documents"))):
     """
     Delete a document by ID
     """
@@ -181,8 +1403,22 @@ async def delete_document(document_id: str):
             settings.base_url,
             "DELETE",
             "/v2/delete",
-            params=params
+            params=params,
+            timeout=settings.delete_timeout
         )
+        if isinstance(response, dict) and not response.get("success", True):
+            # Upstream still has the document, so the gateway keeps its state too
+            status_code = response.get("status_code", 500)
+            logger.error(f"Failed to delete document {document_id}: {response.get('message')}")
+            return DeleteResponse(
+                success=False,
+                message="Document not found" if status_code == 404 else f"Failed to delete document: {response.get('message', 'Delete failed')}",
+                status_code=status_code
+            )
+        invalidate_corpus_caches([document_id])
+        document_index.remove([document_id])
+        lexical_index.remove_documents([document_id])
+        await _forget_document_hashes([document_id])
             
         logger.info(f"Document deleted successfully: {document_id}")
         return DeleteResponse(
@@ -199,75 +1435,420 @@ async def delete_document(document_id: str):
             status_code=500
         )
 
-@app.get("/health")
-async def health_check():
+async def _delete_chunk(document_ids: List[str], semaphore: asyncio.Semaphore) -> List[DocumentDeleteResult]:
+    async with semaphore:
+        response = await make_request(
+            settings.base_url,
+            "DELETE",
+            "/v2/delete",
+            params={"filters": json.dumps({"document_id": {"$in": document_ids}})},
+            timeout=settings.delete_timeout
+        )
+    if isinstance(response, dict) and not response.get("success", True):
+        status_code = response.get("status_code", 500)
+        # Upstream answers 404 only when nothing in the chunk matched; any
+        # other failure is retried per ID so one bad ID cannot fail its chunk.
+        if status_code != 404 and len(document_ids) > 1:
+            results = await asyncio.gather(*(_delete_chunk([document_id], semaphore) for document_id in document_ids))
+            return [result for chunk in results for result in chunk]
+        message = "Document not found" if status_code == 404 else response.get("message", "Delete failed")
+        return [
+            DocumentDeleteResult(document_id=document_id, success=False, message=message, status_code=status_code)
+            for document_id in document_ids
+        ]
+    return [
+        DocumentDeleteResult(document_id=document_id, success=True, message=f"{document_id} deleted", status_code=200)
+        for document_id in document_ids
+    ]
+
+@app.post("/documents/delete", response_model=BulkDeleteResponse)
+async def delete_documents(request: BulkDeleteRequest, _limit=Depends(rate_limit("documents"))):
     """
-    Check if the API is running and can connect to the RAG server
+    Delete many documents by ID, or every document matching a metadata filter
+
+    IDs are sent upstream as chunked $in filters, concurrently, and the
+    outcome is reported per ID. Gateway caches are invalidated once per batch.
     """
-    try:
-        await make_request(
+    if request.filters is not None:
+        logger.info(f"Deleting documents matching filter: {request.filters}")
+        response = await make_request(
             settings.base_url,
-            "GET", 
-            "/v2/documents_overview"
+            "DELETE",
+            "/v2/delete",
+            params={"filters": json.dumps(request.filters)},
+            timeout=settings.delete_timeout
         )
-        return {"status": "healthy", "rag_server": "connected"}
+        # The deleted IDs are unknown, so drop every cache and reconcile the index
+        invalidate_corpus_caches()
+        search_cache.clear()
+        if settings.documents_index_enabled:
+            _spawn(upstream_flights.do("documents_overview", refresh_document_index))
+        if isinstance(response, dict) and not response.get("success", True):
+            logger.error(f"Filtered delete failed: {response.get('message')}")
+            return BulkDeleteResponse(
+                success=False,
+                message=f"Failed to delete documents: {response.get('message')}",
+                deleted=0,
+                failed=0
+            )
+        return BulkDeleteResponse(success=True, message="Documents matching filter deleted", deleted=0, failed=0)
+
+    document_ids = list(dict.fromkeys(request.document_ids))
+    logger.info(f"Deleting {len(document_ids)} documents")
+    chunks = [
+        document_ids[i:i + settings.delete_chunk_size]
+        for i in range(0, len(document_ids), settings.delete_chunk_size)
+    ]
+    semaphore = asyncio.Semaphore(settings.delete_concurrency)
+    chunk_results = await asyncio.gather(*(_delete_chunk(chunk, semaphore) for chunk in chunks))
+    results = [result for chunk in chunk_results for result in chunk]
+
+    deleted_ids = [result.document_id for result in results if result.success]
+    invalidate_corpus_caches(deleted_ids)
+    document_index.remove(deleted_ids)
+    lexical_index.remove_documents(deleted_ids)
+    await _forget_document_hashes(deleted_ids)
+
+    failed = len(results) - len(deleted_ids)
+    if failed:
+        logger.error(f"Failed to delete {failed} of {len(results)} documents")
+    return BulkDeleteResponse(
+        success=failed == 0,
+        message=f"{len(deleted_ids)} of {len(results)} documents deleted",
+        deleted=len(deleted_ids),
+        failed=failed,
+        results=results
+    )
+
+async def _group_response(db: AsyncSession, group: DocumentGroup) -> DocumentGroupResponse:
+    rows = await db.execute(
+        select(DocumentGroupItem.document_id).where(DocumentGroupItem.group_id == group.id)
+    )
+    document_ids = list(rows.scalars().all())
+    group_cache.set(group.id, document_ids)
+    return DocumentGroupResponse(
+        id=group.id,
+        name=group.name,
+        description=group.description,
+        created_by=group.created_by,
+        created_at=group.created_at,
+        document_ids=document_ids
+    )
+
+async def _get_group(db: AsyncSession, group_id: str) -> DocumentGroup:
+    group = await db.get(DocumentGroup, group_id)
+    if group is None:
+        raise HTTPException(status_code=404, detail=f"Document group {group_id} not found")
+    return group
+
+async def _add_group_documents(db: AsyncSession, group_id: str, document_ids: List[str]) -> None:
+    if not document_ids:
+        return
+    await db.execute(
+        dialect_insert(db, DocumentGroupItem)
+        .values([{"group_id": group_id, "document_id": document_id} for document_id in dict.fromkeys(document_ids)])
+        .on_conflict_do_nothing()
+    )
+
+async def _commit_group_change(db: AsyncSession, group_id: str, action: str) -> None:
+    try:
+        await db.commit()
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return {
-            "status": "unhealthy",
-            "rag_server": "disconnected",
-            "error": str(e)
-        }
+        await db.rollback()
+        logger.error(f"Failed to {action} document group {group_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to {action} document group: {str(e)}"
+        )
+    finally:
+        group_cache.delete(group_id)
+
+@app.post("/groups", response_model=DocumentGroupResponse)
+async def create_group(group_data: DocumentGroupCreate, db: AsyncSession = Depends(get_db)):
+    """
+    Create a document group for scoping /search and /rag
+    """
+    group = DocumentGroup(
+        name=group_data.name,
+        description=group_data.description,
+        created_by=group_data.created_by
+    )
+    db.add(group)
+    await db.flush()
+    await _add_group_documents(db, group.id, group_data.document_ids)
+    await _commit_group_change(db, group.id, "create")
+    logger.info(f"Created document group {group.id} with {len(group_data.document_ids)} document(s)")
+    return await _group_response(db, group)
+
+@app.get("/groups", response_model=List[DocumentGroupResponse])
+async def list_groups(
+    created_by: Optional[str] = Query(None, description="Only return groups created by this user"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List document groups with their member document IDs
+    """
+    statement = select(DocumentGroup).order_by(DocumentGroup.created_at)
+    if created_by is not None:
+        statement = statement.where(DocumentGroup.created_by == created_by)
+    groups = (await db.execute(statement)).scalars().all()
+    if not groups:
+        return []
+
+    rows = await db.execute(
+        select(DocumentGroupItem.group_id, DocumentGroupItem.document_id)
+        .where(DocumentGroupItem.group_id.in_([group.id for group in groups]))
+    )
+    members: Dict[str, List[str]] = {group.id: [] for group in groups}
+    for group_id, document_id in rows:
+        members[group_id].append(document_id)
+    return [
+        DocumentGroupResponse(
+            id=group.id,
+            name=group.name,
+            description=group.description,
+            created_by=group.created_by,
+            created_at=group.created_at,
+            document_ids=members[group.id]
+        )
+        for group in groups
+    ]
+
+@app.get("/groups/{group_id}", response_model=DocumentGroupResponse)
+async def get_group(group_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Get a document group and its member document IDs
+    """
+    return await _group_response(db, await _get_group(db, group_id))
+
+@app.patch("/groups/{group_id}", response_model=DocumentGroupResponse)
+async def update_group(group_id: str, group_data: DocumentGroupUpdate, db: AsyncSession = Depends(get_db)):
+    """
+    Rename a document group or replace its documents
+    """
+    group = await _get_group(db, group_id)
+    if group_data.name is not None:
+        group.name = group_data.name
+    if group_data.description is not None:
+        group.description = group_data.description
+    if group_data.document_ids is not None:
+        await db.execute(delete(DocumentGroupItem).where(DocumentGroupItem.group_id == group_id))
+        await _add_group_documents(db, group_id, group_data.document_ids)
+    group.updated_at = datetime.utcnow()
+    await _commit_group_change(db, group_id, "update")
+    return await _group_response(db, group)
+
+@app.post("/groups/{group_id}/documents", response_model=DocumentGroupResponse)
+async def add_group_documents(group_id: str, documents: DocumentGroupDocuments, db: AsyncSession = Depends(get_db)):
+    """
+    Add documents to a document group
+    """
+    group = await _get_group(db, group_id)
+    await _add_group_documents(db, group_id, documents.document_ids)
+    await _commit_group_change(db, group_id, "update")
+    return await _group_response(db, group)
+
+@app.delete("/groups/{group_id}/documents/{document_id}", response_model=DocumentGroupResponse)
+async def remove_group_document(group_id: str, document_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Remove one document from a document group
+    """
+    group = await _get_group(db, group_id)
+    await db.execute(
+        delete(DocumentGroupItem)
+        .where(DocumentGroupItem.group_id == group_id, DocumentGroupItem.document_id == document_id)
+    )
+    await _commit_group_change(db, group_id, "update")
+    return await _group_response(db, group)
+
+@app.delete("/groups/{group_id}", response_model=DeleteResponse)
+async def delete_group(group_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Delete a document group; its documents are left untouched
+    """
+    group = await _get_group(db, group_id)
+    await db.execute(delete(DocumentGroupItem).where(DocumentGroupItem.group_id == group_id))
+    await db.delete(group)
+    await _commit_group_change(db, group_id, "delete")
+    logger.info(f"Deleted document group {group_id}")
+    return DeleteResponse(
+        success=True,
+        message=f"{group_id} deleted",
+        status_code=200
+    )
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Report hit ratio and occupancy of the gateway caches
+    """
+    return {"rag": rag_cache.stats(), "search": search_cache.stats(), "groups": group_cache.stats()}
+
+@app.get("/stats")
+async def stats():
+    """
+    Report gateway internals: cache occupancy and streamed upload counters
+    """
+    return {
+        "caches": {"rag": rag_cache.stats(), "search": search_cache.stats(), "groups": group_cache.stats(), "tiers": tier_cache.stats(), "identities": identity_cache.stats(), "dedup_signatures": signature_cache.stats()},
+        "uploads": upload_stats.snapshot(),
+        "singleflight": upstream_flights.stats(),
+        "document_index": document_index.stats(),
+        "upstream": resilience_stats(),
+        "db": pool_stats(),
+        "rate_limits": rate_limiter.stats(),
+        "lexical_index": lexical_index.stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics for the gateway and its upstream calls
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health")
+async def health_check():
+    """
+    Check if the API is running and can connect to the RAG server
+
+    Answers from the background prober's last result, so it never waits on upstream.
+    """
+    return health_prober.snapshot()
+
+@app.get("/health/live")
+async def liveness():
+    """
+    Liveness: the API process is up and serving requests
+    """
+    return {"live": True}
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Readiness: the last upstream probe succeeded recently
+    """
+    snapshot = health_prober.snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
     
+def _user_values(signup_data: SignupRequest) -> Dict[str, Any]:
+   # Tiers drive rate limits, so new users always start on the default tier
+   return {
+       "id": signup_data.r2r_user_id,
+       "email": signup_data.email,
+       "subscription_tier": settings.rate_limit_default_tier
+   }
+
 @app.post("/signup")
 async def signup(
    signup_data: SignupRequest,
-   db: Session = Depends(get_db)
+   db: AsyncSession = Depends(get_db)
 ):
    """
    Sign up for a new account
+
+   A single conflict-aware INSERT creates the user and returns the row, so
+   concurrent signups for the same email or ID cannot both succeed.
    """
-   # Check if user already exists
-   existing_user = db.query(User).filter(
-       (User.email == signup_data.email) | 
-       (User.id == signup_data.r2r_user_id)
-   ).first()
+   statement = (
+       dialect_insert(db, User)
+       .values(**_user_values(signup_data))
+       .on_conflict_do_nothing()
+       .returning(User.id, User.email, User.subscription_tier, User.created_at)
+   )
    
-   if existing_user:
+   try:
+       new_user = (await db.execute(statement)).first()
+       await db.commit()
+   except Exception as e:
+       await db.rollback()
+       raise HTTPException(
+           status_code=500,
+           detail=f"Error creating user: {str(e)}"
+       )
+
+   if new_user is None:
        raise HTTPException(
            status_code=400,
            detail="User with this email or ID already exists"
        )
    
-   # Create new user
-   new_user = User(
-       id=signup_data.r2r_user_id,
-       email=signup_data.email,
-       subscription_tier=signup_data.subscription_tier
-   )
-   
-   try:
-       db.add(new_user)
-       db.commit()
-       db.refresh(new_user)
-       
-       return {
-           "message": "User created successfully",
-           "user": {
-               "id": new_user.id,
-               "email": new_user.email,
-               "subscription_tier": new_user.subscription_tier,
-               "created_at": new_user.created_at
-           }
+   return {
+       "message": "User created successfully",
+       "user": {
+           "id": new_user.id,
+           "email": new_user.email,
+           "subscription_tier": new_user.subscription_tier,
+           "created_at": new_user.created_at
        }
-       
+   }
+
+@app.post("/signup/bulk", response_model=BulkSignupResponse)
+async def signup_bulk(
+   request: BulkSignupRequest,
+   db: AsyncSession = Depends(get_db)
+):
+   """
+   Provision many users with batched multi-row inserts
+
+   Each row is reported as created, existing (email or ID already taken)
+   or invalid. All batches are committed in one transaction.
+   """
+   if len(request.users) > settings.signup_bulk_max_users:
+       raise HTTPException(
+           status_code=400,
+           detail=f"Request exceeds the maximum of {settings.signup_bulk_max_users} users"
+       )
+   logger.info(f"Processing bulk signup of {len(request.users)} users")
+
+   results: List[SignupResult] = []
+   pending: List[Tuple[SignupResult, SignupRequest]] = []
+   seen_ids, seen_emails = set(), set()
+   for index, row in enumerate(request.users):
+       try:
+           signup_data = SignupRequest.model_validate(row)
+       except ValidationError as e:
+           message = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+           results.append(SignupResult(index=index, status="invalid", message=message))
+           continue
+       result = SignupResult(index=index, status="existing", r2r_user_id=signup_data.r2r_user_id, email=signup_data.email)
+       results.append(result)
+       if signup_data.r2r_user_id in seen_ids or signup_data.email in seen_emails:
+           result.status = "invalid"
+           result.message = "Duplicate email or ID in request"
+           continue
+       seen_ids.add(signup_data.r2r_user_id)
+       seen_emails.add(signup_data.email)
+       pending.append((result, signup_data))
+
+   try:
+       for i in range(0, len(pending), settings.signup_bulk_batch_size):
+           batch = pending[i:i + settings.signup_bulk_batch_size]
+           statement = (
+               dialect_insert(db, User)
+               .values([_user_values(signup_data) for _, signup_data in batch])
+               .on_conflict_do_nothing()
+               .returning(User.id)
+           )
+           created_ids = set((await db.execute(statement)).scalars().all())
+           for result, signup_data in batch:
+               if signup_data.r2r_user_id in created_ids:
+                   result.status = "created"
+               else:
+                   result.message = "User with this email or ID already exists"
+       await db.commit()
    except Exception as e:
-       db.rollback()
+       await db.rollback()
+       logger.error(f"Bulk signup failed: {str(e)}")
        raise HTTPException(
            status_code=500,
-           detail=f"Error creating user: {str(e)}"
+           detail=f"Error creating users: {str(e)}"
        )
 
+   counts = {status: sum(1 for result in results if result.status == status) for status in ("created", "existing", "invalid")}
+   logger.info(f"Bulk signup completed: {counts}")
+   return BulkSignupResponse(**counts, results=results)
+
 
 if __name__ == "__main__":
     import uvicorn
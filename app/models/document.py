@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Optional
 
 class DocumentItem(BaseModel):
     id: str = Field(..., description="Document unique identifier")
@@ -22,6 +22,7 @@ class DocumentItem(BaseModel):
 
 class DocumentsResponse(BaseModel):
     results: List[DocumentItem] = Field(..., description="Array of document items")
+    total: Optional[int] = Field(None, description="Total number of documents matching the filters")
     
     model_config = {
         "json_schema_extra": {
@@ -32,7 +33,8 @@ class DocumentsResponse(BaseModel):
                     "user_id": "user1",
                     "document_type": "pdf",
                     "created_at": "2024-03-21T10:00:00Z"
-                }]
+                }],
+                "total": 1
             }]
         }
     }
@@ -50,4 +52,62 @@ class DeleteResponse(BaseModel):
                 "status_code": 200
             }]
         }
-    }
\ No newline at end of file
+    }
+
+class IngestFileResult(BaseModel):
+    filename: str
+    success: bool
+    results: List[Dict[str, Any]] = Field(default_factory=list, description="Upstream ingestion results for this file")
+    message: Optional[str] = None
+    status_code: int
+    deduplicated: bool = Field(False, description="Content was unchanged, so the existing document was kept")
+    replaced_document_id: Optional[str] = Field(None, description="Previous version of this file, deleted once this one finishes ingesting")
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [{
+                "filename": "notes.txt",
+                "success": True,
+                "results": [{
+                    "message": "Ingestion task queued successfully.",
+                    "task_id": "b7a9ea14-5d1c-4f2e-a8a4-3c4e8f0f7d21",
+                    "document_id": "9fbe403b-c11c-5aae-8ade-ef22980c3ad1"
+                }],
+                "message": None,
+                "status_code": 200
+            }]
+        }
+    }
+
+
+class BulkDeleteRequest(BaseModel):
+    document_ids: Optional[List[str]] = Field(None, description="IDs of the documents to delete")
+    filters: Optional[Dict[str, Any]] = Field(None, description="Metadata filter selecting the documents to delete")
+
+    @model_validator(mode="after")
+    def check_selector(self):
+        if (self.document_ids is None) == (self.filters is None):
+            raise ValueError("Provide exactly one of document_ids or filters")
+        return self
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {"document_ids": ["doc123", "doc456"]},
+                {"filters": {"user_id": {"$eq": "user1"}}}
+            ]
+        }
+    }
+
+class DocumentDeleteResult(BaseModel):
+    document_id: str
+    success: bool
+    message: str
+    status_code: int
+
+class BulkDeleteResponse(BaseModel):
+    success: bool
+    message: str
+    deleted: int
+    failed: int
+    results: List[DocumentDeleteResult] = Field(default_factory=list, description="Outcome per document ID")
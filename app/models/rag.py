@@ -1,8 +1,15 @@
 from pydantic import BaseModel, Field
 from typing import Dict, Any, List, Optional
 
+from app.models.search import VectorSearchSettings
+
 class RagRequest(BaseModel):
     query: str = Field(..., description="Query to send to the RAG server")
+    rag_generation_config: Optional[Dict[str, Any]] = Field(None, description="Generation settings forwarded to the RAG server")
+    vector_search_settings: Optional[VectorSearchSettings] = Field(None, description="Vector search settings forwarded to the RAG server")
+    group_id: Optional[str] = Field(None, description="Only retrieve from documents in this document group")
+    dedup: bool = Field(False, description="Retrieve through the gateway and collapse near-duplicate chunks before generation")
+    context_token_budget: Optional[int] = Field(None, ge=1, description="Retrieve through the gateway and trim the context to this many tokens")
     model_config = {
         "json_schema_extra": {
             "examples": [{
@@ -59,8 +66,20 @@ class RagResponseContent(BaseModel):
     completion: ChatCompletion
     search_results: SearchResults
 
+class ContextBudgetReport(BaseModel):
+    budget: int = Field(..., description="Token budget the context was trimmed to")
+    tokenizer: str = Field(..., description="Tokenizer used to count, or \"estimate\"")
+    chunks_retrieved: int
+    chunks_used: int
+    context_tokens: int
+    prompt_tokens: int = Field(..., description="Prompt tokens sent with the budgeted context")
+    baseline_prompt_tokens: int = Field(..., description="Prompt tokens the untrimmed search_limit results would have cost")
+    tokens_saved: int
+
 class RagResponse(BaseModel):
     results: RagResponseContent
+    duplicates_collapsed: int = Field(0, description="Near-duplicate chunks dropped from the context when dedup was requested")
+    context_budget: Optional[ContextBudgetReport] = Field(None, description="Token accounting when a context budget was applied")
 
     model_config = {
         "json_schema_extra": {
@@ -34,6 +34,8 @@ class SearchRequest(BaseModel):
     query: str = Field(..., description="Search query")
     vector_search_settings: Optional[VectorSearchSettings] = Field(None, description="Vector search settings")
     kg_search_settings: Optional[KGSearchSettings] = Field(None, description="Knowledge graph search settings")
+    group_id: Optional[str] = Field(None, description="Only search documents in this document group")
+    dedup: bool = Field(False, description="Collapse near-duplicate chunks, over-fetching to still fill search_limit")
 
     model_config = {
         "json_schema_extra": {
@@ -72,6 +74,8 @@ class SearchResults(BaseModel):
 
 class SearchResponse(BaseModel):
     results: SearchResults
+    lexical_only: bool = Field(False, description="Answered from the gateway's local BM25 index because upstream was unavailable")
+    duplicates_collapsed: int = Field(0, description="Near-duplicate chunks dropped when dedup was requested")
 
     model_config = {
         "json_schema_extra": {
@@ -95,4 +99,33 @@ class SearchResponse(BaseModel):
                 }
             }]
         }
-    }
\ No newline at end of file
+    }
+
+# Batch Models
+class BatchSearchRequest(BaseModel):
+    requests: List[SearchRequest] = Field(..., description="Search requests to run concurrently")
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [{
+                "requests": [
+                    {"query": "first query"},
+                    {"query": "second query", "vector_search_settings": {"search_limit": 5}}
+                ]
+            }]
+        }
+    }
+
+class BatchSearchItem(BaseModel):
+    index: int = Field(..., description="Position of the query in the batch")
+    success: bool
+    results: Optional[SearchResults] = None
+    error: Optional[str] = None
+    status_code: int
+    cached: bool = False
+    lexical_only: bool = False
+    latency_ms: float = Field(..., description="Time spent on this query in milliseconds")
+
+class BatchSearchResponse(BaseModel):
+    results: List[BatchSearchItem]
+    total_latency_ms: float
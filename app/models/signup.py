@@ -1,7 +1,24 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 
 class SignupRequest(BaseModel):
    email: str
    r2r_user_id: str  # Since we're using R2R auth, we'll store their user ID
-   subscription_tier: Optional[str] = "free"
\ No newline at end of file
+   # No subscription_tier: tiers are set in the users table, never by the caller
+
+class BulkSignupRequest(BaseModel):
+   # Rows are validated one by one so a bad row is reported, not fatal
+   users: List[Dict[str, Any]] = Field(..., description="Users to provision, in SignupRequest shape")
+
+class SignupResult(BaseModel):
+   index: int = Field(..., description="Position of the user in the request")
+   status: str = Field(..., description="created, existing or invalid")
+   r2r_user_id: Optional[str] = None
+   email: Optional[str] = None
+   message: Optional[str] = None
+
+class BulkSignupResponse(BaseModel):
+   created: int
+   existing: int
+   invalid: int
+   results: List[SignupResult]
@@ -0,0 +1,52 @@
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.utils.tokens import estimate_tokens, truncate_to_tokens
+
+def format_context(chunks: List[Dict[str, Any]]) -> str:
+    """
+    Number chunks the way R2R does so answers can cite them as [1], [2], ...
+    """
+    return "\n\n".join(f"[{i}] {chunk.get('text') or ''}" for i, chunk in enumerate(chunks, start=1))
+
+def build_rag_messages(query: str, chunks: List[Dict[str, Any]], system_prompt: str, template: str) -> List[Dict[str, str]]:
+    """
+    Chat messages for a /v2/completion call answering `query` from `chunks`
+    """
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": template.format(query=query, context=format_context(chunks))},
+    ]
+
+def fit_to_budget(
+    chunks: List[Dict[str, Any]],
+    budget: int,
+    count: Callable[[str], int] = estimate_tokens,
+    min_chunk_tokens: int = 32,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Take chunks in rank order until the numbered context reaches `budget` tokens
+
+    The first chunk that does not fit is cut to the remaining budget when at
+    least `min_chunk_tokens` remain; nothing after it is considered, so lower
+    ranked chunks never displace higher ranked ones. Returns the chunks and
+    the tokens they use.
+    """
+    selected: List[Dict[str, Any]] = []
+    used = 0
+    for chunk in chunks:
+        prefix = f"[{len(selected) + 1}] "
+        text = chunk.get("text") or ""
+        # Blank line separator between numbered chunks
+        cost = count(prefix + text) + (2 if selected else 0)
+        if used + cost <= budget:
+            selected.append(chunk)
+            used += cost
+            continue
+        remaining = budget - used - count(prefix) - (2 if selected else 0)
+        if remaining >= min_chunk_tokens:
+            truncated = truncate_to_tokens(text, remaining, count)
+            if truncated:
+                selected.append({**chunk, "text": truncated})
+                used += count(prefix + truncated) + (2 if len(selected) > 1 else 0)
+        break
+    return selected, used
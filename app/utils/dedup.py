@@ -0,0 +1,109 @@
+import math
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.utils.cache import TTLCache
+
+def shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    """
+    Word n-gram shingles of a text, lowercased
+    """
+    words = text.lower().split()
+    if len(words) <= size:
+        return {tuple(words)}
+    return set(zip(*(words[i:] for i in range(size))))
+
+_HASH_MASK = (1 << 30) - 1
+
+def signature(text: str, size: int = 3) -> Tuple[int, ...]:
+    """
+    Sorted hashes of a text's shingles
+
+    Sorting gives every chunk the same global token order, which is what
+    prefix filtering in collapse_near_duplicates relies on.
+    """
+    words = text.lower().split()
+    if len(words) <= size:
+        return (hash(tuple(words)) & _HASH_MASK,)
+    # 30-bit hashes sort on CPython's single-digit integer fast path
+    return tuple(sorted(set(map(_HASH_MASK.__and__, map(hash, zip(*(words[i:] for i in range(size))))))))
+
+def jaccard(a: Set[Any], b: Set[Any]) -> float:
+    if not a and not b:
+        return 1.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+def _prefix_length(size: int, threshold: float) -> int:
+    # Two sets with Jaccard >= threshold share at least one of these tokens
+    return max(1, size - math.ceil(threshold * size) + 1)
+
+def collapse_near_duplicates(
+    chunks: List[Dict[str, Any]],
+    threshold: float = 0.8,
+    limit: int = 10,
+    shingle_size: int = 3,
+    signatures: Optional[TTLCache] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Keep the first of each group of near-duplicate chunks, in input order
+
+    Chunks whose shingle Jaccard similarity to an already kept chunk is at
+    least `threshold` are dropped. Stops once `limit` chunks are kept and
+    returns them with the number of chunks collapsed along the way.
+
+    Only kept chunks sharing a token of the candidate's signature prefix
+    are compared exactly, so distinct chunks cost no pairwise work.
+    Signatures are reused from `signatures`, keyed by extraction_id, since
+    the same chunks come back across queries and pages.
+    """
+    kept: List[Dict[str, Any]] = []
+    kept_texts: Set[str] = set()
+    kept_signatures: List[Tuple[int, ...]] = []
+    # Full token sets, built only for chunks that get compared exactly
+    kept_sets: Dict[int, Set[int]] = {}
+    postings: Dict[int, List[int]] = {}
+    collapsed = 0
+    for chunk in chunks:
+        if len(kept) >= limit:
+            break
+        text = chunk.get("text") or ""
+        if text in kept_texts:
+            collapsed += 1
+            continue
+
+        key = chunk.get("extraction_id")
+        cached = signatures.get(key) if signatures is not None and key else None
+        if cached is not None and cached[0] == len(text):
+            ordered = cached[1]
+        else:
+            ordered = signature(text, shingle_size)
+            if signatures is not None and key:
+                signatures.set(key, (len(text), ordered), size=8 * len(ordered) + 64)
+
+        prefix = ordered[:_prefix_length(len(ordered), threshold)]
+        candidate: Optional[Set[int]] = None
+        duplicate = False
+        for position in {position for token in prefix for position in postings.get(token, ())}:
+            other = kept_signatures[position]
+            # Jaccard can't reach the threshold when the sizes differ too much
+            if min(len(ordered), len(other)) < threshold * max(len(ordered), len(other)):
+                continue
+            if candidate is None:
+                candidate = set(ordered)
+            if position not in kept_sets:
+                kept_sets[position] = set(other)
+            if jaccard(candidate, kept_sets[position]) >= threshold:
+                duplicate = True
+                break
+        if duplicate:
+            collapsed += 1
+            continue
+
+        for token in prefix:
+            postings.setdefault(token, []).append(len(kept))
+        if candidate is not None:
+            kept_sets[len(kept)] = candidate
+        kept.append(chunk)
+        kept_texts.add(text)
+        kept_signatures.append(ordered)
+    return kept, collapsed
@@ -0,0 +1,141 @@
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+class DocumentIndex:
+    """
+    In-memory index of document overviews with lookups by user and type
+
+    Local ingest and delete events are applied immediately and remembered
+    for a grace period, so a background reconcile against an upstream
+    snapshot that predates them does not undo them.
+    """
+
+    def __init__(self, local_event_ttl: float = 300.0):
+        self.local_event_ttl = local_event_ttl
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._by_user: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._by_type: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._views: Dict[Tuple[Optional[str], Optional[str]], List[Dict[str, Any]]] = {}
+        self._local_upserts: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._local_deletes: Dict[str, float] = {}
+        self.loaded = False
+        self.last_refresh: Optional[float] = None
+        self.refreshes = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, document_id: str) -> bool:
+        return document_id in self._documents
+
+    def _add(self, item: Dict[str, Any]) -> None:
+        document_id = item["id"]
+        if document_id in self._documents:
+            self._discard(document_id)
+        self._documents[document_id] = item
+        self._by_user.setdefault(item["user_id"], {})[document_id] = item
+        self._by_type.setdefault(item["document_type"], {})[document_id] = item
+
+    def _discard(self, document_id: str) -> None:
+        item = self._documents.pop(document_id, None)
+        if item is None:
+            return
+        for bucket_index, key in ((self._by_user, item["user_id"]), (self._by_type, item["document_type"])):
+            bucket = bucket_index.get(key)
+            if bucket is not None:
+                bucket.pop(document_id, None)
+                if not bucket:
+                    del bucket_index[key]
+
+    def upsert(self, item: Dict[str, Any]) -> None:
+        """
+        Apply a local ingest event
+        """
+        self._local_deletes.pop(item["id"], None)
+        self._local_upserts[item["id"]] = (time.monotonic(), item)
+        self._add(item)
+        self._views.clear()
+
+    def remove(self, document_ids: Iterable[str]) -> None:
+        """
+        Apply a local delete event
+        """
+        now = time.monotonic()
+        for document_id in document_ids:
+            self._local_upserts.pop(document_id, None)
+            self._local_deletes[document_id] = now
+            self._discard(document_id)
+        self._views.clear()
+
+    def replace(self, items: Iterable[Dict[str, Any]]) -> None:
+        """
+        Reconcile with a full upstream snapshot
+        """
+        cutoff = time.monotonic() - self.local_event_ttl
+        self._local_deletes = {key: ts for key, ts in self._local_deletes.items() if ts > cutoff}
+        self._local_upserts = {key: entry for key, entry in self._local_upserts.items() if entry[0] > cutoff}
+
+        self._documents = {}
+        self._by_user = {}
+        self._by_type = {}
+        for item in items:
+            if item["id"] in self._local_deletes:
+                continue
+            self._local_upserts.pop(item["id"], None)
+            self._add(item)
+        for _, item in self._local_upserts.values():
+            self._add(item)
+
+        self._views.clear()
+        self.loaded = True
+        self.last_refresh = time.time()
+        self.refreshes += 1
+
+    def update(self, items: Iterable[Dict[str, Any]]) -> None:
+        """
+        Merge upstream rows for specific documents without a full reconcile
+        """
+        for item in items:
+            if item["id"] in self._local_deletes:
+                continue
+            self._local_upserts.pop(item["id"], None)
+            self._add(item)
+        self._views.clear()
+
+    def query(
+        self,
+        user_id: Optional[str] = None,
+        document_type: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return one page of matching documents and the total match count
+
+        Filtered views are built once per index change, so repeated polling
+        of the same view only costs the size of the page.
+        """
+        key = (user_id, document_type)
+        view = self._views.get(key)
+        if view is None:
+            if user_id is not None:
+                view = list(self._by_user.get(user_id, {}).values())
+                if document_type is not None:
+                    view = [item for item in view if item["document_type"] == document_type]
+            elif document_type is not None:
+                view = list(self._by_type.get(document_type, {}).values())
+            else:
+                view = list(self._documents.values())
+            self._views[key] = view
+        end = None if limit is None else offset + limit
+        return view[offset:end], len(view)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._documents),
+            "loaded": self.loaded,
+            "last_refresh": self.last_refresh,
+            "refreshes": self.refreshes,
+            "pending_local_upserts": len(self._local_upserts),
+            "pending_local_deletes": len(self._local_deletes),
+        }
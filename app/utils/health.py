@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class HealthProber:
+    """
+    Probe the RAG server on an interval and keep the latest outcome
+
+    Health endpoints answer from the recorded state instead of calling
+    upstream on every request.
+    """
+
+    def __init__(self, probe: Callable[[], Awaitable[None]], interval: float = 10.0, stale_after: Optional[float] = None):
+        self.probe = probe
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else interval * 3
+        self.started_at = time.time()
+        self.last_checked: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_rtt_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        self.probes = 0
+
+    async def probe_once(self) -> None:
+        start = time.perf_counter()
+        try:
+            await self.probe()
+        except Exception as e:
+            self.last_error = str(e)
+            self.consecutive_failures += 1
+            logger.error(f"Health probe failed: {str(e)}")
+        else:
+            self.last_success = time.time()
+            self.last_error = None
+            self.consecutive_failures = 0
+        finally:
+            self.last_rtt_ms = (time.perf_counter() - start) * 1000
+            self.last_checked = time.time()
+            self.probes += 1
+
+    async def run(self) -> None:
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(self.interval)
+
+    @property
+    def connected(self) -> bool:
+        return self.last_checked is not None and self.consecutive_failures == 0
+
+    @property
+    def ready(self) -> bool:
+        return (
+            self.connected
+            and self.last_success is not None
+            and time.time() - self.last_success <= self.stale_after
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self.last_checked is None:
+            status, rag_server = "starting", "unknown"
+        elif self.ready:
+            status, rag_server = "healthy", "connected"
+        else:
+            status, rag_server = "unhealthy", "disconnected"
+        snapshot = {
+            "status": status,
+            "rag_server": rag_server,
+            "live": True,
+            "ready": self.ready,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "last_checked": self.last_checked,
+            "last_success": self.last_success,
+            "last_rtt_ms": round(self.last_rtt_ms, 3) if self.last_rtt_ms is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+        }
+        if self.last_error is not None:
+            snapshot["error"] = self.last_error
+        return snapshot
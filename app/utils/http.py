@@ -1,27 +1,348 @@
-import requests
+import asyncio
+import httpx
 import logging
-from typing import Dict, Any
+import random
+import time
+from typing import Dict, Any, Optional
+
+from app.config import get_settings
+from app.utils.metrics import upstream_request_duration, upstream_requests
+from app.utils.responses import json_loads
 
 logger = logging.getLogger(__name__)
 
-async def make_request(base_url: str, method: str, endpoint: str, **kwargs) -> Dict[Any, Any]:
+_client: Optional[httpx.AsyncClient] = None
+
+def create_client(settings) -> httpx.AsyncClient:
+    """
+    Build the pooled async client used for all calls to the RAG server
+    """
+    # The gateway only talks to a single upstream host, so the pool limits
+    # are effectively per-host limits.
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        settings.rag_timeout,
+        connect=settings.http_connect_timeout,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+async def init_client(settings) -> httpx.AsyncClient:
+    """
+    Create the shared client, called from the app lifespan on startup
+    """
+    global _client
+    if _client is None:
+        _client = create_client(settings)
+    return _client
+
+async def close_client() -> None:
+    """
+    Close the shared client and its pooled connections on shutdown
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it lazily outside of the app lifespan
+    """
+    global _client
+    if _client is None:
+        _client = create_client(get_settings())
+    return _client
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling upstream while an endpoint's breaker is open
+    """
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker
+
+    Opens after `failure_threshold` consecutive failures and fails fast
+    until `reset_timeout` has passed, then lets a single trial call through
+    (half-open). The trial's outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """
+        End a call that says nothing about upstream health (e.g. cancelled)
+        """
+        self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_retries: Dict[str, int] = {}
+_hedges = {"sent": 0, "won": 0}
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        settings = get_settings()
+        breaker = CircuitBreaker(settings.breaker_failure_threshold, settings.breaker_reset_timeout)
+        _breakers[endpoint] = breaker
+    return breaker
+
+def resilience_stats() -> Dict[str, Any]:
+    """
+    Breaker state, retry counts and hedging outcomes per upstream endpoint
+    """
+    return {
+        "breakers": {endpoint: breaker.stats() for endpoint, breaker in _breakers.items()},
+        "retries": dict(_retries),
+        "hedges": dict(_hedges),
+    }
+
+def _is_retryable_status(status_code: int) -> bool:
+    return status_code >= 500 or status_code == 429
+
+async def _hedged_send(client: httpx.AsyncClient, method: str, url: str, delay: float, **kwargs) -> httpx.Response:
+    """
+    Send a request and, if it is still pending after `delay`, a duplicate
+
+    The first good response wins and the other request is cancelled.
+    """
+    primary = asyncio.ensure_future(client.request(method, url, **kwargs))
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return primary.result()
+
+        _hedges["sent"] += 1
+        hedge = asyncio.ensure_future(client.request(method, url, **kwargs))
+        pending.add(hedge)
+        last_error: Optional[BaseException] = None
+        last_response: Optional[httpx.Response] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    continue
+                response = task.result()
+                if _is_retryable_status(response.status_code):
+                    last_response = response
+                    continue
+                if task is hedge:
+                    _hedges["won"] += 1
+                return response
+        if last_response is not None:
+            return last_response
+        raise last_error
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def make_request(
+    base_url: str,
+    method: str,
+    endpoint: str,
+    timeout: Optional[float] = None,
+    idempotent: Optional[bool] = None,
+    **kwargs
+) -> Dict[Any, Any]:
     """
     Helper function to make HTTP requests to the RAG server
+
+    Calls go through the endpoint's circuit breaker. Idempotent calls are
+    retried with jittered backoff while the `timeout` deadline allows it,
+    and endpoints listed in `hedge_endpoints` may be hedged.
     """
+    start = time.perf_counter()
+    result = await _make_request(base_url, method, endpoint, timeout, idempotent, **kwargs)
+    if isinstance(result, dict) and result.get("success", True) is False:
+        status = f"{int(result.get('status_code', 500)) // 100}xx"
+    else:
+        status = "2xx"
+    upstream_requests.inc(method=method, endpoint=endpoint, status=status)
+    upstream_request_duration.observe(time.perf_counter() - start, method=method, endpoint=endpoint)
+    return result
+
+async def _make_request(
+    base_url: str,
+    method: str,
+    endpoint: str,
+    timeout: Optional[float],
+    idempotent: Optional[bool],
+    **kwargs
+) -> Dict[Any, Any]:
+    settings = get_settings()
     url = f"{base_url}{endpoint}"
     logger.info(f"Making {method} request to {url}")
-    
-    try:
-        response = requests.request(method, url, **kwargs)
-        response.raise_for_status()
-        try:
-            return response.json()
-        except:
-            return response.text
-    except Exception as e:
-        logger.error(f"Request failed: {str(e)}")
+
+    breaker = get_breaker(endpoint)
+    if not breaker.allow():
+        logger.error(f"Circuit open for {endpoint}, failing fast")
         return {
             "success": False,
-            "message": f"Request failed: {str(e)}",
-            "status_code": 500
-        }
\ No newline at end of file
+            "message": f"Request failed: circuit open for {endpoint}",
+            "status_code": 503
+        }
+
+    if idempotent is None:
+        idempotent = method.upper() in ("GET", "HEAD") or endpoint in settings.retry_endpoints
+    max_attempts = settings.retry_max_attempts if idempotent else 1
+    hedge = settings.hedge_enabled and endpoint in settings.hedge_endpoints
+
+    client = get_client()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    attempt = 0
+    while True:
+        attempt += 1
+        if deadline is not None:
+            kwargs["timeout"] = httpx.Timeout(max(deadline - time.monotonic(), 0.001), connect=client.timeout.connect)
+        error: Optional[Exception] = None
+        response: Optional[httpx.Response] = None
+        try:
+            if hedge:
+                response = await _hedged_send(client, method, url, settings.hedge_delay, **kwargs)
+            else:
+                response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            error = e
+        except BaseException as e:
+            # Local failures (e.g. an upload stream error) and cancellation
+            # say nothing about upstream health
+            breaker.release()
+            if not isinstance(e, Exception):
+                raise
+            logger.error(f"Request failed: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Request failed: {str(e)}",
+                "status_code": 500
+            }
+
+        retryable = error is not None or _is_retryable_status(response.status_code)
+        if retryable and attempt < max_attempts:
+            backoff = random.uniform(0, min(settings.retry_backoff_max, settings.retry_backoff_base * 2 ** (attempt - 1)))
+            if deadline is None or time.monotonic() + backoff < deadline:
+                _retries[endpoint] = _retries.get(endpoint, 0) + 1
+                logger.warning(f"Retrying {method} {url} (attempt {attempt + 1}) after {backoff:.3f}s")
+                await asyncio.sleep(backoff)
+                continue
+
+        if retryable:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+        if error is not None:
+            logger.error(f"Request failed: {str(error) or type(error).__name__}")
+            return {
+                "success": False,
+                "message": f"Request failed: {str(error) or type(error).__name__}",
+                "status_code": 504 if isinstance(error, httpx.TimeoutException) else 502
+            }
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Request failed: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Request failed: {str(e)}",
+                "status_code": e.response.status_code
+            }
+        try:
+            return json_loads(response.content)
+        except ValueError:
+            return response.text
+
+async def open_stream(
+    base_url: str,
+    method: str,
+    endpoint: str,
+    timeout: Optional[float] = None,
+    **kwargs
+) -> httpx.Response:
+    """
+    Open a streaming request to the RAG server
+
+    Unlike make_request this raises on failure, and the caller must
+    aclose() the returned response once it has consumed the body.
+    """
+    url = f"{base_url}{endpoint}"
+    logger.info(f"Opening {method} stream to {url}")
+
+    breaker = get_breaker(endpoint)
+    if not breaker.allow():
+        upstream_requests.inc(method=method, endpoint=endpoint, status="5xx")
+        raise CircuitOpenError(f"Circuit open for {endpoint}")
+
+    client = get_client()
+    if timeout is not None:
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=client.timeout.connect)
+
+    start = time.perf_counter()
+    try:
+        request = client.build_request(method, url, **kwargs)
+        response = await client.send(request, stream=True)
+    except httpx.TransportError:
+        breaker.record_failure()
+        upstream_requests.inc(method=method, endpoint=endpoint, status="5xx")
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    # Latency here is time to first byte; the body is relayed by the caller
+    upstream_requests.inc(method=method, endpoint=endpoint, status=f"{response.status_code // 100}xx")
+    upstream_request_duration.observe(time.perf_counter() - start, method=method, endpoint=endpoint)
+    if response.is_error:
+        await response.aclose()
+        if _is_retryable_status(response.status_code):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        response.raise_for_status()
+    breaker.record_success()
+    return response
@@ -0,0 +1,270 @@
+import gzip
+import json
+import math
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+_OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+}
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, operand in condition.items():
+        check = _OPERATORS.get(op)
+        # Operators we cannot evaluate locally must not widen the results
+        if check is None or not check(value, operand):
+            return False
+    return True
+
+def supports_filters(filters: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether every operator in R2R-style search_filters can be evaluated locally
+    """
+    if not filters:
+        return True
+    for key, condition in filters.items():
+        if key in ("$and", "$or"):
+            if not all(supports_filters(clause) for clause in condition):
+                return False
+        elif key.startswith("$"):
+            return False
+        elif isinstance(condition, dict) and not all(op in _OPERATORS for op in condition):
+            return False
+    return True
+
+def matches_filters(chunk: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate R2R-style search_filters ($and/$or, $eq/$ne/$in/$nin) on a chunk
+
+    Fields are looked up on the chunk first, then in its metadata. Any other
+    operator never matches.
+    """
+    if not filters:
+        return True
+    for key, condition in filters.items():
+        if key == "$and":
+            if not all(matches_filters(chunk, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filters(chunk, clause) for clause in condition):
+                return False
+        else:
+            value = chunk[key] if key in chunk else (chunk.get("metadata") or {}).get(key)
+            if not _match_condition(value, condition):
+                return False
+    return True
+
+class LexicalIndex:
+    """
+    In-memory BM25 inverted index over search result chunks
+
+    Holds at most `max_chunks` chunks and roughly `max_bytes` of chunk text,
+    evicting the least recently seen chunks first. Used to answer searches
+    locally when the upstream vector search is unavailable.
+    """
+
+    def __init__(self, max_chunks: int = 100_000, max_bytes: int = 64 * 1024 * 1024, k1: float = 1.2, b: float = 0.75):
+        self.max_chunks = max_chunks
+        self.max_bytes = max_bytes
+        self.k1 = k1
+        self.b = b
+        self._chunks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._by_document: Dict[str, set] = {}
+        self._total_length = 0
+        self._bytes = 0
+        self.evictions = 0
+        self.searches = 0
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def add(self, chunk: Dict[str, Any]) -> None:
+        """
+        Index one VectorSearchResult-shaped chunk
+        """
+        chunk_id = chunk.get("extraction_id")
+        text = chunk.get("text")
+        if not chunk_id or not text:
+            return
+        existing = self._chunks.get(chunk_id)
+        if existing is not None:
+            if existing["text"] == text:
+                self._chunks.move_to_end(chunk_id)
+                return
+            self._discard(chunk_id)
+
+        # Chunks indexed locally at ingest are superseded by upstream's own
+        if not chunk.get("local"):
+            for stale in [cid for cid in self._by_document.get(chunk.get("document_id"), ()) if self._chunks[cid].get("local")]:
+                self._discard(stale)
+
+        stored = {
+            "extraction_id": chunk_id,
+            "document_id": chunk.get("document_id") or "",
+            "user_id": chunk.get("user_id") or "",
+            "collection_ids": list(chunk.get("collection_ids") or []),
+            "text": text,
+            "metadata": dict(chunk.get("metadata") or {}),
+        }
+        if chunk.get("local"):
+            stored["local"] = True
+        terms: Dict[str, int] = {}
+        for term in tokenize(text):
+            terms[term] = terms.get(term, 0) + 1
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[chunk_id] = count
+
+        self._chunks[chunk_id] = stored
+        self._lengths[chunk_id] = sum(terms.values())
+        self._total_length += self._lengths[chunk_id]
+        self._bytes += len(text)
+        self._by_document.setdefault(stored["document_id"], set()).add(chunk_id)
+        self._evict()
+
+    def add_many(self, chunks: Iterable[Dict[str, Any]]) -> None:
+        for chunk in chunks:
+            if isinstance(chunk, dict):
+                self.add(chunk)
+
+    def _discard(self, chunk_id: str) -> None:
+        chunk = self._chunks.pop(chunk_id, None)
+        if chunk is None:
+            return
+        for term in set(tokenize(chunk["text"])):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(chunk_id, 0)
+        self._bytes -= len(chunk["text"])
+        document_chunks = self._by_document.get(chunk["document_id"])
+        if document_chunks is not None:
+            document_chunks.discard(chunk_id)
+            if not document_chunks:
+                del self._by_document[chunk["document_id"]]
+
+    def _evict(self) -> None:
+        while self._chunks and (len(self._chunks) > self.max_chunks or self._bytes > self.max_bytes):
+            self._discard(next(iter(self._chunks)))
+            self.evictions += 1
+
+    def remove_documents(self, document_ids: Iterable[str]) -> None:
+        for document_id in document_ids:
+            for chunk_id in list(self._by_document.get(document_id, ())):
+                self._discard(chunk_id)
+
+    def prune(self, keep: Callable[[str], bool]) -> int:
+        """
+        Drop chunks of documents for which `keep(document_id)` is false
+        """
+        stale = [document_id for document_id in self._by_document if not keep(document_id)]
+        before = len(self._chunks)
+        self.remove_documents(stale)
+        return before - len(self._chunks)
+
+    def search(self, query: str, limit: int = 10, offset: int = 0, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Rank chunks against the query with BM25, best first
+        """
+        self.searches += 1
+        n = len(self._chunks)
+        if n == 0:
+            return []
+        average_length = self._total_length / n
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / average_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked: List[Tuple[float, str]] = sorted(((score, chunk_id) for chunk_id, score in scores.items()), reverse=True)
+        results = []
+        skipped = 0
+        for score, chunk_id in ranked:
+            chunk = self._chunks[chunk_id]
+            if not matches_filters(chunk, filters):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            result = {key: value for key, value in chunk.items() if key != "local"}
+            result["score"] = round(score, 6)
+            results.append(result)
+            if len(results) >= limit:
+                break
+        return results
+
+    def chunks(self) -> List[Dict[str, Any]]:
+        """
+        Chunks from least to most recently seen, e.g. for a snapshot
+        """
+        return list(self._chunks.values())
+
+    def save(self, path: str, chunks: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Write a gzipped JSON snapshot atomically
+
+        Pass `chunks` taken on the event loop to serialize them on another thread.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"version": 1, "chunks": chunks if chunks is not None else self.chunks()}, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """
+        Add the chunks of a snapshot written by save(), returning how many
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        chunks = snapshot.get("chunks") or []
+        self.add_many(chunks)
+        return len(chunks)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chunks": len(self._chunks),
+            "documents": len(self._by_document),
+            "terms": len(self._postings),
+            "bytes": self._bytes,
+            "max_chunks": self.max_chunks,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "searches": self.searches,
+        }
+
+def split_text(text: str, chunk_chars: int) -> List[str]:
+    """
+    Split text into roughly `chunk_chars` sized pieces on whitespace
+    """
+    pieces, current, length = [], [], 0
+    for word in text.split():
+        if current and length + len(word) + 1 > chunk_chars:
+            pieces.append(" ".join(current))
+            current, length = [], 0
+        current.append(word)
+        length += len(word) + 1
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
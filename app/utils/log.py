@@ -0,0 +1,126 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+payload_sampled_var: ContextVar[bool] = ContextVar("payload_sampled", default=False)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamp records with the current request ID
+
+    Runs on the emitting thread, before the record crosses the queue and
+    loses its context.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+def _json_default(value: Any) -> Any:
+    # Pydantic models are dumped here, on the listener thread
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, including any `extra` fields
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=_json_default, ensure_ascii=False)
+
+def setup_logging(level: str = "INFO", log_dir: str = "logs") -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue to a background file-writing thread
+
+    Handlers only enqueue records; formatting and file I/O happen on the
+    listener thread. Safe to call more than once.
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    if _listener is not None:
+        return _listener
+
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.FileHandler(
+        os.path.join(log_dir, f'rag_api_{datetime.now().strftime("%Y%m%d")}.log'),
+        encoding="utf-8"
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+def log_payload(logger: logging.Logger, message: str, payload: Any) -> None:
+    """
+    Log a full request or response body, only for sampled requests
+    """
+    if payload_sampled_var.get() and logger.isEnabledFor(logging.INFO):
+        logger.info(message, extra={"payload": payload})
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware assigning each request an ID and a payload-sampling decision
+
+    The ID is taken from an incoming X-Request-ID header when present and
+    echoed back on the response.
+    """
+
+    def __init__(self, app, sample_rate: float = 0.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1") or uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers") or []) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        id_token = request_id_var.set(request_id)
+        sampled_token = payload_sampled_var.set(random.random() < self.sample_rate)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(id_token)
+            payload_sampled_var.reset(sampled_token)
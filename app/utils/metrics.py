@@ -0,0 +1,202 @@
+import bisect
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition without a client library dependency. Updates
+# are plain dict and list operations, cheap enough to leave on in production.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Sample = Tuple[Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = ([0] * (len(self.buckets) + 1), [0.0])
+            self._values[key] = entry
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    def samples(self):
+        for key, (counts, total) in self._values.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total[0]
+            yield f"{self.name}_count", labels, cumulative
+
+class CallbackGauge(_Metric):
+    """
+    Gauge whose samples are read from other components at scrape time
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, callback: Callable[[], Iterable[Sample]], type: str = "gauge"):
+        super().__init__(name, help)
+        self.callback = callback
+        self.type = type
+
+    def samples(self):
+        for labels, value in self.callback():
+            if value is not None:
+                yield self.name, labels, value
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "rag_api_requests_total", "HTTP requests handled by the gateway", ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "rag_api_request_duration_seconds", "Gateway request latency by route", ("method", "route")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "rag_api_requests_in_flight", "HTTP requests currently being handled"
+))
+upstream_requests = registry.register(Counter(
+    "rag_api_upstream_requests_total", "Calls to the RAG server by endpoint and outcome", ("method", "endpoint", "status")
+))
+upstream_request_duration = registry.register(Histogram(
+    "rag_api_upstream_request_duration_seconds", "RAG server call latency by endpoint, including retries", ("method", "endpoint")
+))
+llm_tokens = registry.register(Counter(
+    "rag_api_llm_tokens_total", "Token usage reported in upstream completions", ("type",)
+))
+context_tokens_saved = registry.register(Counter(
+    "rag_api_context_tokens_saved_total", "Estimated prompt tokens trimmed by token-budgeted /rag context"
+))
+rate_limited = registry.register(Counter(
+    "rag_api_rate_limited_total", "Requests rejected by admission control", ("tier", "route_class", "reason")
+))
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, latency and in-flight requests
+
+    Requests are labelled by route template rather than raw path to keep
+    label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_requests.inc(method=method, route=route_path, status=status["code"])
+            http_request_duration.observe(elapsed, method=method, route=route_path)
+
+def record_usage(usage: Optional[Dict[str, Any]]) -> None:
+    """
+    Add a completion's token usage to the token counters
+    """
+    if not isinstance(usage, dict):
+        return
+    for kind in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        value = usage.get(kind)
+        if isinstance(value, (int, float)):
+            llm_tokens.inc(value, type=kind[:-len("_tokens")])
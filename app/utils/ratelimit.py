@@ -0,0 +1,168 @@
+import math
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request is over its tier's rate or concurrency limit
+    """
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded ({reason}), retry after {retry_after:.2f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+class TokenBucket:
+    """
+    Refills `rate` tokens per second up to `burst`
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens, returning 0 or the seconds until they are available
+        """
+        self._refill(time.monotonic())
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (cost - self.tokens) / self.rate
+
+class Admission:
+    """
+    One admitted request's concurrency slot
+
+    The slot is returned by release(), at most once. A handler whose response
+    outlives it (e.g. a stream) calls detach() and releases the slot itself.
+    """
+
+    def __init__(self, limiter: "RateLimiter", user_key: str, tier: str, route_class: str):
+        self.limiter = limiter
+        self.user_key = user_key
+        self.tier = tier
+        self.route_class = route_class
+        self.detached = False
+        self._released = False
+
+    def detach(self) -> Callable[[], None]:
+        self.detached = True
+        return self.release
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.limiter.release(self.user_key, self.route_class)
+
+class RateLimiter:
+    """
+    Token-bucket and concurrency limits per user and route class
+
+    `limits` maps tier -> route class -> {"rps", "burst", "concurrency"}.
+    Route classes missing from a tier fall back to its "default" entry, and
+    unknown tiers to `default_tier`. Checks never wait: a request over the
+    limit fails immediately with the time after which it may be retried.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, Dict[str, float]]], default_tier: str = "free", idle_ttl: float = 600.0):
+        self.limits = limits
+        self.default_tier = default_tier
+        self.idle_ttl = idle_ttl
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        self._last_prune = time.monotonic()
+        self.allowed = 0
+        self.rejected: Dict[str, int] = {"rate": 0, "concurrency": 0}
+
+    def limits_for(self, tier: str, route_class: str) -> Dict[str, float]:
+        tier_limits = self.limits.get(tier) or self.limits.get(self.default_tier) or {}
+        return tier_limits.get(route_class) or tier_limits.get("default") or {}
+
+    def _prune(self, now: float) -> None:
+        if now - self._last_prune < self.idle_ttl:
+            return
+        self._last_prune = now
+        for key, bucket in list(self._buckets.items()):
+            if now - bucket.updated > self.idle_ttl and not self._in_flight.get(key):
+                del self._buckets[key]
+
+    def max_cost(self, tier: str, route_class: str) -> Optional[float]:
+        """
+        Largest cost a single charge can ever be admitted at, None if unlimited
+        """
+        limits = self.limits_for(tier, route_class)
+        rate = limits.get("rps")
+        if rate is None:
+            return None
+        return limits.get("burst", rate)
+
+    def charge(self, user_key: str, tier: str, route_class: str, cost: float = 1.0) -> None:
+        """
+        Take `cost` tokens from the user's bucket or raise RateLimitExceeded
+
+        Costs above max_cost() are never admitted; callers should reject such
+        requests outright rather than have them retried.
+        """
+        limits = self.limits_for(tier, route_class)
+        rate = limits.get("rps")
+        if rate is None:
+            return
+        burst = limits.get("burst", rate)
+        key = (user_key, route_class)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst)
+            self._buckets[key] = bucket
+        else:
+            # Pick up tier changes without resetting the bucket
+            bucket.rate, bucket.burst = rate, burst
+        wait = bucket.try_acquire(cost)
+        if wait > 0:
+            self.rejected["rate"] += 1
+            raise RateLimitExceeded("rate", wait if wait != float("inf") else 60.0)
+
+    def acquire(self, user_key: str, tier: str, route_class: str) -> Admission:
+        """
+        Admit one request, taking a concurrency slot the Admission returns
+        """
+        now = time.monotonic()
+        self._prune(now)
+        key = (user_key, route_class)
+        concurrency = self.limits_for(tier, route_class).get("concurrency")
+        if concurrency is not None and self._in_flight.get(key, 0) >= concurrency:
+            self.rejected["concurrency"] += 1
+            raise RateLimitExceeded("concurrency", 1.0)
+        self.charge(user_key, tier, route_class)
+        self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        self.allowed += 1
+        return Admission(self, user_key, tier, route_class)
+
+    def release(self, user_key: str, route_class: str) -> None:
+        key = (user_key, route_class)
+        remaining = self._in_flight.get(key, 0) - 1
+        if remaining > 0:
+            self._in_flight[key] = remaining
+        else:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "rejected": dict(self.rejected),
+            "buckets": len(self._buckets),
+            "in_flight": sum(self._in_flight.values()),
+        }
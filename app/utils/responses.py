@@ -0,0 +1,50 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+def json_dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def json_loads(content: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response serialized with orjson when it is installed
+
+    Returning a Response instance from a handler also bypasses FastAPI's
+    response_model validation, which is the point of the fast path.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+def check_search_shape(payload: Any) -> None:
+    """
+    Cheap top-level check of an upstream /v2/search payload
+    """
+    results = payload.get("results") if isinstance(payload, dict) else None
+    if not isinstance(results, dict) or not isinstance(results.get("vector_search_results"), list):
+        raise ValueError("Unexpected search response shape from RAG server")
+
+def check_rag_shape(payload: Any) -> None:
+    """
+    Cheap top-level check of an upstream /v2/rag payload
+    """
+    results = payload.get("results") if isinstance(payload, dict) else None
+    if (
+        not isinstance(results, dict)
+        or not isinstance(results.get("completion"), dict)
+        or not isinstance(results.get("search_results"), dict)
+    ):
+        raise ValueError("Unexpected RAG response shape from RAG server")
@@ -0,0 +1,76 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+SEARCH_MARKER = "search"
+KG_SEARCH_MARKER = "kg_search"
+COMPLETION_MARKER = "completion"
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encode one Server-Sent Event with a JSON payload
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+class RagStreamParser:
+    """
+    Incremental parser for the R2R streaming /v2/rag format
+
+    The upstream emits `<search>[...]</search>`, an optional
+    `<kg_search>[...]</kg_search>` and then `<completion>...</completion>`
+    with the completion tokens relayed as they are generated. Chunk
+    boundaries can fall anywhere, including inside a marker.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._section: Optional[str] = None
+        self.completion = ""
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume a chunk and return the (event, data) pairs it completes
+        """
+        self._buffer += chunk
+        events = []
+        while True:
+            if self._section is None:
+                start = self._buffer.find("<")
+                if start == -1:
+                    self._buffer = ""
+                    return events
+                end = self._buffer.find(">", start)
+                if end == -1:
+                    self._buffer = self._buffer[start:]
+                    return events
+                self._section = self._buffer[start + 1:end]
+                self._buffer = self._buffer[end + 1:]
+                continue
+
+            closing = f"</{self._section}>"
+            end = self._buffer.find(closing)
+            if self._section == COMPLETION_MARKER:
+                if end == -1:
+                    # Hold back anything that could be the start of the closing marker
+                    keep = 0
+                    for size in range(1, len(closing)):
+                        if self._buffer.endswith(closing[:size]):
+                            keep = size
+                    text = self._buffer[:len(self._buffer) - keep]
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    if text:
+                        self.completion += text
+                        events.append(("token", text))
+                    return events
+                text = self._buffer[:end]
+                if text:
+                    self.completion += text
+                    events.append(("token", text))
+            else:
+                if end == -1:
+                    return events
+                try:
+                    events.append((self._section, json.loads(self._buffer[:end])))
+                except ValueError:
+                    events.append((self._section, self._buffer[:end]))
+            self._buffer = self._buffer[end + len(closing):]
+            self._section = None
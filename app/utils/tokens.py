@@ -0,0 +1,49 @@
+import re
+from typing import Callable, Optional, Tuple
+
+# Rough approximation of BPE tokenization: words, numbers and individual
+# punctuation marks, with long words costing one token per four characters.
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a piece of text
+    """
+    if not text:
+        return 0
+    count = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        count += max(1, (len(piece) + 3) // 4) if len(piece) > 4 else 1
+    return count
+
+def get_token_counter(encoding: Optional[str] = None) -> Tuple[Callable[[str], int], str]:
+    """
+    Token counting function and its name
+
+    Uses the named tiktoken encoding when tiktoken is installed and the
+    encoding loads, otherwise falls back to estimate_tokens.
+    """
+    if encoding:
+        try:
+            import tiktoken
+            encoder = tiktoken.get_encoding(encoding)
+        except Exception:  # tiktoken is optional and may need to download its tables
+            return estimate_tokens, "estimate"
+        return lambda text: len(encoder.encode(text, disallowed_special=())) if text else 0, encoding
+    return estimate_tokens, "estimate"
+
+def truncate_to_tokens(text: str, max_tokens: int, count: Callable[[str], int] = estimate_tokens) -> str:
+    """
+    Longest whole-word prefix of `text` within `max_tokens`
+    """
+    if count(text) <= max_tokens:
+        return text
+    words = text.split(" ")
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count(" ".join(words[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
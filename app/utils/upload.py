@@ -0,0 +1,176 @@
+import hashlib
+import os
+import resource
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+
+class UploadTooLarge(Exception):
+    """
+    Raised while streaming when an upload exceeds the configured maximum size
+    """
+
+class UploadStats:
+    """
+    Counters for uploads streamed through the gateway
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.bytes_streamed = 0
+        self.files_streamed = 0
+        self.rejected_too_large = 0
+        # Chunks currently held by streaming uploads, and the largest one seen
+        self.buffered_bytes = 0
+        self.peak_buffered_bytes = 0
+        self.files_deduplicated = 0
+        self.bytes_deduplicated = 0
+
+    def start(self) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finish(self) -> None:
+        self.in_flight -= 1
+        self.files_streamed += 1
+
+    def buffered_bytes_per_upload(self) -> Optional[float]:
+        """
+        Mean bytes buffered by each upload currently streaming
+        """
+        return self.buffered_bytes / self.in_flight if self.in_flight else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "files_streamed": self.files_streamed,
+            "bytes_streamed": self.bytes_streamed,
+            "rejected_too_large": self.rejected_too_large,
+            "files_deduplicated": self.files_deduplicated,
+            "bytes_deduplicated": self.bytes_deduplicated,
+            "buffered_bytes": self.buffered_bytes,
+            "buffered_bytes_per_upload": self.buffered_bytes_per_upload(),
+            "peak_buffered_bytes_per_upload": self.peak_buffered_bytes,
+            "rss_bytes": _current_rss_bytes(),
+            "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        }
+
+upload_stats = UploadStats()
+
+def _current_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class UploadStream:
+    """
+    Re-iterable chunked reader over an UploadFile with a size cap
+
+    Only one chunk is held in memory at a time, so memory per upload is
+    bounded by the chunk size rather than by the size of the file.
+    """
+
+    def __init__(self, upload: UploadFile, chunk_size: int, max_bytes: int):
+        self.upload = upload
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.too_large = False
+
+    @property
+    def filename(self) -> str:
+        return self.upload.filename or "upload"
+
+    @property
+    def content_type(self) -> str:
+        return self.upload.content_type or "application/octet-stream"
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        await self.upload.seek(0)
+        self.bytes_read = 0
+        held = 0
+        upload_stats.start()
+        try:
+            while True:
+                chunk = await self.upload.read(self.chunk_size)
+                if not chunk:
+                    break
+                self.bytes_read += len(chunk)
+                if self.bytes_read > self.max_bytes:
+                    self.too_large = True
+                    upload_stats.rejected_too_large += 1
+                    raise UploadTooLarge(
+                        f"{self.filename} exceeds the maximum upload size of {self.max_bytes} bytes"
+                    )
+                upload_stats.bytes_streamed += len(chunk)
+                # The previous chunk has been sent on by the time this one is read
+                upload_stats.buffered_bytes += len(chunk) - held
+                held = len(chunk)
+                upload_stats.peak_buffered_bytes = max(upload_stats.peak_buffered_bytes, len(chunk))
+                yield chunk
+        finally:
+            upload_stats.buffered_bytes -= held
+            upload_stats.finish()
+
+async def hash_upload(upload: UploadFile, chunk_size: int) -> Tuple[str, int]:
+    """
+    Return the sha256 hex digest and size of an upload, read in chunks
+
+    The upload is rewound afterwards so it can still be streamed upstream.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    await upload.seek(0)
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    await upload.seek(0)
+    return digest.hexdigest(), size
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+class MultipartUpload:
+    """
+    Streaming multipart/form-data body for one or more file fields
+    """
+
+    def __init__(self, field_name: str, streams: List[UploadStream]):
+        self.field_name = field_name
+        self.streams = streams
+        self.boundary = uuid.uuid4().hex
+
+    def _part_header(self, stream: UploadStream) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote(self.field_name)}"; filename="{_quote(stream.filename)}"\r\n'
+            f"Content-Type: {stream.content_type}\r\n\r\n"
+        ).encode("utf-8")
+
+    def _closing(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode("utf-8")
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": f"multipart/form-data; boundary={self.boundary}"}
+        sizes = [stream.upload.size for stream in self.streams]
+        if all(size is not None for size in sizes):
+            length = sum(len(self._part_header(stream)) + size + 2 for stream, size in zip(self.streams, sizes))
+            headers["Content-Length"] = str(length + len(self._closing()))
+        return headers
+
+    async def body(self) -> AsyncIterator[bytes]:
+        for stream in self.streams:
+            yield self._part_header(stream)
+            async for chunk in stream.chunks():
+                yield chunk
+            yield b"\r\n"
+        yield self._closing()
@@ -0,0 +1,90 @@
+"""
+Compare two bench/load.py result files
+
+Prints per-endpoint, per-concurrency deltas and exits non-zero when the
+candidate regresses beyond the thresholds, so it can gate CI:
+
+    python -m bench.compare bench/results/base.json bench/results/head.json --max-regression 10
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# Metric, whether higher is better
+METRICS: List[Tuple[str, bool]] = [
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+    ("throughput_rps", True),
+    ("gateway_cpu_ms_per_request", False),
+]
+
+# Only these gate the exit code; p99 and CPU are too noisy on shared runners
+GATED = {"p95_ms", "throughput_rps"}
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+def _change(base: Optional[float], head: Optional[float]) -> Optional[float]:
+    if base is None or head is None or base == 0:
+        return None
+    return (head - base) / base * 100
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], max_regression: float) -> Tuple[List[List[str]], List[str]]:
+    """
+    Build table rows and a list of regressions beyond `max_regression` percent
+    """
+    rows: List[List[str]] = []
+    regressions: List[str] = []
+    for endpoint, head_levels in head["endpoints"].items():
+        base_levels = {level["concurrency"]: level for level in base["endpoints"].get(endpoint, [])}
+        for head_level in head_levels:
+            concurrency = head_level["concurrency"]
+            base_level = base_levels.get(concurrency)
+            if base_level is None:
+                continue
+            for metric, higher_is_better in METRICS:
+                change = _change(base_level.get(metric), head_level.get(metric))
+                if change is None:
+                    continue
+                worse = -change if higher_is_better else change
+                flag = ""
+                if metric in GATED and worse > max_regression:
+                    flag = "REGRESSION"
+                    regressions.append(f"{endpoint} c={concurrency} {metric} {change:+.1f}%")
+                rows.append([
+                    endpoint, str(concurrency), metric,
+                    f"{base_level[metric]:.3f}", f"{head_level[metric]:.3f}", f"{change:+.1f}%", flag,
+                ])
+            if head_level.get("errors", 0) > base_level.get("errors", 0):
+                regressions.append(f"{endpoint} c={concurrency} errors {base_level.get('errors', 0)} -> {head_level['errors']}")
+    return rows, regressions
+
+def _print_table(rows: List[List[str]]) -> None:
+    header = ["endpoint", "conc", "metric", "base", "head", "change", ""]
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", help="Baseline results JSON")
+    parser.add_argument("head", help="Candidate results JSON")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="Allowed p95 increase or throughput drop, in percent")
+    args = parser.parse_args()
+
+    base, head = _load(args.base), _load(args.head)
+    print(f"base {base['meta'].get('commit')}  head {head['meta'].get('commit')}")
+    rows, regressions = compare(base, head, args.max_regression)
+    _print_table(rows)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.max_regression}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
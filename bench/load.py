@@ -0,0 +1,281 @@
+"""
+Load driver for the gateway
+
+Runs each endpoint at several concurrency levels and reports p50/p95/p99
+latency, throughput, error count and gateway CPU (from /proc, when the
+gateway PID is known). Results are written as JSON for bench/compare.py.
+
+Against a running gateway:
+
+    python -m bench.load --url http://localhost:8000 --gateway-pid 1234
+
+Or let the driver start the mock upstream and a gateway itself:
+
+    python -m bench.load --spawn --output bench/results/$(git rev-parse --short HEAD).json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+Call = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+def _rag(client: httpx.AsyncClient, i: int):
+    return client.post("/rag", json={"query": f"benchmark question {i}"})
+
+async def _rag_stream(client: httpx.AsyncClient, i: int):
+    async with client.stream("POST", "/rag/stream", json={"query": f"benchmark stream {i}"}) as response:
+        async for _ in response.aiter_bytes():
+            pass
+        return response
+
+def _search(client: httpx.AsyncClient, i: int):
+    return client.post("/search", json={"query": f"benchmark search {i}"})
+
+def _search_cached(client: httpx.AsyncClient, i: int):
+    return client.post("/search", json={"query": "benchmark search cached"})
+
+def _search_batch(client: httpx.AsyncClient, i: int):
+    return client.post("/search/batch", json={"requests": [{"query": f"benchmark batch {i} {j}"} for j in range(10)]})
+
+def _documents(client: httpx.AsyncClient, i: int):
+    return client.get("/documents", params={"limit": 100, "offset": (i * 100) % 1000})
+
+def _ingest(client: httpx.AsyncClient, i: int):
+    return client.post("/documents/ingest", files=[("files", (f"bench-{i}.txt", FILE_BODY, "text/plain"))])
+
+def _delete(client: httpx.AsyncClient, i: int):
+    return client.delete(f"/documents/bench-{i}")
+
+def _health(client: httpx.AsyncClient, i: int):
+    return client.get("/health")
+
+FILE_BODY = b"benchmark document body\n" * 4096
+
+ENDPOINTS: Dict[str, Call] = {
+    "rag": _rag,
+    "rag_stream": _rag_stream,
+    "search": _search,
+    "search_cached": _search_cached,
+    "search_batch": _search_batch,
+    "documents": _documents,
+    "ingest": _ingest,
+    "delete": _delete,
+    "health": _health,
+}
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+def read_cpu_seconds(pid: int) -> Optional[float]:
+    """
+    User plus system CPU time of a process, from /proc/<pid>/stat
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Fields after the parenthesised command name; utime and stime are 14 and 15
+    fields = stat.rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+async def run_level(
+    url: str,
+    call: Call,
+    concurrency: int,
+    requests: int,
+    duration: Optional[float],
+    gateway_pid: Optional[int],
+    headers: Dict[str, str],
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(sys.maxsize))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120.0, headers=headers) as client:
+        deadline = time.perf_counter() + duration if duration else None
+
+        async def worker():
+            while True:
+                i = next(counter)
+                if deadline is None and i >= requests:
+                    return
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                start = time.perf_counter()
+                try:
+                    response = await call(client, i)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - start)
+                if not status.startswith("2"):
+                    errors[status] = errors.get(status, 0) + 1
+
+        cpu_start = read_cpu_seconds(gateway_pid) if gateway_pid else None
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - wall_start
+        cpu_end = read_cpu_seconds(gateway_pid) if gateway_pid else None
+
+    latencies.sort()
+    cpu_seconds = cpu_end - cpu_start if cpu_start is not None and cpu_end is not None else None
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_statuses": errors,
+        "duration_s": round(wall, 4),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else None,
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p95_ms": _ms(percentile(latencies, 95)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+        "max_ms": _ms(latencies[-1] if latencies else None),
+        "gateway_cpu_s": round(cpu_seconds, 4) if cpu_seconds is not None else None,
+        "gateway_cpu_percent": round(cpu_seconds / wall * 100, 1) if cpu_seconds is not None and wall > 0 else None,
+        "gateway_cpu_ms_per_request": round(cpu_seconds * 1000 / len(latencies), 4) if cpu_seconds is not None and latencies else None,
+    }
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _wait_for(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+def spawn(args) -> List[subprocess.Popen]:
+    """
+    Start the mock upstream and a gateway pointed at it
+    """
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "bench.mock_r2r", "--port", str(args.mock_port), *args.mock_args],
+        cwd=ROOT,
+    )
+    _wait_for(f"http://127.0.0.1:{args.mock_port}/v2/health")
+
+    workdir = tempfile.mkdtemp(prefix="rag-bench-")
+    env = {
+        **os.environ,
+        "BASE_URL": f"http://127.0.0.1:{args.mock_port}",
+        "ATLAS_DB": os.environ.get("ATLAS_DB", f"sqlite:///{workdir}/bench.sqlite"),
+        "LOG_DIR": os.path.join(workdir, "logs"),
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    subprocess.run([sys.executable, "-m", "app.db.create_tables"], cwd=ROOT, env=env, check=True, capture_output=True)
+    gateway = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    _wait_for(f"http://127.0.0.1:{args.port}/health/live")
+    return [gateway, mock]
+
+async def run(args, gateway_pid: Optional[int]) -> Dict[str, Any]:
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for name in args.endpoints:
+        call = ENDPOINTS[name]
+        # Warm connection pools and caches outside the measured runs
+        await run_level(args.url, call, 1, args.warmup, None, None, headers)
+        results[name] = []
+        for concurrency in args.concurrency:
+            level = await run_level(args.url, call, concurrency, args.requests, args.duration, gateway_pid, headers)
+            results[name].append(level)
+            print(
+                f"{name:<14} c={concurrency:<4} n={level['requests']:<6} "
+                f"p50={level['p50_ms']}ms p95={level['p95_ms']}ms p99={level['p99_ms']}ms "
+                f"rps={level['throughput_rps']} errors={level['errors']} cpu={level['gateway_cpu_percent']}%",
+                flush=True,
+            )
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "url": args.url,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "requests_per_level": args.requests,
+            "duration_per_level": args.duration,
+            "mock_args": args.mock_args if args.spawn else None,
+        },
+        "endpoints": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Gateway base URL (default: the spawned gateway)")
+    parser.add_argument("--endpoints", nargs="+", default=["search", "search_cached", "rag", "rag_stream", "documents", "health"],
+                        choices=sorted(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds per level, instead of --requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests before each endpoint")
+    parser.add_argument("--gateway-pid", type=int, default=None, help="Gateway process to sample CPU from")
+    parser.add_argument("--token", default=None, help="Send this bearer token to exercise its user's subscription tier")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    parser.add_argument("--spawn", action="store_true", help="Start the mock upstream and a gateway")
+    parser.add_argument("--port", type=int, default=8800, help="Port for the spawned gateway")
+    parser.add_argument("--mock-port", type=int, default=7373, help="Port for the spawned mock upstream")
+    parser.add_argument("--mock-args", nargs=argparse.REMAINDER, default=[],
+                        help="Remaining arguments are passed to bench.mock_r2r")
+    args = parser.parse_args()
+
+    processes: List[subprocess.Popen] = []
+    gateway_pid = args.gateway_pid
+    if args.spawn:
+        processes = spawn(args)
+        gateway_pid = gateway_pid or processes[0].pid
+        args.url = args.url or f"http://127.0.0.1:{args.port}"
+    args.url = args.url or "http://localhost:8000"
+
+    try:
+        report = asyncio.run(run(args, gateway_pid))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Local stand-in for the R2R v2 API, for benchmarking the gateway
+
+Serves /v2/rag (plain and streamed), /v2/search, /v2/completion,
+/v2/ingest_files, /v2/documents_overview, /v2/delete and /v2/health with
+a configurable latency and payload size. Responses are pre-serialized so
+the mock itself stays cheap under load.
+
+    python -m bench.mock_r2r --port 7272 --latency-ms 50 --results 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
+
+class MockConfig:
+    def __init__(
+        self,
+        latency_ms: float = 20.0,
+        jitter_ms: float = 5.0,
+        results: int = 10,
+        chunk_chars: int = 800,
+        documents: int = 1000,
+        completion_tokens: int = 200,
+        token_delay_ms: float = 0.0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.results = results
+        self.chunk_chars = chunk_chars
+        self.documents = documents
+        self.completion_tokens = completion_tokens
+        self.token_delay_ms = token_delay_ms
+
+WORDS = "the gateway forwards retrieval augmented generation queries to an upstream server and caches results".split()
+
+def _text(chars: int, seed: int) -> str:
+    rng = random.Random(seed)
+    words: List[str] = []
+    length = 0
+    while length < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
+
+def _search_results(config: MockConfig) -> List[Dict[str, Any]]:
+    return [
+        {
+            "extraction_id": str(uuid.UUID(int=i + 1)),
+            "document_id": str(uuid.UUID(int=(i % max(config.documents, 1)) + 1_000_000)),
+            "user_id": "bench-user",
+            "collection_ids": [],
+            "score": round(1.0 - i / (config.results + 1), 4),
+            "text": _text(config.chunk_chars, i),
+            "metadata": {"version": "v0", "chunk_order": i, "document_type": "txt", "associated_query": "bench"},
+        }
+        for i in range(config.results)
+    ]
+
+def _completion(config: MockConfig) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-bench",
+        "choices": [{
+            "finish_reason": "stop",
+            "index": 0,
+            "logprobs": None,
+            "message": {"content": _text(config.completion_tokens * 5, 42), "role": "assistant"},
+        }],
+        "created": 0,
+        "model": "bench",
+        "object": "chat.completion",
+        "service_tier": None,
+        "system_fingerprint": "fp_bench",
+        "usage": {
+            "completion_tokens": config.completion_tokens,
+            "prompt_tokens": config.results * config.chunk_chars // 4,
+            "total_tokens": config.completion_tokens + config.results * config.chunk_chars // 4,
+            "completion_tokens_details": {},
+            "prompt_tokens_details": {},
+        },
+    }
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="Mock R2R")
+
+    search_results = _search_results(config)
+    completion = _completion(config)
+    search_body = json.dumps({"results": {"vector_search_results": search_results, "kg_search_results": None}}).encode()
+    rag_body = json.dumps({"results": {
+        "completion": completion,
+        "search_results": {"vector_search_results": search_results, "kg_search_results": None},
+    }}).encode()
+    completion_body = json.dumps({"results": completion}).encode()
+    overview = [
+        {
+            "id": str(uuid.UUID(int=i + 1_000_000)),
+            "title": f"doc-{i}.txt",
+            "user_id": f"user-{i % 10}",
+            "document_type": "txt",
+            "created_at": "2024-01-01T00:00:00Z",
+            "updated_at": "2024-01-01T00:00:00Z",
+            "ingestion_status": "success",
+            "kg_extraction_status": "pending",
+            "version": "v0",
+            "collection_ids": [],
+            "metadata": {},
+        }
+        for i in range(config.documents)
+    ]
+
+    async def delay():
+        if config.latency_ms > 0 or config.jitter_ms > 0:
+            await asyncio.sleep(max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000)
+
+    def json_response(body: bytes) -> Response:
+        return Response(content=body, media_type="application/json")
+
+    @app.post("/v2/search")
+    async def search():
+        await delay()
+        return json_response(search_body)
+
+    @app.post("/v2/rag")
+    async def rag(request: Request):
+        payload = await request.json()
+        await delay()
+        if not (payload.get("rag_generation_config") or {}).get("stream"):
+            return json_response(rag_body)
+
+        async def stream():
+            yield "<search>" + json.dumps(search_results) + "</search>"
+            yield "<completion>"
+            for word in completion["choices"][0]["message"]["content"].split(" "):
+                if config.token_delay_ms > 0:
+                    await asyncio.sleep(config.token_delay_ms / 1000)
+                yield word + " "
+            yield "</completion>"
+        return StreamingResponse(stream(), media_type="text/plain")
+
+    @app.post("/v2/completion")
+    async def completion_endpoint():
+        await delay()
+        return json_response(completion_body)
+
+    @app.post("/v2/ingest_files")
+    async def ingest_files(request: Request):
+        body = await request.body()
+        await delay()
+        count = max(body.count(b'name="files"'), 1)
+        return {"results": [
+            {"message": "Ingestion task queued successfully.", "task_id": str(uuid.uuid4()), "document_id": str(uuid.uuid4())}
+            for _ in range(count)
+        ]}
+
+    @app.get("/v2/documents_overview")
+    async def documents_overview(offset: int = 0, limit: int = 100, document_ids: List[str] = Query([])):
+        await delay()
+        if document_ids:
+            wanted = set(document_ids)
+            return {"results": [doc for doc in overview if doc["id"] in wanted], "total_entries": len(wanted)}
+        page = overview[offset:] if limit == -1 else overview[offset:offset + limit]
+        return {"results": page, "total_entries": len(overview)}
+
+    @app.delete("/v2/delete")
+    async def delete():
+        await delay()
+        return Response(status_code=204)
+
+    @app.get("/v2/user")
+    async def user(authorization: Optional[str] = Header(None)):
+        # Any bearer token is valid and names its own user
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return Response(status_code=401)
+        return {"results": {"id": token, "email": f"{token}@example.com"}}
+
+    @app.get("/v2/health")
+    async def health():
+        return {"results": {"response": "ok"}}
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7272)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mean added latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Standard deviation of the added latency")
+    parser.add_argument("--results", type=int, default=10, help="Search results per response")
+    parser.add_argument("--chunk-chars", type=int, default=800, help="Characters of text per search result")
+    parser.add_argument("--documents", type=int, default=1000, help="Documents in the overview")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="Approximate completion length")
+    parser.add_argument("--token-delay-ms", type=float, default=0.0, help="Delay between streamed tokens")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        results=args.results,
+        chunk_chars=args.chunk_chars,
+        documents=args.documents,
+        completion_tokens=args.completion_tokens,
+        token_delay_ms=args.token_delay_ms,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
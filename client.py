@@ -1,54 +1,300 @@
-import io
-import requests
-from typing import Dict, Any
-from fastapi import UploadFile
+import asyncio
+import json
+import threading
+import httpx
+from contextlib import ExitStack
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 
-class RAGClient:
-    def __init__(self, base_url: str = "http://localhost:8000"):
-        self.base_url = base_url
+# (files done, files total) after each finished ingest batch
+ProgressCallback = Callable[[int, int], None]
 
-    def ingest_file(self, file_path: str) -> Dict[str, Any]:
-        """Ingest a file to the RAG server"""
-        files = {
-        'files': (Path(file_path).name, open(file_path, 'rb'), 'text/plain')
-        }
-        response = requests.post(f"{self.base_url}/documents/ingest", files=files)
+class AsyncRAGClient:
+    """Async client for the RAG API with a persistent pooled connection"""
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        timeout: float = 300.0,
+        max_connections: int = 32,
+        user_id: Optional[str] = None,
+        token: Optional[str] = None,
+    ):
+        self.base_url = base_url.rstrip('/')
+        headers = {"X-User-Id": user_id} if user_id else {}
+        if token:
+            # R2R access token; the gateway verifies it for per-user rate limits
+            headers["Authorization"] = f"Bearer {token}"
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers=headers,
+        )
+
+    async def __aenter__(self) -> "AsyncRAGClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled connections"""
+        await self._client.aclose()
+
+    async def ingest_files(self, file_paths: Iterable[str], root: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Ingest files in one request, returning one result per file
+
+        Files are named by their path relative to `root` when given, so
+        same-named files in different directories stay distinct documents.
+        """
+        with ExitStack() as stack:
+            # httpx streams open file objects in chunks; the stack closes them
+            files = [
+                ('files', (
+                    Path(file_path).relative_to(root).as_posix() if root else Path(file_path).name,
+                    stack.enter_context(open(file_path, 'rb')),
+                    'text/plain',
+                ))
+                for file_path in file_paths
+            ]
+            response = await self._client.post("/documents/ingest", files=files)
         return response.json()
 
+    async def ingest_file(self, file_path: str) -> List[Dict[str, Any]]:
+        """Ingest a file to the RAG server"""
+        return await self.ingest_files([file_path])
+
+    async def ingest_directory(
+        self,
+        directory: str,
+        pattern: str = "*",
+        recursive: bool = True,
+        batch_size: int = 8,
+        concurrency: int = 4,
+        progress: Optional[ProgressCallback] = None,
+    ) -> List[Dict[str, Any]]:
+        """Ingest every file under a directory with bounded parallelism"""
+        root = Path(directory)
+        paths = sorted(str(path) for path in (root.rglob(pattern) if recursive else root.glob(pattern)) if path.is_file())
+        batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+        semaphore = asyncio.Semaphore(concurrency)
+        done = 0
+
+        async def run(batch: List[str]) -> List[Dict[str, Any]]:
+            nonlocal done
+            async with semaphore:
+                try:
+                    results = await self.ingest_files(batch, root=directory)
+                except (httpx.HTTPError, OSError, ValueError) as e:
+                    results = [
+                        {"filename": Path(path).relative_to(directory).as_posix(), "success": False, "results": None, "message": str(e), "status_code": 500}
+                        for path in batch
+                    ]
+            done += len(batch)
+            if progress is not None:
+                progress(done, len(paths))
+            return results
+
+        batch_results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [result for results in batch_results for result in results]
 
-    def list_documents(self) -> Dict[str, Any]:
+    async def list_documents(self, **params) -> Dict[str, Any]:
         """Get list of all documents"""
-        response = requests.get(f"{self.base_url}/documents")
+        response = await self._client.get("/documents", params=params)
         response.raise_for_status()
         return response.json()
 
-    def delete_document(self, document_id: str) -> Dict[str, Any]:
+    async def delete_document(self, document_id: str) -> Dict[str, Any]:
         """Delete a document by ID"""
-        response = requests.delete(f"{self.base_url}/documents/{document_id}")
+        response = await self._client.delete(f"/documents/{document_id}")
+        return response.json()
 
+    async def delete_documents(self, document_ids: List[str]) -> Dict[str, Any]:
+        """Delete many documents in one request"""
+        response = await self._client.post("/documents/delete", json={"document_ids": document_ids})
         return response.json()
 
-    def check_health(self) -> Dict[str, Any]:
+    async def check_health(self) -> Dict[str, Any]:
         """Check API health"""
-        response = requests.get(f"{self.base_url}/health")
+        response = await self._client.get("/health")
         response.raise_for_status()
         return response.json()
 
+    async def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        """Execute a search query"""
+        response = await self._client.post("/search", json={"query": query, **kwargs})
+        response.raise_for_status()
+        return response.json()
+
+    async def search_many(self, queries: List[str], chunk_size: int = 100, concurrency: int = 4, **kwargs) -> List[Dict[str, Any]]:
+        """Run many searches through /search/batch, returning per-query items in order"""
+        chunks = [queries[i:i + chunk_size] for i in range(0, len(queries), chunk_size)]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(chunk: List[str]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                response = await self._client.post(
+                    "/search/batch", json={"requests": [{"query": query, **kwargs} for query in chunk]}
+                )
+                response.raise_for_status()
+                return response.json()["results"]
+
+        chunk_results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+        results = []
+        for offset, items in zip(range(0, len(queries), chunk_size), chunk_results):
+            for item in items:
+                results.append({**item, "index": item["index"] + offset})
+        return results
+
+    async def rag_query(self, query: str, **kwargs) -> Dict[str, Any]:
+        """Execute a RAG query"""
+        response = await self._client.post("/rag", json={"query": query, **kwargs})
+        response.raise_for_status()
+        return response.json()
+
+    async def rag_many(self, queries: List[str], concurrency: int = 4, **kwargs) -> List[Any]:
+        """Run many RAG queries concurrently; failed queries yield their exception"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.rag_query(query, **kwargs)
+
+        return await asyncio.gather(*(run(query) for query in queries), return_exceptions=True)
+
+    async def rag_stream(self, query: str, **kwargs) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream a RAG answer as (event, data) pairs"""
+        async with self._client.stream("POST", "/rag/stream", json={"query": query, **kwargs}) as response:
+            response.raise_for_status()
+            event = "message"
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    yield event, json.loads(line[len("data:"):].strip())
+                    event = "message"
+
+class RAGClient:
+    """Synchronous wrapper around AsyncRAGClient
+
+    The async client runs on a private event loop in a background thread, so
+    the wrapper also works from code that already has a running loop, such as
+    notebooks or async frameworks.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", **kwargs):
+        self.base_url = base_url.rstrip('/')
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="rag-client-loop", daemon=True)
+        self._thread.start()
+        self._async = self._run(self._create(base_url, kwargs))
+
+    @staticmethod
+    async def _create(base_url: str, kwargs: Dict[str, Any]) -> AsyncRAGClient:
+        return AsyncRAGClient(base_url, **kwargs)
+
+    def _run(self, coro):
+        if threading.current_thread() is self._thread:
+            coro.close()
+            # Blocking here would wait on the loop this call is running on
+            raise RuntimeError("RAGClient cannot be called from its own callbacks; use AsyncRAGClient there")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def __enter__(self) -> "RAGClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the pooled connections and the private loop"""
+        if not self._loop.is_closed():
+            try:
+                self._run(self._async.aclose())
+            finally:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join()
+                self._loop.close()
+
+    def ingest_files(self, file_paths: Iterable[str], root: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Ingest files in one request, returning one result per file"""
+        return self._run(self._async.ingest_files(file_paths, root))
+
+    def ingest_file(self, file_path: str) -> List[Dict[str, Any]]:
+        """Ingest a file to the RAG server"""
+        return self._run(self._async.ingest_file(file_path))
+
+    def ingest_directory(self, directory: str, **kwargs) -> List[Dict[str, Any]]:
+        """Ingest every file under a directory with bounded parallelism"""
+        return self._run(self._async.ingest_directory(directory, **kwargs))
+
+    def list_documents(self, **params) -> Dict[str, Any]:
+        """Get list of all documents"""
+        return self._run(self._async.list_documents(**params))
+
+    def delete_document(self, document_id: str) -> Dict[str, Any]:
+        """Delete a document by ID"""
+        return self._run(self._async.delete_document(document_id))
+
+    def delete_documents(self, document_ids: List[str]) -> Dict[str, Any]:
+        """Delete many documents in one request"""
+        return self._run(self._async.delete_documents(document_ids))
+
+    def check_health(self) -> Dict[str, Any]:
+        """Check API health"""
+        return self._run(self._async.check_health())
+
+    def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        """Execute a search query"""
+        return self._run(self._async.search(query, **kwargs))
+
+    def search_many(self, queries: List[str], **kwargs) -> List[Dict[str, Any]]:
+        """Run many searches through /search/batch"""
+        return self._run(self._async.search_many(queries, **kwargs))
+
+    def rag_query(self, query: str, **kwargs) -> Dict[str, Any]:
+        """Execute a RAG query"""
+        return self._run(self._async.rag_query(query, **kwargs))
+
+    def rag_many(self, queries: List[str], **kwargs) -> List[Any]:
+        """Run many RAG queries concurrently"""
+        return self._run(self._async.rag_many(queries, **kwargs))
+
+    def rag_stream(self, query: str, **kwargs) -> Iterator[Tuple[str, Any]]:
+        """Stream a RAG answer as (event, data) pairs"""
+        stream = self._async.rag_stream(query, **kwargs)
+
+        async def step():
+            return await stream.__anext__()
+
+        async def close():
+            await stream.aclose()
+
+        try:
+            while True:
+                try:
+                    yield self._run(step())
+                except StopAsyncIteration:
+                    return
+        finally:
+            # Closes the response early when the caller stops iterating
+            self._run(close())
+
 if __name__ == "__main__":
     # Example usage
     client = RAGClient()
-    
+
     # Check health
     print("Checking API health...")
     health = client.check_health()
     print(f"Health status: {health}")
-    
+
     # Upload a file
     print("\nUploading file...")
     result = client.ingest_file("test.txt")
     print(f"Upload result: {result}")
-    
+
     # List documents
     print("\nListing documents...")
     documents = client.list_documents()
@@ -62,8 +308,9 @@ if __name__ == "__main__":
     print(f"\nDeleting document {to_delete}...")
     delete_result = client.delete_document(to_delete)
     print(f"Delete result: {delete_result}")
+    client.close()
 
-    # 
+    #
     # # Delete a document
     # if documents['results']:
     #     doc_id = documents['results'][0]['document_id']
@@ -0,0 +1,41 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from endpoint_case import EndpointTestCase
+from app.main import search_cache, settings
+
+class TestBulkDelete(EndpointTestCase):
+    def setUp(self):
+        super().setUp()
+        self.routes["/v2/delete"] = self.delete
+
+    def delete(self, request):
+        document_ids = json.loads(request.url.params["filters"])["document_id"]["$in"]
+        if "bad" in document_ids:
+            return httpx.Response(422, json={"detail": "Invalid document ID"})
+        return httpx.Response(200, json={"results": {}})
+
+    def test_ids_are_deleted_in_chunks(self):
+        search_cache.set("cached", {"results": {}}, tags=["d1"])
+        with patch.object(settings, "delete_chunk_size", 2):
+            response = self.client.post("/documents/delete", json={"document_ids": ["d1", "d2", "d3", "d1"]})
+        body = response.json()
+        self.assertEqual((body["success"], body["deleted"], body["failed"]), (True, 3, 0))
+        self.assertEqual(len(self.upstream("/v2/delete")), 2)
+        self.assertNotIn("cached", search_cache)
+
+    def test_failed_chunk_is_retried_per_id(self):
+        with patch.object(settings, "delete_chunk_size", 2):
+            body = self.client.post("/documents/delete", json={"document_ids": ["d1", "bad"]}).json()
+        self.assertEqual((body["success"], body["deleted"], body["failed"]), (False, 1, 1))
+        self.assertEqual([(result["document_id"], result["success"]) for result in body["results"]], [("d1", True), ("bad", False)])
+        self.assertEqual(len(self.upstream("/v2/delete")), 3)
+
+    def test_requires_exactly_one_selector(self):
+        self.assertEqual(self.client.post("/documents/delete", json={}).status_code, 422)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch
+
+from app.utils.cache import TTLCache, canonical_key, normalize_query
+
+class TestTTLCache(unittest.TestCase):
+    def test_get_and_set(self):
+        cache = TTLCache(max_entries=2)
+        cache.set("a", {"value": 1})
+        self.assertEqual(cache.get("a"), {"value": 1})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_eviction_by_entries(self):
+        cache = TTLCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_eviction_by_bytes(self):
+        cache = TTLCache(max_entries=10, max_bytes=10)
+        cache.set("a", "x", size=6)
+        cache.set("b", "y", size=6)
+        self.assertNotIn("a", cache)
+        self.assertIn("b", cache)
+        cache.set("c", "z", size=11)
+        self.assertNotIn("c", cache)
+
+    def test_ttl_expiry(self):
+        cache = TTLCache(ttl=10)
+        with patch("app.utils.cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("app.utils.cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_tag(self):
+        cache = TTLCache()
+        cache.set("q1", 1, tags=["doc1", "doc2"])
+        cache.set("q2", 2, tags=["doc2"])
+        cache.set("q3", 3, tags=["doc3"])
+        self.assertEqual(cache.invalidate_tag("doc2"), 2)
+        self.assertNotIn("q1", cache)
+        self.assertNotIn("q2", cache)
+        self.assertIn("q3", cache)
+        self.assertEqual(cache.invalidate_tag("doc1"), 0)
+
+    def test_canonical_key(self):
+        self.assertEqual(canonical_key({"a": 1, "b": 2}), canonical_key({"b": 2, "a": 1}))
+        self.assertEqual(normalize_query("  What  is ML? "), "what is ml?")
+
+if __name__ == '__main__':
+    unittest.main()
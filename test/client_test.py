@@ -0,0 +1,107 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from client import AsyncRAGClient, RAGClient
+
+def handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/search/batch":
+        requests = json.loads(request.content)["requests"]
+        return httpx.Response(200, json={"results": [
+            {"index": i, "success": True, "results": {"query": item["query"]}} for i, item in enumerate(requests)
+        ], "total_latency_ms": 1.0})
+    if request.url.path == "/documents/ingest":
+        count = request.read().count(b'name="files"')
+        return httpx.Response(200, json=[{"filename": f"f{i}", "success": True} for i in range(count)])
+    if request.url.path == "/documents/delete":
+        document_ids = json.loads(request.content)["document_ids"]
+        return httpx.Response(200, json={"success": True, "deleted": len(document_ids)})
+    if request.url.path == "/rag/stream":
+        body = 'event: search\ndata: []\n\nevent: token\ndata: {"content": "Hi"}\n\nevent: done\ndata: {}\n\n'
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+    return httpx.Response(200, json={"status": "healthy"})
+
+def mock_client(client: AsyncRAGClient) -> AsyncRAGClient:
+    client._client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+class TestAsyncRAGClient(unittest.TestCase):
+    def test_search_many_keeps_order_across_chunks(self):
+        async def run():
+            async with mock_client(AsyncRAGClient()) as client:
+                return await client.search_many([f"q{i}" for i in range(25)], chunk_size=10)
+
+        results = asyncio.run(run())
+        self.assertEqual([item["index"] for item in results], list(range(25)))
+        self.assertEqual(results[24]["results"]["query"], "q24")
+
+    def test_ingest_directory_batches_and_reports_progress(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for i in range(5):
+                with open(os.path.join(directory, f"{i}.txt"), "w") as f:
+                    f.write("text")
+            progress = []
+
+            async def run():
+                async with mock_client(AsyncRAGClient()) as client:
+                    return await client.ingest_directory(
+                        directory, batch_size=2, progress=lambda done, total: progress.append((done, total))
+                    )
+
+            results = asyncio.run(run())
+        self.assertEqual(len(results), 5)
+        self.assertEqual(sorted(progress), [(2, 5), (4, 5), (5, 5)])
+
+    def test_ingest_directory_names_files_by_relative_path(self):
+        names = []
+
+        def record(request):
+            names.extend(part.split(b'"')[0].decode() for part in request.read().split(b'filename="')[1:])
+            return httpx.Response(200, json=[{"success": True}] * len(names))
+
+        with tempfile.TemporaryDirectory() as directory:
+            for sub in ("a", "b"):
+                os.mkdir(os.path.join(directory, sub))
+                with open(os.path.join(directory, sub, "README.md"), "w") as f:
+                    f.write("text")
+
+            async def run():
+                async with AsyncRAGClient() as client:
+                    client._client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(record))
+                    await client.ingest_directory(directory)
+
+            asyncio.run(run())
+        self.assertEqual(names, ["a/README.md", "b/README.md"])
+
+class TestRAGClient(unittest.TestCase):
+    def test_sync_wrapper(self):
+        with RAGClient() as client:
+            mock_client(client._async)
+            self.assertEqual(client.check_health(), {"status": "healthy"})
+            self.assertEqual(client.delete_documents(["a", "b"])["deleted"], 2)
+            self.assertEqual(list(client.rag_stream("q")), [("search", []), ("token", {"content": "Hi"}), ("done", {})])
+
+    def test_sync_wrapper_inside_running_loop(self):
+        async def run():
+            with RAGClient() as client:
+                mock_client(client._async)
+                return client.check_health()
+
+        self.assertEqual(asyncio.run(run()), {"status": "healthy"})
+
+    def test_ingest_files(self):
+        with tempfile.TemporaryDirectory() as directory, RAGClient() as client:
+            mock_client(client._async)
+            paths = []
+            for i in range(3):
+                paths.append(os.path.join(directory, f"{i}.txt"))
+                with open(paths[-1], "w") as f:
+                    f.write("text")
+            self.assertEqual(len(client.ingest_files(paths)), 3)
+
+if __name__ == "__main__":
+    unittest.main()
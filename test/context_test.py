@@ -0,0 +1,39 @@
+import unittest
+
+from app.utils.context import build_rag_messages, fit_to_budget, format_context
+from app.utils.tokens import estimate_tokens, get_token_counter, truncate_to_tokens
+
+def chunk(chunk_id, text):
+    return {"extraction_id": chunk_id, "text": text}
+
+class TestContext(unittest.TestCase):
+    def test_build_rag_messages(self):
+        self.assertEqual(format_context([chunk("a", "one"), chunk("b", "two")]), "[1] one\n\n[2] two")
+        messages = build_rag_messages("q?", [chunk("a", "one")], "system", "Q: {query}\nC: {context}")
+        self.assertEqual(messages, [
+            {"role": "system", "content": "system"},
+            {"role": "user", "content": "Q: q?\nC: [1] one"},
+        ])
+
+    def test_fit_to_budget_keeps_rank_order_and_truncates(self):
+        chunks = [chunk("a", "word " * 40), chunk("b", "more " * 100), chunk("c", "tiny")]
+        selected, used = fit_to_budget(chunks, budget=100, min_chunk_tokens=10)
+        self.assertEqual([c["extraction_id"] for c in selected], ["a", "b"])
+        self.assertLess(len(selected[1]["text"]), len(chunks[1]["text"]))
+        self.assertLessEqual(estimate_tokens(format_context(selected)), used)
+        self.assertLessEqual(used, 100)
+
+        selected, _ = fit_to_budget(chunks, budget=100, min_chunk_tokens=80)
+        self.assertEqual([c["extraction_id"] for c in selected], ["a"])
+        selected, _ = fit_to_budget(chunks, budget=10_000)
+        self.assertEqual(selected, chunks)
+
+    def test_truncate_to_tokens(self):
+        self.assertEqual(truncate_to_tokens("one two three", 10), "one two three")
+        self.assertEqual(truncate_to_tokens("one two three", 2), "one two")
+
+    def test_token_counter_falls_back_to_estimate(self):
+        self.assertEqual(get_token_counter(None), (estimate_tokens, "estimate"))
+
+if __name__ == "__main__":
+    unittest.main()
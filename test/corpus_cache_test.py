@@ -0,0 +1,37 @@
+import unittest
+
+from endpoint_case import EndpointTestCase
+import app.main as main
+
+class TestCorpusGeneration(EndpointTestCase):
+    def change_corpus_during(self, path):
+        route = self.routes[path]
+
+        def handler(request):
+            # An ingest or delete lands while the upstream call is running
+            main.invalidate_corpus_caches(["d1"])
+            return route(request)
+        self.routes[path] = handler
+
+    def test_rag_answer_from_before_a_change_is_not_cached(self):
+        self.change_corpus_during("/v2/rag")
+        first = self.client.post("/rag", json={"query": "q"})
+        self.assertEqual((first.status_code, first.headers["X-Cache"]), (200, "MISS"))
+        self.assertEqual(self.client.post("/rag", json={"query": "q"}).headers["X-Cache"], "MISS")
+        self.assertEqual(len(self.upstream("/v2/rag")), 2)
+
+    def test_search_result_from_before_a_change_is_not_cached(self):
+        self.change_corpus_during("/v2/search")
+        self.client.post("/search", json={"query": "q"})
+        self.client.post("/search", json={"query": "q"})
+        self.assertEqual(len(self.upstream("/v2/search")), 2)
+
+    def test_results_are_cached_while_the_corpus_is_unchanged(self):
+        self.client.post("/rag", json={"query": "q"})
+        self.assertEqual(self.client.post("/rag", json={"query": "q"}).headers["X-Cache"], "HIT")
+        self.client.post("/search", json={"query": "q"})
+        self.client.post("/search", json={"query": "q"})
+        self.assertEqual(len(self.upstream("/v2/search")), 1)
+
+if __name__ == "__main__":
+    unittest.main()
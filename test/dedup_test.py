@@ -0,0 +1,52 @@
+import unittest
+
+from app.utils.cache import TTLCache
+from app.utils.dedup import collapse_near_duplicates, jaccard, shingles, signature
+
+BASE = "the gateway forwards retrieval augmented generation queries to an upstream server and caches the results"
+
+def chunk(chunk_id, text):
+    return {"extraction_id": chunk_id, "text": text}
+
+class TestDedup(unittest.TestCase):
+    def test_shingles_and_jaccard(self):
+        self.assertEqual(shingles("A b C d", 3), {("a", "b", "c"), ("b", "c", "d")})
+        self.assertEqual(shingles("short text", 3), {("short", "text")})
+        self.assertEqual(jaccard({1, 2}, {2, 3}), 1 / 3)
+
+    def test_collapses_near_duplicates_keeping_the_first(self):
+        chunks = [
+            chunk("a", BASE),
+            chunk("b", BASE),
+            chunk("c", BASE + " quickly"),
+            chunk("d", "an unrelated chunk about rate limiting and token buckets"),
+        ]
+        kept, collapsed = collapse_near_duplicates(chunks, threshold=0.8)
+        self.assertEqual([c["extraction_id"] for c in kept], ["a", "d"])
+        self.assertEqual(collapsed, 2)
+
+    def test_threshold_and_limit(self):
+        chunks = [chunk("a", BASE), chunk("b", BASE + " quickly"), chunk("c", "something else entirely here")]
+        kept, _ = collapse_near_duplicates(chunks, threshold=1.0)
+        self.assertEqual(len(kept), 3)
+        kept, collapsed = collapse_near_duplicates(chunks, threshold=1.0, limit=1)
+        self.assertEqual([c["extraction_id"] for c in kept], ["a"])
+        self.assertEqual(collapsed, 0)
+
+    def test_signature_cache_is_reused_and_checked(self):
+        cache = TTLCache(ttl=60)
+        chunks = [chunk("a", BASE), chunk("b", BASE + " quickly")]
+        self.assertEqual(collapse_near_duplicates(chunks, signatures=cache)[1], 1)
+        self.assertEqual(cache.get("a")[1], signature(BASE))
+        # A cached signature for different text is not trusted
+        kept, collapsed = collapse_near_duplicates([chunk("b", "something else entirely here"), chunks[0]], signatures=cache)
+        self.assertEqual((len(kept), collapsed), (2, 0))
+
+    def test_prefix_filter_finds_every_near_duplicate(self):
+        words = [f"w{i}" for i in range(200)]
+        chunks = [chunk(str(i), " ".join(words[:i] + ["x"] + words[i + 1:])) for i in range(0, 200, 20)]
+        kept, collapsed = collapse_near_duplicates(chunks, threshold=0.8, limit=100)
+        self.assertEqual((len(kept), collapsed), (1, 9))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from app.utils.document_index import DocumentIndex
+
+def doc(document_id, user_id="u1", document_type="txt"):
+    return {"id": document_id, "title": document_id, "user_id": user_id, "document_type": document_type, "created_at": "2024"}
+
+class TestDocumentIndex(unittest.TestCase):
+    def test_query_filters_and_paginates(self):
+        index = DocumentIndex()
+        index.replace([doc("a"), doc("b", document_type="pdf"), doc("c", user_id="u2"), doc("d")])
+        page, total = index.query(user_id="u1", limit=2, offset=1)
+        self.assertEqual([item["id"] for item in page], ["b", "d"])
+        self.assertEqual(total, 3)
+        page, total = index.query(user_id="u1", document_type="txt")
+        self.assertEqual([item["id"] for item in page], ["a", "d"])
+        page, total = index.query(document_type="pdf")
+        self.assertEqual(total, 1)
+
+    def test_local_events_apply_immediately(self):
+        index = DocumentIndex()
+        index.replace([doc("a"), doc("b")])
+        index.remove(["a"])
+        index.upsert(doc("c"))
+        self.assertEqual([item["id"] for item in index.query()[0]], ["b", "c"])
+
+    def test_reconcile_keeps_recent_local_events(self):
+        index = DocumentIndex()
+        index.replace([doc("a"), doc("b")])
+        index.remove(["a"])
+        index.upsert(doc("c"))
+        # A snapshot taken before the events still lists "a" and lacks "c"
+        index.replace([doc("a"), doc("b")])
+        self.assertNotIn("a", index)
+        self.assertIn("c", index)
+
+    def test_reconcile_drops_expired_local_events(self):
+        index = DocumentIndex(local_event_ttl=0)
+        index.replace([doc("a")])
+        index.upsert(doc("c"))
+        index.replace([doc("a")])
+        self.assertNotIn("c", index)
+
+if __name__ == '__main__':
+    unittest.main()
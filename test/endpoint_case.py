@@ -0,0 +1,80 @@
+import atexit
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+# The database URL is read when app.db is first imported
+_db_dir = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+os.environ["ATLAS_DB"] = f"sqlite:///{os.path.join(_db_dir, 'atlas.sqlite')}"
+
+from fastapi.testclient import TestClient
+
+import app.utils.http as http
+from app.db.create_tables import create_tables
+from app.main import app, group_cache, rag_cache, search_cache, settings
+
+def chunk(i, document_id="d1"):
+    return {
+        "extraction_id": f"e{i}", "document_id": document_id, "user_id": "u", "collection_ids": [],
+        "score": 1.0 - i * 0.01, "text": f"chunk {i} about things",
+        "metadata": {"version": "v0", "chunk_order": i, "document_type": "txt", "associated_query": "q"},
+    }
+
+COMPLETION = {
+    "id": "c", "created": 1, "model": "m", "object": "chat.completion",
+    "choices": [{"finish_reason": "stop", "index": 0, "message": {"content": "answer", "role": "assistant"}}],
+    "usage": {"completion_tokens": 5, "prompt_tokens": 100, "total_tokens": 105},
+}
+
+class EndpointTestCase(unittest.TestCase):
+    """
+    Drives app.main through TestClient against a mocked R2R upstream
+    """
+    @classmethod
+    def setUpClass(cls):
+        create_tables()
+
+    def setUp(self):
+        self.calls = []
+        self.routes = {
+            "/v2/search": lambda request: httpx.Response(200, json={
+                "results": {"vector_search_results": [chunk(i) for i in range(3)], "kg_search_results": None}
+            }),
+            "/v2/rag": lambda request: httpx.Response(200, json={
+                "results": {"completion": COMPLETION, "search_results": {"vector_search_results": [chunk(0)], "kg_search_results": None}}
+            }),
+            "/v2/documents_overview": lambda request: httpx.Response(200, json={"results": []}),
+            "/v2/health": lambda request: httpx.Response(200, json={"results": {"response": "ok"}}),
+        }
+        for cache in (rag_cache, search_cache, group_cache):
+            cache.clear()
+        http._breakers.clear()
+        patcher = patch.multiple(
+            settings,
+            lexical_snapshot_path=None,
+            documents_index_enabled=False,
+            ingest_dedup_enabled=False,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Installed before startup so the lifespan keeps it instead of dialing out
+        http._client = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+        self.client = TestClient(app)
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(request)
+        route = self.routes.get(request.url.path)
+        if route is None:
+            return httpx.Response(404, json={"detail": "Not found"})
+        return route(request)
+
+    def upstream(self, path):
+        return [request for request in self.calls if request.url.path == path]
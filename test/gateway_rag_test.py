@@ -0,0 +1,56 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from endpoint_case import COMPLETION, EndpointTestCase, chunk
+from app.main import settings
+
+class TestGatewayRag(EndpointTestCase):
+    def setUp(self):
+        super().setUp()
+        self.routes["/v2/search"] = lambda request: httpx.Response(200, json={"results": {
+            "vector_search_results": [{**chunk(i), "text": " ".join(["word"] * 100)} for i in range(3)],
+            "kg_search_results": None,
+        }})
+        self.routes["/v2/completion"] = lambda request: httpx.Response(200, json={"results": COMPLETION})
+
+    def test_context_is_trimmed_to_the_budget(self):
+        response = self.client.post("/rag", json={
+            "query": "what?", "context_token_budget": 150, "rag_generation_config": {"temperature": 0}
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.upstream("/v2/rag"), [])
+
+        payload = json.loads(self.upstream("/v2/completion")[0].content)
+        self.assertEqual(payload["generation_config"], {"temperature": 0})
+        system, user = payload["messages"]
+        self.assertEqual(system, {"role": "system", "content": settings.rag_system_prompt})
+        self.assertIn("what?", user["content"])
+        self.assertIn("[2] word", user["content"])
+        self.assertNotIn("[3]", user["content"])
+
+        body = response.json()
+        report = body["context_budget"]
+        self.assertEqual((report["budget"], report["chunks_retrieved"], report["chunks_used"]), (150, 3, 2))
+        self.assertLessEqual(report["context_tokens"], 150)
+        self.assertEqual(report["tokens_saved"], report["baseline_prompt_tokens"] - report["prompt_tokens"])
+        self.assertGreater(report["tokens_saved"], 0)
+        self.assertEqual(len(body["results"]["search_results"]["vector_search_results"]), 2)
+        self.assertEqual(body["results"]["completion"]["choices"][0]["message"]["content"], "answer")
+
+    def test_failed_completion_is_reported(self):
+        self.routes["/v2/completion"] = lambda request: httpx.Response(400, json={"detail": "Bad request"})
+        response = self.client.post("/rag", json={"query": "q", "context_token_budget": 150})
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("400", response.json()["detail"])
+
+    def test_streaming_rejects_the_configured_budget(self):
+        self.assertEqual(self.client.post("/rag/stream", json={"query": "q", "context_token_budget": 100}).status_code, 400)
+        with patch.object(settings, "rag_context_token_budget", 100):
+            self.assertEqual(self.client.post("/rag/stream", json={"query": "q"}).status_code, 400)
+        self.assertEqual(self.upstream("/v2/rag"), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import unittest
+
+from endpoint_case import EndpointTestCase
+from app.main import group_cache
+
+class TestGroups(EndpointTestCase):
+    def create_group(self, document_ids, name="team"):
+        response = self.client.post("/groups", json={"name": name, "created_by": "u1", "document_ids": document_ids})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["id"]
+
+    def search_filters(self, request):
+        return json.loads(request.content)["vector_search_settings"]["search_filters"]
+
+    def test_crud(self):
+        group_id = self.create_group(["d1", "d2", "d1"])
+        self.assertEqual(self.client.get(f"/groups/{group_id}").json()["document_ids"], ["d1", "d2"])
+        self.assertIn(group_id, [group["id"] for group in self.client.get("/groups", params={"created_by": "u1"}).json()])
+        self.assertEqual(self.client.get("/groups", params={"created_by": "nobody"}).json(), [])
+
+        updated = self.client.patch(f"/groups/{group_id}", json={"name": "renamed", "document_ids": ["d3"]}).json()
+        self.assertEqual((updated["name"], updated["document_ids"]), ("renamed", ["d3"]))
+        added = self.client.post(f"/groups/{group_id}/documents", json={"document_ids": ["d3", "d4"]}).json()
+        self.assertEqual(sorted(added["document_ids"]), ["d3", "d4"])
+        removed = self.client.delete(f"/groups/{group_id}/documents/d3").json()
+        self.assertEqual(removed["document_ids"], ["d4"])
+
+        self.assertTrue(self.client.delete(f"/groups/{group_id}").json()["success"])
+        self.assertEqual(self.client.get(f"/groups/{group_id}").status_code, 404)
+        self.assertIsNone(group_cache.get(group_id))
+
+    def test_search_is_scoped_to_group(self):
+        group_id = self.create_group(["d1", "d2"])
+        response = self.client.post("/search", json={
+            "query": "q",
+            "group_id": group_id,
+            "vector_search_settings": {"search_filters": {"document_type": {"$eq": "txt"}}},
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search_filters(self.upstream("/v2/search")[0]), {
+            "$and": [{"document_type": {"$eq": "txt"}}, {"document_id": {"$in": ["d1", "d2"]}}]
+        })
+        self.assertEqual(self.client.post("/search", json={"query": "q", "group_id": "missing"}).status_code, 404)
+
+    def test_membership_change_rescopes_cached_searches(self):
+        group_id = self.create_group(["d1"])
+        self.client.post("/search", json={"query": "q", "group_id": group_id})
+        self.client.post(f"/groups/{group_id}/documents", json={"document_ids": ["d2"]})
+        self.client.post("/search", json={"query": "q", "group_id": group_id})
+        searches = self.upstream("/v2/search")
+        self.assertEqual(len(searches), 2)
+        self.assertEqual(self.search_filters(searches[1]), {"document_id": {"$in": ["d1", "d2"]}})
+
+    def test_rag_is_scoped_to_group(self):
+        group_id = self.create_group(["d1"])
+        response = self.client.post("/rag", json={"query": "q", "group_id": group_id})
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(self.upstream("/v2/rag")[0].content)
+        self.assertNotIn("group_id", body)
+        self.assertEqual(self.search_filters(self.upstream("/v2/rag")[0]), {"document_id": {"$in": ["d1"]}})
+
+if __name__ == "__main__":
+    unittest.main()
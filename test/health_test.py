@@ -0,0 +1,48 @@
+import asyncio
+import unittest
+
+from app.utils.health import HealthProber
+
+class TestHealthProber(unittest.TestCase):
+    def test_starting_before_first_probe(self):
+        async def probe():
+            pass
+
+        snapshot = HealthProber(probe).snapshot()
+        self.assertEqual(snapshot["status"], "starting")
+        self.assertTrue(snapshot["live"])
+        self.assertFalse(snapshot["ready"])
+
+    def test_records_success_and_failure(self):
+        outcomes = [None, RuntimeError("upstream down")]
+
+        async def probe():
+            outcome = outcomes.pop(0)
+            if outcome is not None:
+                raise outcome
+
+        prober = HealthProber(probe)
+        asyncio.run(prober.probe_once())
+        snapshot = prober.snapshot()
+        self.assertEqual(snapshot["status"], "healthy")
+        self.assertTrue(snapshot["ready"])
+        self.assertIsNotNone(snapshot["last_rtt_ms"])
+
+        asyncio.run(prober.probe_once())
+        snapshot = prober.snapshot()
+        self.assertEqual(snapshot["status"], "unhealthy")
+        self.assertEqual(snapshot["rag_server"], "disconnected")
+        self.assertEqual(snapshot["error"], "upstream down")
+        self.assertEqual(snapshot["consecutive_failures"], 1)
+
+    def test_stale_success_is_not_ready(self):
+        async def probe():
+            pass
+
+        prober = HealthProber(probe, interval=1, stale_after=0)
+        asyncio.run(prober.probe_once())
+        prober.last_success -= 1
+        self.assertFalse(prober.ready)
+
+if __name__ == '__main__':
+    unittest.main()
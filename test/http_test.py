@@ -0,0 +1,96 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+import app.utils.http as http
+from app.config import get_settings
+from app.utils.http import CircuitBreaker, make_request
+
+class TestMakeRequest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.responses = []
+        http._breakers.clear()
+        http._retries.clear()
+        settings = get_settings()
+        self.patches = [
+            patch.object(settings, "retry_backoff_base", 0.0),
+            patch.object(settings, "breaker_failure_threshold", 2),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        http._client = None
+
+    def run_request(self, method, endpoint, **kwargs):
+        def handler(request):
+            self.calls.append(request.url.path)
+            return self.responses.pop(0)
+
+        async def run():
+            http._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                return await make_request("http://rag", method, endpoint, **kwargs)
+            finally:
+                await http._client.aclose()
+
+        return asyncio.run(run())
+
+    def test_retries_idempotent_calls(self):
+        self.responses = [httpx.Response(503), httpx.Response(200, json={"results": []})]
+        result = self.run_request("POST", "/v2/search", timeout=5)
+        self.assertEqual(result, {"results": []})
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(http.resilience_stats()["retries"], {"/v2/search": 1})
+
+    def test_does_not_retry_non_idempotent_calls(self):
+        self.responses = [httpx.Response(503), httpx.Response(200, json={})]
+        result = self.run_request("POST", "/v2/rag", timeout=5)
+        self.assertFalse(result["success"])
+        self.assertEqual(result["status_code"], 503)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_breaker_opens_and_fails_fast(self):
+        self.responses = [httpx.Response(500), httpx.Response(500)]
+        self.run_request("POST", "/v2/rag")
+        self.run_request("POST", "/v2/rag")
+        result = self.run_request("POST", "/v2/rag")
+        self.assertEqual(result["status_code"], 503)
+        self.assertIn("circuit open", result["message"])
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(http.resilience_stats()["breakers"]["/v2/rag"]["state"], "open")
+
+    def test_client_errors_do_not_trip_breaker(self):
+        self.responses = [httpx.Response(404), httpx.Response(404), httpx.Response(404)]
+        for _ in range(3):
+            result = self.run_request("DELETE", "/v2/delete")
+            self.assertEqual(result["status_code"], 404)
+        self.assertEqual(http.get_breaker("/v2/delete").state, "closed")
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_half_open_allows_single_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, "half_open")
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.times_opened, 2)
+
+if __name__ == '__main__':
+    unittest.main()
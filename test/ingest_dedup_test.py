@@ -0,0 +1,138 @@
+import itertools
+import unittest
+from unittest.mock import patch
+
+import httpx
+from sqlalchemy import delete
+
+from endpoint_case import EndpointTestCase
+from app.db.database import AsyncSessionLocal
+from app.db.models.document_hash import DocumentHash
+from app.main import identity_cache, pending_replacements, settings, settle_replacements
+
+async def forget_all_hashes():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(DocumentHash))
+        await db.commit()
+
+class TestIngestDedup(EndpointTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(settings, "ingest_dedup_enabled", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        pending_replacements.clear()
+        self.addCleanup(pending_replacements.clear)
+        self.client.portal.call(forget_all_hashes)
+        self.document_ids = (f"doc-{self._testMethodName}-{i}" for i in itertools.count())
+        # ingestion_status per document ID; unknown IDs are gone upstream
+        self.statuses = {}
+        self.routes["/v2/ingest_files"] = self.ingest
+        self.routes["/v2/documents_overview"] = self.overview
+        self.routes["/v2/delete"] = lambda request: httpx.Response(200, json={"results": {}})
+        self.routes["/v2/user"] = lambda request: httpx.Response(200, json={
+            "results": {"id": request.headers["Authorization"][len("Bearer token-"):]}
+        })
+        identity_cache.clear()
+
+    def ingest(self, request):
+        results = []
+        for _ in range(request.read().count(b'name="files"')):
+            document_id = next(self.document_ids)
+            self.statuses[document_id] = "pending"
+            results.append({"message": "queued", "document_id": document_id})
+        return httpx.Response(200, json={"results": results})
+
+    def overview(self, request):
+        document_ids = request.url.params.get_list("document_ids")
+        return httpx.Response(200, json={"results": [
+            {"id": document_id, "ingestion_status": self.statuses[document_id]}
+            for document_id in document_ids if document_id in self.statuses
+        ]})
+
+    def upload(self, content, filename="report.txt", user_id=None, **params):
+        headers = {"Authorization": f"Bearer token-{user_id}"} if user_id else {}
+        response = self.client.post(
+            "/documents/ingest", files=[("files", (filename, content, "text/plain"))], params=params, headers=headers
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()[0]
+
+    def settle(self):
+        return self.client.portal.call(settle_replacements)
+
+    def deleted(self):
+        return [request.url.params["filters"] for request in self.upstream("/v2/delete")]
+
+    def test_unchanged_content_is_skipped(self):
+        first = self.upload(b"v1", user_id="u1")
+        second = self.upload(b"v1", user_id="u1")
+        self.assertTrue(second["deduplicated"])
+        self.assertEqual(second["results"][0]["document_id"], first["results"][0]["document_id"])
+        self.assertEqual(len(self.upstream("/v2/ingest_files")), 1)
+
+    def test_failed_ingestion_is_not_skipped(self):
+        first = self.upload(b"v1", user_id="u1")
+        self.statuses[first["results"][0]["document_id"]] = "failed"
+        self.assertFalse(self.upload(b"v1", user_id="u1")["deduplicated"])
+
+    def test_force_reingests(self):
+        first = self.upload(b"v1", user_id="u1")
+        second = self.upload(b"v1", user_id="u1", force="true")
+        self.assertFalse(second["deduplicated"])
+        self.assertEqual(len(self.upstream("/v2/ingest_files")), 2)
+        self.assertEqual(second["replaced_document_id"], first["results"][0]["document_id"])
+
+    def test_replacement_waits_for_successful_ingestion(self):
+        old_id = self.upload(b"v1", user_id="u1")["results"][0]["document_id"]
+        result = self.upload(b"v2", user_id="u1")
+        new_id = result["results"][0]["document_id"]
+        self.assertEqual(result["replaced_document_id"], old_id)
+        self.assertEqual(self.deleted(), [])
+
+        self.assertEqual(self.settle(), 0)
+        self.assertEqual(self.deleted(), [])
+        self.statuses[new_id] = "success"
+        self.assertEqual(self.settle(), 1)
+        self.assertEqual(len(self.deleted()), 1)
+        self.assertIn(old_id, self.deleted()[0])
+        self.assertEqual(pending_replacements, {})
+
+    def test_failed_replacement_keeps_the_old_version(self):
+        old_id = self.upload(b"v1", user_id="u1")["results"][0]["document_id"]
+        new_id = self.upload(b"v2", user_id="u1")["results"][0]["document_id"]
+        self.statuses[new_id] = "failed"
+        self.assertEqual(self.settle(), 0)
+        self.assertEqual(self.deleted(), [])
+        # The old hash is back, so uploading v2 again replaces v1 again
+        self.assertEqual(self.upload(b"v2", user_id="u1")["replaced_document_id"], old_id)
+
+    def test_anonymous_uploads_never_replace_each_other(self):
+        self.upload(b"first caller's report")
+        result = self.upload(b"second caller's report")
+        self.assertIsNone(result["replaced_document_id"])
+        self.statuses = dict.fromkeys(self.statuses, "success")
+        self.assertEqual(self.settle(), 0)
+        self.assertEqual(self.deleted(), [])
+
+    def test_anonymous_caller_can_name_the_document_to_replace(self):
+        old_id = self.upload(b"v1")["results"][0]["document_id"]
+        self.assertEqual(self.upload(b"v2", replace=[old_id])["replaced_document_id"], old_id)
+
+    def test_unverified_user_id_replaces_nothing(self):
+        headers = {"X-User-Id": "u1"}
+        for content in (b"v1", b"v2"):
+            response = self.client.post("/documents/ingest", files=[("files", ("report.txt", content, "text/plain"))], headers=headers)
+        self.assertIsNone(response.json()[0]["replaced_document_id"])
+
+    def test_different_users_keep_separate_documents(self):
+        self.upload(b"v1", user_id="u1")
+        result = self.upload(b"v2", user_id="u2")
+        self.assertIsNone(result["replaced_document_id"])
+
+    def test_paths_keep_same_named_files_apart(self):
+        self.upload(b"a", filename="a/README.md", user_id="u1")
+        self.assertIsNone(self.upload(b"b", filename="b/README.md", user_id="u1")["replaced_document_id"])
+
+if __name__ == "__main__":
+    unittest.main()
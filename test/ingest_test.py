@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from endpoint_case import EndpointTestCase
+from app.main import settings
+
+class TestIngest(EndpointTestCase):
+    def setUp(self):
+        super().setUp()
+        self.routes["/v2/ingest_files"] = self.ingest
+
+    def ingest(self, request):
+        body = request.read()
+        # Upstream rejects the whole request when any file in it is bad
+        if b'filename="bad.txt"' in body:
+            return httpx.Response(422, json={"detail": "Unsupported file"})
+        names = [part.split(b'"')[0].decode() for part in body.split(b'filename="')[1:]]
+        return httpx.Response(200, json={"results": [{"message": "ok", "document_id": f"doc-{name}"} for name in names]})
+
+    def upload(self, *names):
+        files = [("files", (name, f"content of {name}".encode(), "text/plain")) for name in names]
+        response = self.client.post("/documents/ingest", files=files)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_files_are_batched_in_order(self):
+        with patch.object(settings, "ingest_batch_max_files", 2):
+            results = self.upload("a.txt", "b.txt", "c.txt")
+        self.assertEqual(len(self.upstream("/v2/ingest_files")), 2)
+        self.assertEqual([result["filename"] for result in results], ["a.txt", "b.txt", "c.txt"])
+        self.assertEqual([result["results"][0]["document_id"] for result in results], ["doc-a.txt", "doc-b.txt", "doc-c.txt"])
+
+    def test_rejected_batch_falls_back_per_file(self):
+        results = self.upload("a.txt", "bad.txt", "c.txt")
+        # One batch, then one request per file
+        self.assertEqual(len(self.upstream("/v2/ingest_files")), 4)
+        self.assertEqual([result["success"] for result in results], [True, False, True])
+        self.assertEqual(results[1]["status_code"], 422)
+        self.assertEqual(results[2]["results"][0]["document_id"], "doc-c.txt")
+
+    def test_upstream_error_fails_the_whole_batch(self):
+        self.routes["/v2/ingest_files"] = lambda request: httpx.Response(500, json={"detail": "boom"})
+        results = self.upload("a.txt", "b.txt")
+        # Upstream may have ingested the batch, so nothing is resent
+        self.assertEqual(len(self.upstream("/v2/ingest_files")), 1)
+        self.assertEqual([(result["success"], result["status_code"]) for result in results], [(False, 500), (False, 500)])
+
+    def test_transport_error_fails_the_whole_batch(self):
+        def unreachable(request):
+            raise httpx.ReadTimeout("timed out", request=request)
+        self.routes["/v2/ingest_files"] = unreachable
+        results = self.upload("a.txt", "b.txt")
+        self.assertEqual(len(self.upstream("/v2/ingest_files")), 1)
+        self.assertEqual([result["status_code"] for result in results], [504, 504])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from app.utils.lexical import LexicalIndex, matches_filters, split_text, supports_filters, tokenize
+
+def chunk(chunk_id, document_id, text, **metadata):
+    return {"extraction_id": chunk_id, "document_id": document_id, "text": text, "metadata": metadata}
+
+class TestLexicalIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = LexicalIndex()
+        self.index.add_many([
+            chunk("c1", "d1", "The gateway caches search results", document_type="txt"),
+            chunk("c2", "d1", "Rate limiting uses token buckets per tier", document_type="txt"),
+            chunk("c3", "d2", "Search search search falls back to a lexical index", document_type="pdf"),
+        ])
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Hello, World! 42"), ["hello", "world", "42"])
+
+    def test_bm25_ranks_matching_chunks(self):
+        results = self.index.search("search")
+        self.assertEqual([r["extraction_id"] for r in results], ["c3", "c1"])
+        self.assertGreater(results[0]["score"], results[1]["score"])
+        self.assertEqual(self.index.search("nothing matches"), [])
+
+    def test_limit_offset_and_filters(self):
+        self.assertEqual([r["extraction_id"] for r in self.index.search("search", limit=1, offset=1)], ["c1"])
+        results = self.index.search("search", filters={"document_type": {"$eq": "txt"}})
+        self.assertEqual([r["extraction_id"] for r in results], ["c1"])
+        results = self.index.search("search", filters={"document_id": {"$in": ["d2"]}})
+        self.assertEqual([r["extraction_id"] for r in results], ["c3"])
+
+    def test_matches_filters_logic(self):
+        item = chunk("c", "d", "x", document_type="txt")
+        self.assertTrue(matches_filters(item, {"$or": [{"document_id": "e"}, {"document_type": "txt"}]}))
+        self.assertFalse(matches_filters(item, {"$and": [{"document_id": "d"}, {"document_type": {"$nin": ["txt"]}}]}))
+        # Operators the index cannot evaluate never match
+        self.assertFalse(matches_filters(item, {"chunk_order": {"$gt": 0}}))
+        self.assertFalse(matches_filters(item, {"document_type": {"$eq": "txt", "$like": "t%"}}))
+
+    def test_supports_filters(self):
+        self.assertTrue(supports_filters(None))
+        self.assertTrue(supports_filters({"$or": [{"document_id": "d"}, {"document_type": {"$in": ["txt"]}}]}))
+        self.assertFalse(supports_filters({"$and": [{"document_id": "d"}, {"chunk_order": {"$gt": 0}}]}))
+        self.assertFalse(supports_filters({"$not": {"document_id": "d"}}))
+
+    def test_eviction_drops_least_recently_seen(self):
+        index = LexicalIndex(max_chunks=2)
+        index.add(chunk("a", "d", "alpha"))
+        index.add(chunk("b", "d", "beta"))
+        index.add(chunk("a", "d", "alpha"))
+        index.add(chunk("c", "d", "gamma"))
+        self.assertEqual({c["extraction_id"] for c in index.chunks()}, {"a", "c"})
+        self.assertEqual(index.evictions, 1)
+        self.assertEqual(index.search("beta"), [])
+
+    def test_remove_and_prune(self):
+        self.index.remove_documents(["d2"])
+        self.assertEqual([r["extraction_id"] for r in self.index.search("search")], ["c1"])
+        self.assertEqual(self.index.prune(lambda document_id: False), 2)
+        self.assertEqual(len(self.index), 0)
+
+    def test_upstream_chunks_supersede_local(self):
+        self.index.add({**chunk("d3:0", "d3", "local text about search"), "local": True})
+        self.index.add(chunk("u1", "d3", "upstream chunk"))
+        self.assertEqual([c["extraction_id"] for c in self.index.chunks() if c["document_id"] == "d3"], ["u1"])
+
+    def test_snapshot_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.json.gz")
+            self.index.save(path)
+            restored = LexicalIndex()
+            self.assertEqual(restored.load(path), 3)
+        self.assertEqual(restored.search("search"), self.index.search("search"))
+
+    def test_split_text(self):
+        self.assertEqual(split_text("one two three four", 9), ["one two", "three", "four"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import logging
+import unittest
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.utils.log import JsonFormatter, RequestIdFilter, log_payload, payload_sampled_var, request_id_var
+
+class Payload(BaseModel):
+    query: str
+    limit: Optional[int] = None
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+class TestJsonLogging(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("log_test")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.handler = ListHandler()
+        self.handler.addFilter(RequestIdFilter())
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def test_records_carry_request_id_and_extra_fields(self):
+        token = request_id_var.set("req-1")
+        try:
+            self.logger.info("hello %s", "world", extra={"payload": Payload(query="q")})
+        finally:
+            request_id_var.reset(token)
+
+        entry = json.loads(JsonFormatter().format(self.handler.records[0]))
+        self.assertEqual(entry["message"], "hello world")
+        self.assertEqual(entry["request_id"], "req-1")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["payload"], {"query": "q"})
+
+    def test_payloads_are_only_logged_for_sampled_requests(self):
+        log_payload(self.logger, "skipped", {"a": 1})
+        token = payload_sampled_var.set(True)
+        try:
+            log_payload(self.logger, "kept", {"a": 1})
+        finally:
+            payload_sampled_var.reset(token)
+        self.assertEqual([record.getMessage() for record in self.handler.records], ["kept"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from app.utils.metrics import CallbackGauge, Counter, Histogram, Registry, record_usage, llm_tokens
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_renders_labels(self):
+        registry = Registry()
+        counter = registry.register(Counter("requests_total", "Requests", ("route",)))
+        counter.inc(route="/rag")
+        counter.inc(2, route="/rag")
+        self.assertIn('requests_total{route="/rag"} 3', registry.render())
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        histogram = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(5)
+        text = registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("latency_seconds_count 3", text)
+
+    def test_callback_gauge_skips_missing_values(self):
+        registry = Registry()
+        registry.register(CallbackGauge("rtt_seconds", "RTT", lambda: [({}, None)]))
+        samples = [line for line in registry.render().splitlines() if not line.startswith("#")]
+        self.assertEqual(samples, [])
+
+    def test_record_usage(self):
+        before = dict(llm_tokens._values)
+        record_usage({"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12})
+        self.assertEqual(llm_tokens._values[("prompt",)] - before.get(("prompt",), 0), 10)
+        self.assertEqual(llm_tokens._values[("total",)] - before.get(("total",), 0), 12)
+
+if __name__ == '__main__':
+    unittest.main()
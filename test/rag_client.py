@@ -9,6 +9,7 @@ class RAGClient:
     def __init__(self, base_url: str = "http://localhost:8000"):
         """Initialize the RAG client with a base URL"""
         self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
 
     def ingest_file(self, file_path: str) -> Dict[str, Any]:
         """
@@ -23,10 +24,11 @@ class RAGClient:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
             
-        files = {
-        'files': (Path(file_path).name, open(file_path, 'rb'), 'text/plain')
-        }
-        response = requests.post(f"{self.base_url}/documents/ingest", files=files)
+        with open(file_path, 'rb') as f:
+            files = {
+            'files': (Path(file_path).name, f, 'text/plain')
+            }
+            response = self.session.post(f"{self.base_url}/documents/ingest", files=files)
         return response.json()
 
     def list_documents(self) -> Dict[str, Any]:
@@ -36,7 +38,7 @@ class RAGClient:
         Returns:
             Dict containing the list of documents
         """
-        response = requests.get(f"{self.base_url}/documents")
+        response = self.session.get(f"{self.base_url}/documents")
         response.raise_for_status()
         return response.json()
 
@@ -50,7 +52,7 @@ class RAGClient:
         Returns:
             Dict containing the deletion response
         """
-        response = requests.delete(f"{self.base_url}/documents/{document_id}")
+        response = self.session.delete(f"{self.base_url}/documents/{document_id}")
         return response.json()
 
     def check_health(self) -> Dict[str, Any]:
@@ -60,7 +62,7 @@ class RAGClient:
         Returns:
             Dict containing health status information
         """
-        response = requests.get(f"{self.base_url}/health")
+        response = self.session.get(f"{self.base_url}/health")
         response.raise_for_status()
         return response.json()
 
@@ -76,7 +78,7 @@ class RAGClient:
             Dict containing search results
         """
         payload = {"query": query, **kwargs}
-        response = requests.post(f"{self.base_url}/search", json=payload)
+        response = self.session.post(f"{self.base_url}/search", json=payload)
         response.raise_for_status()
         return response.json()
 
@@ -91,6 +93,6 @@ class RAGClient:
             Dict containing RAG response
         """
         payload = {"query": query}
-        response = requests.post(f"{self.base_url}/rag", data=json.dumps(payload), headers={"Content-Type": "application/json"})
+        response = self.session.post(f"{self.base_url}/rag", data=json.dumps(payload), headers={"Content-Type": "application/json"})
         response.raise_for_status()
         return response.json()
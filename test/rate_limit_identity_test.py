@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import patch
+
+import httpx
+from sqlalchemy import update
+
+from endpoint_case import EndpointTestCase
+import app.main as main
+from app.db.database import AsyncSessionLocal
+from app.db.models.user import User
+from app.utils.ratelimit import RateLimiter
+
+LIMITS = {
+    "anonymous": {"default": {"rps": 0, "burst": 2, "concurrency": 4}},
+    "free": {"default": {"rps": 0, "burst": 3, "concurrency": 4}},
+    "enterprise": {"default": {"rps": 0, "burst": 5, "concurrency": 4}},
+}
+
+async def set_tier(user_id, tier):
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(User).where(User.id == user_id).values(subscription_tier=tier))
+        await db.commit()
+
+class TestCallerIdentity(EndpointTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(main.settings, "rate_limit_enabled", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        limiter = patch.object(main, "rate_limiter", RateLimiter(LIMITS, default_tier="free"))
+        limiter.start()
+        self.addCleanup(limiter.stop)
+        for cache in (main.tier_cache, main.identity_cache):
+            cache.clear()
+        # Token "token-<user ID>" belongs to that user; anything else is rejected
+        self.routes["/v2/user"] = lambda request: (
+            httpx.Response(200, json={"results": {"id": request.headers["Authorization"][len("Bearer token-"):]}})
+            if request.headers.get("Authorization", "").startswith("Bearer token-")
+            else httpx.Response(401, json={"detail": "Invalid token"})
+        )
+        self.client.post("/signup", json={"email": "big@example.com", "r2r_user_id": "big-customer"})
+        self.client.portal.call(set_tier, "big-customer", "enterprise")
+
+    def statuses(self, headers, attempts):
+        return [self.client.post("/search", json={"query": "q"}, headers=headers).status_code for _ in range(attempts)]
+
+    def test_x_user_id_grants_nothing(self):
+        statuses = self.statuses({"X-User-Id": "big-customer"}, 3)
+        self.assertEqual(statuses.count(429), 1)
+
+    def test_verified_token_gets_its_users_tier(self):
+        statuses = self.statuses({"Authorization": "Bearer token-big-customer"}, 6)
+        self.assertEqual(statuses.count(429), 1)
+        # Checked once upstream, then cached
+        self.assertEqual(len(self.upstream("/v2/user")), 1)
+
+    def test_unregistered_users_get_the_default_tier(self):
+        statuses = self.statuses({"Authorization": "Bearer token-someone"}, 4)
+        self.assertEqual(statuses.count(429), 1)
+
+    def test_invalid_token_is_anonymous(self):
+        statuses = self.statuses({"Authorization": "Bearer forged"}, 3)
+        self.assertEqual(statuses.count(429), 1)
+        # The rejection is cached too
+        self.assertEqual(len(self.upstream("/v2/user")), 1)
+
+if __name__ == "__main__":
+    unittest.main()
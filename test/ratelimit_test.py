@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+
+from app.utils.ratelimit import RateLimiter, RateLimitExceeded, TokenBucket
+
+LIMITS = {
+    "free": {
+        "rag": {"rps": 1, "burst": 2, "concurrency": 1},
+        "default": {"rps": 10, "burst": 10},
+    },
+    "pro": {
+        "rag": {"rps": 10, "burst": 20, "concurrency": 4},
+    },
+}
+
+class TestTokenBucket(unittest.TestCase):
+    @patch("app.utils.ratelimit.time.monotonic")
+    def test_refill_and_wait(self, monotonic):
+        monotonic.return_value = 0.0
+        bucket = TokenBucket(rate=2, burst=2)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertAlmostEqual(bucket.try_acquire(), 0.5)
+        monotonic.return_value = 0.5
+        self.assertEqual(bucket.try_acquire(), 0.0)
+
+class TestRateLimiter(unittest.TestCase):
+    def test_rate_limit_raises_with_retry_after(self):
+        limiter = RateLimiter(LIMITS)
+        for _ in range(2):
+            limiter.charge("u", "free", "rag")
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            limiter.charge("u", "free", "rag")
+        self.assertEqual(ctx.exception.reason, "rate")
+        self.assertEqual(ctx.exception.retry_after_header, "1")
+        # Other users and route classes have their own buckets
+        limiter.charge("v", "free", "rag")
+        limiter.charge("u", "free", "search")
+
+    def test_concurrency_slot_is_released(self):
+        limiter = RateLimiter(LIMITS)
+        limiter.acquire("u", "free", "rag")
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            limiter.acquire("u", "free", "rag")
+        self.assertEqual(ctx.exception.reason, "concurrency")
+        limiter.release("u", "rag")
+        limiter.acquire("u", "free", "rag")
+        self.assertEqual(limiter.stats()["in_flight"], 1)
+
+    def test_unknown_tier_uses_default_tier(self):
+        limiter = RateLimiter(LIMITS, default_tier="free")
+        self.assertEqual(limiter.limits_for("gold", "rag"), LIMITS["free"]["rag"])
+        self.assertEqual(limiter.limits_for("pro", "search"), {})
+
+    def test_batch_cost_is_charged_in_full(self):
+        limiter = RateLimiter(LIMITS)
+        self.assertEqual(limiter.max_cost("free", "rag"), 2)
+        self.assertIsNone(limiter.max_cost("pro", "search"))
+        with self.assertRaises(RateLimitExceeded):
+            limiter.charge("u", "free", "rag", cost=3)
+        limiter.charge("u", "free", "rag", cost=2)
+        with self.assertRaises(RateLimitExceeded):
+            limiter.charge("u", "free", "rag")
+
+    def test_admission_releases_once(self):
+        limiter = RateLimiter(LIMITS)
+        admission = limiter.acquire("u", "free", "rag")
+        release = admission.detach()
+        self.assertTrue(admission.detached)
+        release()
+        release()
+        self.assertEqual(limiter.stats()["in_flight"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import json
+import unittest
+
+from app.utils.responses import FastJSONResponse, check_rag_shape, check_search_shape, json_loads
+
+class TestFastJSONResponse(unittest.TestCase):
+    def test_render_round_trips(self):
+        content = {"results": {"vector_search_results": [{"text": "héllo", "score": 0.5}]}}
+        response = FastJSONResponse(content, headers={"X-Cache": "MISS"})
+        self.assertEqual(json.loads(response.body), content)
+        self.assertEqual(json_loads(response.body), content)
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertEqual(response.media_type, "application/json")
+
+class TestShapeChecks(unittest.TestCase):
+    def test_search_shape(self):
+        check_search_shape({"results": {"vector_search_results": [], "kg_search_results": None}})
+        for payload in ({}, {"results": []}, {"results": {"vector_search_results": None}}, "text"):
+            with self.assertRaises(ValueError):
+                check_search_shape(payload)
+
+    def test_rag_shape(self):
+        check_rag_shape({"results": {"completion": {}, "search_results": {}}})
+        for payload in ({}, {"results": {"completion": {}}}, {"results": {"completion": [], "search_results": {}}}):
+            with self.assertRaises(ValueError):
+                check_rag_shape(payload)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from endpoint_case import EndpointTestCase
+from app.main import settings
+
+class TestSearchBatch(EndpointTestCase):
+    def setUp(self):
+        super().setUp()
+        search = self.routes["/v2/search"]
+        self.routes["/v2/search"] = lambda request: (
+            httpx.Response(400, json={"detail": "Bad query"}) if json.loads(request.content)["query"] == "bad" else search(request)
+        )
+
+    def test_results_keep_request_order(self):
+        response = self.client.post("/search/batch", json={"requests": [{"query": "one"}, {"query": "bad"}, {"query": "two"}]})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([result["index"] for result in results], [0, 1, 2])
+        self.assertEqual([result["success"] for result in results], [True, False, True])
+        self.assertEqual(results[1]["status_code"], 400)
+        self.assertEqual(len(results[0]["results"]["vector_search_results"]), 3)
+
+    def test_batch_size_is_bounded(self):
+        with patch.object(settings, "search_batch_max_queries", 2):
+            response = self.client.post("/search/batch", json={"requests": [{"query": str(i)} for i in range(3)]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.upstream("/v2/search"), [])
+
+if __name__ == "__main__":
+    unittest.main()
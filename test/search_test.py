@@ -0,0 +1,105 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from endpoint_case import EndpointTestCase, chunk
+import app.main as main
+import app.utils.http as http
+from app.utils.lexical import LexicalIndex
+
+class TestDedupSearch(EndpointTestCase):
+    def setUp(self):
+        super().setUp()
+        self.routes["/v2/search"] = self.search
+
+    def search(self, request):
+        limit = json.loads(request.content)["vector_search_settings"]["search_limit"]
+        # Every chunk is distinct, so nothing collapses
+        results = [{**chunk(i), "text": f"chunk {i} " + " ".join(f"w{i}-{j}" for j in range(8))} for i in range(limit)]
+        return httpx.Response(200, json={"results": {"vector_search_results": results, "kg_search_results": None}})
+
+    def dedup_search(self, offset, limit):
+        response = self.client.post("/search", json={
+            "query": "q", "dedup": True, "vector_search_settings": {"offset": offset, "search_limit": limit}
+        })
+        self.assertEqual(response.status_code, 200)
+        sent = json.loads(self.upstream("/v2/search")[-1].content)["vector_search_settings"]
+        return sent["search_limit"], response.json()["results"]["vector_search_results"]
+
+    def test_over_fetch_is_capped(self):
+        fetched, results = self.dedup_search(0, 10)
+        self.assertEqual((fetched, len(results)), (30, 10))
+        fetched, results = self.dedup_search(0, 20)
+        self.assertEqual((fetched, len(results)), (50, 20))
+
+    def test_pages_beyond_the_cap_are_filled(self):
+        fetched, results = self.dedup_search(0, 60)
+        self.assertEqual((fetched, len(results)), (60, 60))
+        fetched, results = self.dedup_search(45, 10)
+        self.assertEqual((fetched, len(results)), (55, 10))
+        self.assertEqual(results[0]["extraction_id"], "e45")
+
+class TestLexicalFallback(EndpointTestCase):
+    def setUp(self):
+        super().setUp()
+        index = LexicalIndex()
+        index.add_many([chunk(i, "local") for i in range(2)])
+        patcher = patch.object(main, "lexical_index", index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(main.settings, "lexical_fallback_deadline", 0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def slow_search(self, request):
+        await asyncio.sleep(0.3)
+        return httpx.Response(200, json={"results": {"vector_search_results": [chunk(9)], "kg_search_results": None}})
+
+    def search(self, **request):
+        response = self.client.post("/search", json={"query": "things", **request})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assert_lexical(self, response):
+        self.assertEqual(response.headers.get("X-Search-Mode"), "lexical")
+        self.assertTrue(response.json()["lexical_only"])
+        self.assertEqual({r["document_id"] for r in response.json()["results"]["vector_search_results"]}, {"local"})
+
+    def test_slow_upstream_answers_from_the_index(self):
+        self.routes["/v2/search"] = self.slow_search
+        self.assert_lexical(self.search())
+
+    def test_unavailable_upstream_answers_from_the_index(self):
+        self.routes["/v2/search"] = lambda request: httpx.Response(503, json={"detail": "Unavailable"})
+        self.assert_lexical(self.search())
+
+    def test_open_breaker_answers_from_the_index(self):
+        breaker = http.get_breaker("/v2/search")
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        self.assert_lexical(self.search())
+        self.assertEqual(self.upstream("/v2/search"), [])
+
+    def test_kg_search_waits_for_upstream(self):
+        self.routes["/v2/search"] = self.slow_search
+        response = self.search(kg_search_settings={"use_kg_search": True})
+        self.assertNotIn("X-Search-Mode", response.headers)
+        self.assertEqual(response.json()["results"]["vector_search_results"][0]["extraction_id"], "e9")
+
+    def test_kg_search_failure_is_not_masked(self):
+        self.routes["/v2/search"] = lambda request: httpx.Response(503, json={"detail": "Unavailable"})
+        response = self.client.post("/search", json={"query": "things", "kg_search_settings": {"use_kg_search": True}})
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("503", response.json()["detail"])
+
+    def test_unsupported_filters_wait_for_upstream(self):
+        self.routes["/v2/search"] = self.slow_search
+        response = self.search(vector_search_settings={"search_filters": {"chunk_order": {"$gt": 0}}})
+        self.assertNotIn("X-Search-Mode", response.headers)
+        self.assertEqual(response.json()["results"]["vector_search_results"][0]["extraction_id"], "e9")
+
+if __name__ == "__main__":
+    unittest.main()
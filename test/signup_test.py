@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import patch
+
+from endpoint_case import EndpointTestCase
+from app.main import settings
+
+class TestSignup(EndpointTestCase):
+    def test_signup_rejects_existing_users(self):
+        response = self.client.post("/signup", json={"email": "one@example.com", "r2r_user_id": "signup-1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["subscription_tier"], settings.rate_limit_default_tier)
+        response = self.client.post("/signup", json={"email": "one@example.com", "r2r_user_id": "signup-2"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_signup_reports_each_row(self):
+        self.client.post("/signup", json={"email": "taken@example.com", "r2r_user_id": "bulk-0"})
+        with patch.object(settings, "signup_bulk_batch_size", 2):
+            response = self.client.post("/signup/bulk", json={"users": [
+                {"email": "a@example.com", "r2r_user_id": "bulk-1"},
+                {"email": "taken@example.com", "r2r_user_id": "bulk-2"},
+                {"r2r_user_id": "bulk-3"},
+                {"email": "b@example.com", "r2r_user_id": "bulk-1"},
+                {"email": "c@example.com", "r2r_user_id": "bulk-4"},
+            ]})
+        body = response.json()
+        self.assertEqual((body["created"], body["existing"], body["invalid"]), (2, 1, 2))
+        self.assertEqual(
+            [result["status"] for result in body["results"]],
+            ["created", "existing", "invalid", "invalid", "created"]
+        )
+
+    def test_bulk_signup_is_bounded(self):
+        with patch.object(settings, "signup_bulk_max_users", 1):
+            response = self.client.post("/signup/bulk", json={"users": [{}, {}]})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+
+from app.utils.singleflight import SingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_result(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"answer": 42}
+
+        async def run():
+            return await asyncio.gather(*(flights.do("k", fetch) for _ in range(5)))
+
+        results = asyncio.run(run())
+        self.assertEqual(results, [{"answer": 42}] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.stats()["upstream_calls_saved"], 4)
+        self.assertEqual(flights.stats()["in_flight"], 0)
+
+    def test_waiters_share_the_same_error(self):
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        async def run():
+            return await asyncio.gather(*(flights.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        flights = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def run():
+            first = asyncio.ensure_future(flights.do("k", fetch))
+            second = asyncio.ensure_future(flights.do("k", fetch))
+            await asyncio.sleep(0.005)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), "done")
+
+if __name__ == '__main__':
+    unittest.main()
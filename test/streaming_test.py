@@ -0,0 +1,31 @@
+import unittest
+
+from app.utils.streaming import RagStreamParser, format_sse
+
+class TestRagStreamParser(unittest.TestCase):
+    def test_parses_search_and_completion(self):
+        parser = RagStreamParser()
+        events = parser.feed('<search>[{"text": "a"}]</search><completion>Hello')
+        events += parser.feed(' world</completion>')
+        self.assertEqual(events, [
+            ("search", [{"text": "a"}]),
+            ("token", "Hello"),
+            ("token", " world"),
+        ])
+        self.assertEqual(parser.completion, "Hello world")
+
+    def test_markers_split_across_chunks(self):
+        parser = RagStreamParser()
+        stream = '<search>[]</search><completion>one two</completion>'
+        events = []
+        for i in range(0, len(stream), 3):
+            events += parser.feed(stream[i:i + 3])
+        self.assertEqual(events[0], ("search", []))
+        self.assertEqual("".join(data for event, data in events[1:]), "one two")
+        self.assertEqual(parser.completion, "one two")
+
+    def test_format_sse(self):
+        self.assertEqual(format_sse("token", {"content": "a\nb"}), 'event: token\ndata: {"content": "a\\nb"}\n\n')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import io
+import unittest
+
+from starlette.datastructures import Headers, UploadFile
+
+from app.utils.upload import MultipartUpload, UploadStream, UploadTooLarge, hash_upload, upload_stats
+
+def make_upload(content: bytes, size=None) -> UploadFile:
+    return UploadFile(io.BytesIO(content), size=size, filename="a.txt", headers=Headers({"content-type": "text/plain"}))
+
+async def collect(iterator):
+    return [chunk async for chunk in iterator]
+
+class TestUploadStream(unittest.TestCase):
+    def test_reads_in_fixed_size_chunks(self):
+        stream = UploadStream(make_upload(b"abcdefghij"), chunk_size=4, max_bytes=100)
+        chunks = asyncio.run(collect(stream.chunks()))
+        self.assertEqual(chunks, [b"abcd", b"efgh", b"ij"])
+        # The stream can be replayed, e.g. when a batch is retried per file
+        self.assertEqual(asyncio.run(collect(stream.chunks())), chunks)
+
+    def test_tracks_bytes_buffered_per_upload(self):
+        async def run():
+            before = upload_stats.buffered_bytes
+            first = UploadStream(make_upload(b"abcdefghij"), chunk_size=4, max_bytes=100).chunks()
+            second = UploadStream(make_upload(b"xy"), chunk_size=4, max_bytes=100).chunks()
+            await first.__anext__()
+            await second.__anext__()
+            held = (upload_stats.buffered_bytes - before, upload_stats.buffered_bytes_per_upload())
+            await first.__anext__()
+            await first.__anext__()
+            held_after_short_chunk = upload_stats.buffered_bytes - before
+            await first.aclose()
+            await second.aclose()
+            return held, held_after_short_chunk, upload_stats.buffered_bytes - before
+        (buffered, per_upload), after_short_chunk, after_close = asyncio.run(run())
+        self.assertEqual((buffered, per_upload), (6, 3.0))
+        self.assertEqual(after_short_chunk, 4)
+        self.assertEqual(after_close, 0)
+
+    def test_enforces_max_size_while_streaming(self):
+        stream = UploadStream(make_upload(b"x" * 10), chunk_size=4, max_bytes=6)
+        with self.assertRaises(UploadTooLarge):
+            asyncio.run(collect(stream.chunks()))
+        self.assertTrue(stream.too_large)
+
+    def test_multipart_content_length_matches_body(self):
+        multipart = MultipartUpload("files", [
+            UploadStream(make_upload(b"hello", size=5), chunk_size=2, max_bytes=100),
+            UploadStream(make_upload(b"world!", size=6), chunk_size=2, max_bytes=100),
+        ])
+        body = b"".join(asyncio.run(collect(multipart.body())))
+        self.assertEqual(int(multipart.headers["Content-Length"]), len(body))
+        self.assertTrue(body.endswith(f"--{multipart.boundary}--\r\n".encode()))
+
+    def test_multipart_without_known_sizes_is_chunked(self):
+        multipart = MultipartUpload("files", [UploadStream(make_upload(b"hello"), chunk_size=2, max_bytes=100)])
+        self.assertNotIn("Content-Length", multipart.headers)
+
+class TestHashUpload(unittest.TestCase):
+    def test_hashes_in_chunks_and_rewinds(self):
+        upload = make_upload(b"abcdefghij")
+        digest, size = asyncio.run(hash_upload(upload, chunk_size=3))
+        self.assertEqual(digest, hashlib.sha256(b"abcdefghij").hexdigest())
+        self.assertEqual(size, 10)
+        # The upload can still be streamed upstream afterwards
+        stream = UploadStream(upload, chunk_size=4, max_bytes=100)
+        self.assertEqual(b"".join(asyncio.run(collect(stream.chunks()))), b"abcdefghij")
+
+if __name__ == '__main__':
+    unittest.main()